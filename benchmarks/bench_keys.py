@@ -0,0 +1,82 @@
+import copy
+import sys
+import time
+
+from inputdata import PyMorelInputData
+from inputdatadict import InputDataDict
+
+# USAGE: Run the benchmark from a prompt in the base pymorel directory
+#        using the command:> python -m benchmarks.bench_keys [copies]
+#        copies is the number of copies of the 3-region InputDataDict system (default 10)
+
+
+def get_year_dict(copies: int = 10) -> dict:
+    """Return InputDataDict scaled to 52 weeks x 168 hours and copies x 3 regions."""
+    base = InputDataDict().data
+    data = copy.deepcopy(base)
+
+    # Regions, energy carrier/region and assets are copied with a suffix per copy
+    def suffixed(table, columns):
+        rows = {column: [] for column in base[table]}
+        for c in range(copies):
+            for column in base[table]:
+                values = base[table][column]
+                if column in columns:
+                    values = [v + '_' + str(c) if v != '' else v for v in values]
+                rows[column] += values
+        return rows
+    data['r_data'] = suffixed('r_data', ['rgio'])
+    data['er_data'] = suffixed('er_data', ['rgio'])
+    data['a_data'] = suffixed('a_data', ['asst','rgio','dest'])
+    data['ae_data'] = suffixed('ae_data', ['asst'])
+    data['ay_data'] = suffixed('ay_data', ['asst'])
+
+    # Time profiles are repeated across all hours of the week and all weeks of the year
+    weeks = ['w' + str(w).zfill(2) for w in range(1, 53)]
+    hours = ['h' + str(h).zfill(3) for h in range(1, 169)]
+    n = len(base['wh_data']['hour'])
+    data['w_data'] = {'week': weeks}
+    data['h_data'] = {'hour': hours}
+    data['wh_data'] = {'week': [w for w in weeks for h in hours],
+                       'hour': [h for w in weeks for h in hours]}
+    for column, values in base['wh_data'].items():
+        if column not in ['week','hour']:
+            data['wh_data'][column] = [values[i % n] for i in range(len(weeks)*len(hours))]
+    return data
+
+
+class PyMorelInputDataApply(PyMorelInputData):
+    """PyMorelInputData with the former per-row DataFrame.apply(tuple) key construction."""
+
+    def get_keys(self, df: object, columns: list) -> list:
+        if len(df) == 0:
+            return []
+        return df[columns].apply(tuple,axis=1).to_list()
+
+
+def time_inputdata(inputdata_class: type, data: dict) -> tuple:
+    """Return (seconds, PyMorelInputData) for preprocessing data with inputdata_class."""
+    start = time.perf_counter()
+    pymorel_inputdata = inputdata_class()
+    pymorel_inputdata.load_data_from_dict(data)
+    return time.perf_counter() - start, pymorel_inputdata
+
+
+def main(copies: int = 10):
+    data = get_year_dict(copies)
+    print('Year-long dataset: %d regions, %d assets, %d weeks x %d hours'
+          % (len(data['r_data']['rgio']), len(data['a_data']['asst']),
+             len(data['w_data']['week']), len(data['h_data']['hour'])))
+    t_apply, d_apply = time_inputdata(PyMorelInputDataApply, data)
+    t_zip, d_zip = time_inputdata(PyMorelInputData, data)
+    # Both key paths must give identical parameter dicts
+    assert d_apply.para_h == d_zip.para_h
+    assert d_apply.para_y == d_zip.para_y
+    assert d_apply.subsets == d_zip.subsets
+    print('DataFrame.apply(tuple) keys: %8.2f s' % t_apply)
+    print('zip over column keys:        %8.2f s' % t_zip)
+    print('Speedup:                     %8.1f x' % (t_apply / t_zip))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
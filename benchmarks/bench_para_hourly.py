@@ -0,0 +1,87 @@
+import sys
+import time
+import tracemalloc
+
+import pandas
+
+from inputdata import PyMorelInputData
+from benchmarks.bench_keys import get_year_dict
+
+# USAGE: Run the benchmark from a prompt in the base pymorel directory
+#        using the command:> python -m benchmarks.bench_para_hourly [copies]
+#        copies is the number of copies of the 3-region InputDataDict system (default 10)
+
+
+class PyMorelInputDataCartesian(PyMorelInputData):
+    """PyMorelInputData with the former asset x (week x hour) cartesian product in set_para_hourly."""
+
+    def set_para_hourly(self):
+        ah = pandas.merge(self.a.assign(A=1), self.wh.assign(A=1), on='A').drop(columns='A')
+        ah['cst'] = ah.cstV * ah.uniform
+        ah['key'] = self.get_keys(ah, ['asst','week','hour'])
+        ah_p = ah[ah.role == 'prim']
+        ah_t = ah[ah.role == 'tfrm']
+        ah_s = ah[ah.role == 'stor']
+        ah_x = ah[ah.role == 'trms']
+        wh = self.wh.set_index(['week','hour']).stack().reset_index()
+        wh.columns = ['week','hour','vAva','ava']
+        awh = pandas.merge(self.a[['asst','role','vAva']], wh, on='vAva').drop(['vAva'], axis=1)
+        awh['key'] = self.get_keys(awh, ['asst','week','hour'])
+        awh_p = awh[awh.role == 'prim']
+        awh_t = awh[awh.role == 'tfrm']
+        awh_s = awh[awh.role == 'stor']
+        awh_x = awh[awh.role == 'trms']
+        wh.columns = ['week','hour','vFin','mFin']
+        fwh = pandas.merge(self.er[['ener','rgio','vFin','lFin']], wh, on='vFin')
+        fwh['fin'] = fwh.lFin*fwh.mFin
+        fwh['key'] = self.get_keys(fwh, ['ener','rgio','week','hour'])
+        self.para_h = {
+            'cst_Ph': dict(zip(ah_p.key,ah_p.cst)),
+            'cst_Th': dict(zip(ah_t.key,ah_t.cst)),
+            'cst_Sh': dict(zip(ah_s.key,ah_s.cst)),
+            'cst_Xh': dict(zip(ah_x.key,ah_x.cst)),
+            'ava_Ph': dict(zip(awh_p.key,awh_p.ava)),
+            'ava_Th': dict(zip(awh_t.key,awh_t.ava)),
+            'ava_Xh': dict(zip(awh_x.key,awh_x.ava)),
+            'ava_Ih': dict(zip(awh_x.key,awh_x.ava)),
+            'ava_Sh': dict(zip(awh_s.key,awh_s.ava)),
+            'ava_Dh': dict(zip(awh_s.key,awh_s.ava)),
+            'ava_Vh': dict(zip(awh_s.key,awh_s.ava)),
+            'fin_h': dict(zip(fwh.key,fwh.fin)),
+        }
+
+
+def profile_para_hourly(inputdata_class: type, data: dict) -> tuple:
+    """Return (seconds, peak MB, para_h) of set_para_hourly with inputdata_class."""
+    pymorel_inputdata = inputdata_class()
+    pymorel_inputdata.inputdata = data
+    pymorel_inputdata.set_dataframes()
+    pymorel_inputdata.set_sets()
+    tracemalloc.start()
+    start = time.perf_counter()
+    pymorel_inputdata.set_para_hourly()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return seconds, peak, pymorel_inputdata.para_h
+
+
+def main(copies: int = 10):
+    data = get_year_dict(copies)
+    print('Year-long dataset: %d regions, %d assets, %d weeks x %d hours'
+          % (len(data['r_data']['rgio']), len(data['a_data']['asst']),
+             len(data['w_data']['week']), len(data['h_data']['hour'])))
+    t_cart, m_cart, para_cart = profile_para_hourly(PyMorelInputDataCartesian, data)
+    t_prof, m_prof, para_prof = profile_para_hourly(PyMorelInputData, data)
+    # The per-profile parameters equal the cartesian ones without the default (zero) entries
+    for name, para in para_cart.items():
+        assert para_prof[name] == {key: value for key, value in para.items() if value != 0}, name
+    entries_cart = sum(len(para) for para in para_cart.values())
+    entries_prof = sum(len(para) for para in para_prof.values())
+    print('                        time [s]   peak [MB]    entries')
+    print('Cartesian product:     %9.2f   %9.1f   %8d' % (t_cart, m_cart, entries_cart))
+    print('Per role and profile:  %9.2f   %9.1f   %8d' % (t_prof, m_prof, entries_prof))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
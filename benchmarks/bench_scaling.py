@@ -0,0 +1,125 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from synthetic import PyMorelSyntheticData
+
+# USAGE: Run the benchmark from a prompt in the base pymorel directory
+#        using the command:> python -m benchmarks.bench_scaling [--scales small medium] [--backends matrix]
+#        Results are stored in benchmarks/results/<commit>.json, compare two runs with
+#        the command:> python -m benchmarks.bench_scaling --compare <old>.json <new>.json
+
+# Sizes of the synthetic systems, see PyMorelSyntheticData
+SCALES = {
+    'small':  {'regions': 3,  'weeks': 1,  'hours': 24},
+    'medium': {'regions': 10, 'weeks': 4,  'hours': 168},
+    'large':  {'regions': 20, 'weeks': 13, 'hours': 168},
+}
+BACKENDS = ['pyomo', 'matrix']
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def run(scale: str, backend: str, solver_name: str, matrix_solver: str) -> dict:
+    """Preprocess, build, solve and read output of synthetic system, return the profiler report."""
+    from inputdata import PyMorelInputData
+    from matrixmodel import PyMorelMatrixModel
+    from model import PyMorelModel
+    from output import PyMorelOutput
+    from profiling import PyMorelProfiler
+
+    data = PyMorelSyntheticData(**SCALES[scale]).data
+    profiler = PyMorelProfiler()
+    pymorel_inputdata = PyMorelInputData(profiler=profiler)
+    pymorel_inputdata.load_data_from_dict(data)
+    if backend == 'matrix':
+        pymorel_model = PyMorelMatrixModel(pymorel_inputdata, profiler=profiler)
+        pymorel_model.solve(matrix_solver)
+    else:
+        pymorel_model = PyMorelModel(pymorel_inputdata, profiler=profiler)
+        pymorel_model.solve(solver_name)
+    PyMorelOutput(pymorel_model, read=True)
+    report = profiler.report()
+    report.update({
+        'scale': scale,
+        'backend': backend,
+        'size': {'regions': len(data['r_data']['rgio']), 'assets': len(data['a_data']['asst']),
+                 'weeks': len(data['w_data']['week']), 'hours': len(data['h_data']['hour'])},
+    })
+    return report
+
+
+def get_commit() -> str:
+    """Return short hash of the checked out commit, marked -dirty if the tree has changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if status else '')
+
+
+def compare(old_file: str, new_file: str):
+    """Print seconds and peak RSS increase by stage of two result files, with the ratio new/old."""
+    with open(old_file) as f:
+        old = json.load(f)
+    with open(new_file) as f:
+        new = json.load(f)
+    print('%s -> %s' % (old['commit'], new['commit']))
+    old_runs = {(r['scale'], r['backend']): r for r in old['runs']}
+    for run_new in new['runs']:
+        run_old = old_runs.get((run_new['scale'], run_new['backend']))
+        if run_old is None:
+            continue
+        print('\n%s / %s' % (run_new['scale'], run_new['backend']))
+        print('%-40s %10s %10s %8s %10s %10s' % ('stage', 'old [s]', 'new [s]', 'ratio', 'old [MB]', 'new [MB]'))
+        old_stages = {s['stage']: s for s in run_old['stages']}
+        for stage in run_new['stages']:
+            previous = old_stages.get(stage['stage'])
+            if previous is None:
+                continue
+            ratio = stage['seconds'] / previous['seconds'] if previous['seconds'] > 0 else float('nan')
+            memory = lambda record: '-' if record['peak_rss_increase_mb'] is None \
+                else '%.1f' % record['peak_rss_increase_mb']
+            print('%-40s %10.3f %10.3f %8.2f %10s %10s' % (
+                stage['stage'], previous['seconds'], stage['seconds'], ratio, memory(previous), memory(stage)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PyMorel on synthetic systems of several sizes.')
+    parser.add_argument('--scales', nargs='+', default=['small', 'medium'], choices=list(SCALES))
+    parser.add_argument('--backends', nargs='+', default=BACKENDS, choices=BACKENDS)
+    parser.add_argument('--solver', default='appsi_highs', help='Pyomo solver of the pyomo backend')
+    parser.add_argument('--matrix-solver', default='scipy', choices=['scipy', 'highs'],
+                        help='Solver of the matrix backend')
+    parser.add_argument('--output', default=None, help='Result file, default results/<commit>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two result files')
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    result = {'commit': get_commit(), 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+              'python': sys.version.split()[0], 'platform': platform.platform(), 'runs': []}
+    for scale in args.scales:
+        for backend in args.backends:
+            # Each run in a fresh process, so that peak RSS is not carried over from earlier runs
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                report = executor.submit(run, scale, backend, args.solver, args.matrix_solver).result()
+            result['runs'].append(report)
+            print('%-8s %-8s %8.2f s  %8.1f MB peak' % (scale, backend, report['seconds'], report['peak_rss_mb'] or 0))
+    output = args.output or os.path.join(RESULTS, result['commit'] + '.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print('Results written to ' + output)
+
+
+if __name__ == '__main__':
+    main()
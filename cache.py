@@ -0,0 +1,95 @@
+import hashlib
+import os
+import pickle
+
+import pandas
+
+
+class PyMorelCache():
+    """Content-hashed on-disk cache of preprocessed input data and built models."""
+
+    # Bump version when preprocessing changes, so that artifacts of older code are not reused
+    version = 4
+
+    # Input tables each preprocessing stage depends on, stages not listed (e.g. validate) depend on
+    # all tables. Assets are cleaned by ay_data in PyMorelInputData.set_dataframes(), so all stages
+    # depending on assets depend on ay_data. Changing e.g. only er_data reuses the cached sets and
+    # yearly parameters.
+    stages = {
+        'sets':   ['a_data','ae_data','ay_data','e_data','r_data','w_data','h_data'],
+        'para_h': ['a_data','ay_data','er_data','w_data','h_data','wh_data'],
+        'para_y': ['a_data','ae_data','ay_data'],
+    }
+
+    def __init__(self, path: str, max_bytes: int = 2**30):
+        self.path = path                # Cache directory
+        self.max_bytes = max_bytes      # Least recently used artifacts are evicted above this size
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        os.makedirs(path, exist_ok=True)
+
+    def get_table_hashes(self, inputdata: dict) -> dict:
+        """Return dict of content hash by input table (dataframe or dict of lists)."""
+        hashes = {}
+        for table, data in inputdata.items():
+            df = pandas.DataFrame(data)
+            h = hashlib.sha1(repr(list(df.columns)).encode())
+            h.update(pandas.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+            hashes[table] = h.hexdigest()
+        return hashes
+
+    def get_key(self, stage: str, hashes: dict, components: list = ()) -> str:
+        """Return cache key of stage from the hashes of the tables it depends on (all if not listed) and
+        other components of the key, e.g. the year of the yearly parameters."""
+        tables = self.stages.get(stage, sorted(hashes))
+        h = hashlib.sha1((str(self.version) + stage).encode())
+        for table in tables:
+            h.update((table + hashes.get(table, '')).encode())
+        for component in components:
+            h.update(('/' + str(component)).encode())
+        return stage + '_' + h.hexdigest()
+
+    def get_file_name(self, key: str) -> str:
+        return os.path.join(self.path, key + '.pkl')
+
+    def get(self, key: str) -> object:
+        """Return cached artifact by key, or None if not in cache."""
+        file_name = self.get_file_name(key)
+        try:
+            with open(file_name, 'rb') as f:
+                artifact = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.stats['misses'] += 1
+            return None
+        os.utime(file_name)             # Mark as recently used for eviction
+        self.stats['hits'] += 1
+        return artifact
+
+    def put(self, key: str, artifact: object):
+        """Store artifact by key, then evict least recently used artifacts above max_bytes."""
+        file_name = self.get_file_name(key)
+        tmp_file_name = file_name + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp_file_name, 'wb') as f:
+            pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file_name, file_name)    # Atomic, so readers never see partial files
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used artifacts until the cache is below max_bytes."""
+        files = []
+        for name in os.listdir(self.path):
+            if name.endswith('.pkl'):
+                stat = os.stat(os.path.join(self.path, name))
+                files.append((stat.st_mtime, stat.st_size, name))
+        size = sum(f[1] for f in files)
+        for mtime, file_size, name in sorted(files):
+            if size <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.path, name))
+            size -= file_size
+            self.stats['evictions'] += 1
+
+    def clear(self):
+        """Delete all artifacts."""
+        for name in os.listdir(self.path):
+            if name.endswith('.pkl'):
+                os.remove(os.path.join(self.path, name))
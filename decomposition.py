@@ -0,0 +1,150 @@
+import copy
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas
+from pyomo.environ import ConcreteModel, Constraint, ConstraintList, Objective, Param, Var
+from pyomo.environ import NonNegativeReals, Reals, value
+
+from inputdata import PyMorelInputData
+from output import PyMorelOutput
+from model import PyMorelModel
+from solver import get_solver
+
+# Inputdata dicts by week, the week models built in this worker process, the solver and the penalty
+# of unserved energy, see init_worker()
+_week_data = {}
+_week_models = {}
+_solver = None
+_penalty = None
+
+
+def init_worker(week_data: dict, solver: object = None, penalty: float = 1e4):
+    """Keep the inputdata dicts of all weeks, the solver and the penalty in the worker process."""
+    global _week_data, _week_models, _solver, _penalty
+    _week_data = week_data
+    _week_models = {}
+    _solver = get_solver(solver, 'glpk')
+    _penalty = penalty
+
+
+def get_week_model(week: str) -> object:
+    """Return PyMorelModel of week with capacity additions C fixed by constraint, built once per process.
+
+    Unserved energy Uh in Q_equilibrium_h at cost _penalty per unit of energy keeps the week feasible for
+    any capacities of the master problem, so that its cuts price missing capacity instead of failing."""
+    if week not in _week_models:
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(_week_data[week])
+        pymorel_model = PyMorelModel(pymorel_inputdata)
+        m = pymorel_model.model
+        # The dual of Q_fix_C is the marginal cost of capacity in this week
+        m.fix_C = Param(m.AC, initialize=0, mutable=True)
+        m.Q_fix_C = Constraint(m.AC, rule=lambda m, a: m.C[a] == m.fix_C[a])
+        for a in m.AC:
+            m.C[a].domain = Reals   # Else the bounds of C take (part of) the dual when capacity is fixed at 0 or max_C
+            m.C[a].setub(None)
+        m.Uh = Var(m.EH, m.R, m.W, m.H, within=NonNegativeReals)
+        for index in m.Q_equilibrium_h:
+            supply, demand = m.Q_equilibrium_h[index].expr.args
+            m.Q_equilibrium_h[index] = supply + m.Uh[index] == demand
+        m.obj.set_value(m.obj.expr + sum(_penalty * m.wgt_h[w,h] * m.Uh[e,r,w,h] for e,r,w,h in m.Uh))
+        _week_models[week] = pymorel_model
+    return _week_models[week]
+
+
+def solve_week(week: str, capacities: dict, balance: bool = False) -> dict:
+    """Solve operational subproblem of week for fixed capacities, return cost and capacity marginal costs."""
+    pymorel_model = get_week_model(week)
+    m = pymorel_model.model
+    for a in m.AC:
+        m.fix_C[a] = capacities[a]
+    pymorel_model.solve(_solver)
+    if not pymorel_model.solver_result.is_optimal():
+        raise RuntimeError("Operational subproblem of week " + week + " is not optimal: "
+                           + pymorel_model.solver_result.termination)
+    # The subproblem objective includes capital costs of the fixed capacities, which belong to the master
+    capex = {a: value(m.cst_C[a]) for a in m.AC}
+    result = {
+        'week': week,
+        'cost': value(m.obj) - sum(capex[a] * capacities[a] for a in m.AC),
+        'marginal': {a: m.dual[m.Q_fix_C[a]] - capex[a] for a in m.AC},
+        'unserved': sum(value(m.wgt_h[w,h]) * (m.Uh[e,r,w,h].value or 0) for e,r,w,h in m.Uh),
+    }
+    if balance:
+        result['balance_h'] = PyMorelOutput(pymorel_model).balance_h
+    return result
+
+
+class PyMorelDecomposition():
+    """Class for solving PyMorel week by week, with parallel operational subproblems per week for
+    fixed capacities and a Benders master problem coordinating the capacity additions C."""
+
+    def __init__(self, data: dict, workers: int = None, tolerance: float = 1e-6, max_iterations: int = 50,
+                 solver: object = None, penalty: float = 1e4):
+        self.data = data                    # Inputdata dict as for PyMorelInputData.load_data_from_dict()
+        self.solver = solver                # PyMorelSolver or solver name of master and subproblems, default glpk
+        self.workers = workers or os.cpu_count()
+        self.tolerance = tolerance          # Relative gap between upper and lower bound at convergence
+        self.max_iterations = max_iterations
+        self.penalty = penalty              # Cost per unit of unserved energy in the subproblems, above any price
+        self.full = PyMorelInputData()
+        self.full.load_data_from_dict(data)
+        self.weeks = self.full.sets['W']
+        self.set_week_data()
+
+    def set_week_data(self):
+        """Split inputdata into one dict per week, with the weights of the full year."""
+        wh = pandas.DataFrame(self.data['wh_data'])
+        wh['wght'] = [self.full.para_h['wgt_h'].get(key, 0) for key in zip(wh['week'], wh['hour'])]
+        self.week_data = {}
+        for week in self.weeks:
+            data = dict(self.data)
+            data['w_data'] = {'week': [week]}
+            data['wh_data'] = wh[wh['week'] == week].reset_index(drop=True)
+            self.week_data[week] = data
+
+    def solve(self) -> dict:
+        """Iterate subproblems and master problem until the bounds meet, return capacity additions."""
+        AC = list(dict.fromkeys(self.full.subsets['AC']))
+        cst_C = {a: self.full.para_y['cst_C'].get((a,), 0) for a in AC}
+        max_C = {a: self.full.para_y['max_C'].get((a,), 0) for a in AC}
+        master = self.get_master(AC, cst_C, max_C)
+        master_solver = copy.copy(get_solver(self.solver, 'glpk'))
+        capacities = {a: 0 for a in AC}
+        self.iterations = []
+        upper = math.inf
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                 initargs=(self.week_data, self.solver, self.penalty)) as executor:
+            for iteration in range(self.max_iterations):
+                results = list(executor.map(solve_week, self.weeks, [capacities] * len(self.weeks)))
+                total = sum(cst_C[a] * capacities[a] for a in AC) + sum(r['cost'] for r in results)
+                if total < upper:
+                    upper, self.capacities = total, dict(capacities)
+                # Optimality cut per week: theta_w >= cost_w + marginal_w * (C - capacities)
+                for r in results:
+                    master.cuts.add(master.theta[r['week']] >= r['cost']
+                                    + sum(r['marginal'][a] * (master.C[a] - capacities[a]) for a in AC))
+                self.master_results = master_solver.solve_pyomo(master)[1]
+                lower = value(master.obj)
+                capacities = {a: max(0, value(master.C[a])) for a in AC}
+                self.iterations.append({'iteration': iteration, 'lower': lower, 'upper': upper})
+                if upper - lower <= self.tolerance * max(1, abs(upper)):
+                    break
+            # Final operational solution for the best capacities found
+            results = list(executor.map(solve_week, self.weeks, [self.capacities] * len(self.weeks),
+                                        [True] * len(self.weeks)))
+        self.objective = upper
+        self.unserved = sum(r['unserved'] for r in results)     # Energy not served even at the best capacities
+        self.balance_h = pandas.concat([r['balance_h'] for r in results]).groupby(level=[0,1,2], observed=True).sum()
+        return self.capacities
+
+    def get_master(self, AC: list, cst_C: dict, max_C: dict) -> object:
+        """Return Benders master problem over capacity additions and the operational cost of each week."""
+        m = ConcreteModel()
+        m.C = Var(AC, within=NonNegativeReals, bounds=lambda m, a: (0, max_C[a]))
+        m.theta = Var(self.weeks)           # Operational cost of week, bounded below by cuts
+        m.obj = Objective(expr=sum(cst_C[a] * m.C[a] for a in AC) + sum(m.theta[w] for w in self.weeks))
+        m.cuts = ConstraintList()
+        return m
@@ -1,9 +1,94 @@
+from collections.abc import Mapping
+
+import numpy
 import pandas
 
+from inputfiles import read_xls, read_dir
+from profiling import PyMorelProfiler
+from validation import PyMorelValidation, PyMorelValidationError
+
+
+class PyMorelParaArray(Mapping):
+    """Hourly parameter stored as a dense NumPy array with one row per key (e.g. asset or (ener,rgio))
+    and one column per (week,hour) in the order of the sets W and H.
+
+    Keys are interned to integer row and column codes, so that no tuple is stored per entry. The array
+    reads as the former dict {(*key,w,h): value} without the zero (default) entries, so Pyomo Params are
+    initialized lazily from it, while the matrix builder takes whole rows with get_row()."""
+
+    def __init__(self, keys: list, wh: list, wh_codes: dict, array: object = None):
+        self.index = list(dict.fromkeys(keys))                     # Row keys, e.g. [('bpgt_dk0',),]
+        self.codes = {key: i for i, key in enumerate(self.index)}  # Row code of each key
+        self.wh = wh                    # (week,hour) of each column, shared by all parameters
+        self.wh_codes = wh_codes        # Column code of each (week,hour), shared by all parameters
+        self.array = numpy.zeros((len(self.index), len(wh))) if array is None else array
+
+    def __getitem__(self, key: tuple) -> float:
+        value = self.array[self.codes[key[:-2]], self.wh_codes[key[-2:]]]
+        if value == 0:
+            raise KeyError(key)
+        return float(value)
+
+    def __contains__(self, key: tuple) -> bool:
+        try:
+            self[key]
+        except (KeyError, TypeError):
+            return False
+        return True
+
+    def __iter__(self):
+        rows, cols = self.array.nonzero()
+        return (self.index[i] + self.wh[j] for i, j in zip(rows.tolist(), cols.tolist()))
+
+    def __len__(self) -> int:
+        return int(numpy.count_nonzero(self.array))
+
+    def items(self):
+        """Return (key, value) pairs of the nonzero entries, without a lookup per entry."""
+        rows, cols = self.array.nonzero()
+        return zip(self, self.array[rows, cols].tolist())
+
+    def get_row(self, key: tuple) -> object:
+        """Return values of key in (week,hour) order, zeros if key has no entries."""
+        i = self.codes.get(key)
+        return numpy.zeros(len(self.wh)) if i is None else self.array[i]
+
+    def diff(self, other: object) -> dict:
+        """Return {(*key,w,h): value} of the entries of other that differ from this parameter (0 if removed).
+
+        Both parameters must have the same (week,hour) columns."""
+        changed = {}
+        for key in dict.fromkeys(self.index + other.index):
+            old, new = self.get_row(key), other.get_row(key)
+            for j in numpy.flatnonzero(old != new).tolist():
+                changed[key + self.wh[j]] = float(new[j])
+        return changed
+
+    def view(self) -> object:
+        """Return parameter sharing keys and values with this one, for parameters that are equal by definition."""
+        shared = PyMorelParaArray.__new__(PyMorelParaArray)
+        shared.__dict__.update(self.__dict__)
+        return shared
+
 
 class PyMorelInputData():
     """Class for holding input and output data to PyMorelModel"""
 
+    # Attributes set by each preprocessing stage, reused from PyMorelCache when the inputs of the stage are
+    # unchanged. The years are kept with the yearly parameters, as the dataframes are not set if all are cached
+    stage_attributes = {
+        'validate': ['validation'],
+        'sets':     ['sets','subsets','index_er'],
+        'para_h':   ['para_h'],
+        'para_y':   ['para_y','years','year'],
+    }
+
+    def __init__(self, cache: object = None, profiler: object = None, year: str = None, validate: bool = True):
+        self.cache = cache              # Optional PyMorelCache of preprocessed sets and parameters
+        self.profiler = profiler or PyMorelProfiler()   # Time, memory and object counts by stage
+        self.year = year                # Year of the yearly parameters, default the first year in ay_data
+        self.validate = validate        # Check input tables before preprocessing, see PyMorelValidation
+
     def load_data_from_dict(self,dict_data):
         """Sets input data directly from hard coded dict (e.g. simple testing purposes)."""
         self.inputdata = dict_data
@@ -11,14 +96,98 @@ class PyMorelInputData():
 
     def load_data_from_xls(self,xls_file_name):
         """Sets input data from Excel sheet by file name."""
-        return None
+        self.inputdata = read_xls(xls_file_name)
+        self.declare_assign()
+
+    def load_data_from_dir(self,path):
+        """Sets input data from directory of Feather or Parquet files by path."""
+        self.inputdata = read_dir(path)
+        self.declare_assign()
 
     def declare_assign(self):
         """Set Pyomo Set() and Param() from given input data"""
-        self.set_dataframes()
-        self.set_sets()
-        self.set_para_hourly()
-        self.set_para_yearly()
+        with self.profiler.stage('input', self.get_counts):
+            # The input tables are hashed first, so that a run with all stages cached skips validation and
+            # the dataframes as well
+            artifacts = self.get_artifacts() if self.cache else {}
+            if self.validate:
+                self.set_cached('validate', [self.set_validation], artifacts)
+            if any(stage not in artifacts for stage in ['sets','para_h','para_y']):
+                with self.profiler.stage('dataframes'):
+                    self.set_dataframes()
+            self.set_cached('sets', [self.set_sets, self.set_index_er], artifacts)
+            self.set_cached('para_h', [self.set_para_hourly], artifacts)
+            self.set_cached('para_y', [self.set_para_yearly], artifacts)
+
+    def get_artifacts(self) -> dict:
+        """Return cached artifacts by preprocessing stage, for the stages whose inputs are unchanged."""
+        with self.profiler.stage('hash'):
+            hashes = self.cache.get_table_hashes(self.inputdata)
+        # Yearly parameters also depend on the year, None for the first year in ay_data
+        self.cache_keys = {stage: self.cache.get_key(stage, hashes, [self.year] if stage == 'para_y' else [])
+                           for stage in self.stage_attributes if self.validate or stage != 'validate'}
+        artifacts = {stage: self.cache.get(key) for stage, key in self.cache_keys.items()}
+        return {stage: artifact for stage, artifact in artifacts.items() if artifact is not None}
+
+    def set_cached(self, stage: str, setters: list, artifacts: dict):
+        """Run setters of preprocessing stage, or reuse their attributes from the cached artifacts."""
+        with self.profiler.stage(stage, self.get_counts) as record:
+            attributes = self.stage_attributes[stage]
+            artifact = artifacts.get(stage)
+            if self.cache is not None:
+                record['cached'] = artifact is not None
+            if artifact is None:
+                for setter in setters:
+                    setter()
+                if self.cache is None:
+                    return
+                artifact = {attribute: getattr(self, attribute) for attribute in attributes}
+                self.cache.put(self.cache_keys[stage], artifact)
+            for attribute in attributes:
+                setattr(self, attribute, artifact[attribute])
+
+    def set_validation(self):
+        """Check the input tables, see PyMorelValidation. Raise PyMorelValidationError if there are errors."""
+        self.validation = PyMorelValidation(self.inputdata).validate()
+        if self.validation.errors:
+            raise PyMorelValidationError(self.validation)
+
+    def get_counts(self) -> dict:
+        """Return number of set members and parameter entries preprocessed so far."""
+        count = lambda name: sum(len(values) for values in getattr(self, name, {}).values())
+        return {'sets': count('sets'), 'subsets': count('subsets'), 'para_h': count('para_h'), 'para_y': count('para_y')}
+
+    def diff(self, other: object) -> dict:
+        """Return the differences of PyMorelInputData other from this one, for PyMorelModel.apply_data().
+
+        sets: {name: (added, removed)} of the changed sets and subsets
+        index_er: {subset: [(e,r),]} of the (ener,rgio) whose linked assets changed
+        para_h, para_y: {name: {key: new value}} of the changed parameter entries (0 if removed)"""
+        diff = {'sets': {}, 'index_er': {}, 'para_h': {}, 'para_y': {}}
+        for sets, other_sets in [(self.sets, other.sets), (self.subsets, other.subsets)]:
+            for name, elements in sets.items():
+                old, new = dict.fromkeys(elements), dict.fromkeys(other_sets[name])
+                if old != new or list(old) != list(new):
+                    diff['sets'][name] = ([e for e in new if e not in old], [e for e in old if e not in new])
+        for subset, index in self.index_er.items():
+            other_index = other.index_er[subset]
+            changed = [er for er in dict.fromkeys(list(index) + list(other_index))
+                       if index.get(er) != other_index.get(er)]
+            if changed:
+                diff['index_er'][subset] = changed
+        if 'W' in diff['sets'] or 'H' in diff['sets']:
+            return diff         # Hourly parameters of different time slices are not compared
+        for name, para in self.para_h.items():
+            changed = para.diff(other.para_h[name])
+            if changed:
+                diff['para_h'][name] = changed
+        for name, para in self.para_y.items():
+            other_para = other.para_y[name]
+            changed = {key: other_para.get(key, 0) for key in dict.fromkeys(list(para) + list(other_para))
+                       if para.get(key, 0) != other_para.get(key, 0)}
+            if changed:
+                diff['para_y'][name] = changed
+        return diff
 
     def set_dataframes(self):
         """Loads input data into internal dataframes, clean and set the main sets."""
@@ -35,10 +204,18 @@ class PyMorelInputData():
         self.e = pandas.DataFrame(self.inputdata['e_data'])         # Energy carrier data
         self.er = pandas.DataFrame(self.inputdata['er_data'])       # Energy carrier x region data
 
-        # Clean out assets that are not relevant to the year or have zero endo & exo capacity limit
-        self.ay[(self.ay.year == 'y2020') & ((self.ay.iniC > 0) | (self.ay.maxC > 0))]
-        self.a = pandas.merge(self.a,self.ay['asst'], on='asst')    # merge will drop t rows that have no tech in ty
-        self.ae = pandas.merge(self.ae,self.ay['asst'], on='asst')  # merge will drop te rows that have no tech in ty
+        # Years in order of ay_data, the yearly parameters are those of self.year
+        self.years = list(dict.fromkeys(str(year) for year in self.ay['year'].to_list()))
+        if self.year is None:
+            self.year = self.years[0]
+        elif self.year not in self.years:
+            raise ValueError("Year " + str(self.year) + " is not in ay_data.")
+        # Clean out assets that have zero endo & exo capacity limit in all years. Assets are the same in all
+        # years, so that models of different years have the same sets
+        self.ay = self.ay[(self.ay.iniC > 0) | (self.ay.maxC > 0)]
+        assets = self.ay[['asst']].drop_duplicates()
+        self.a = pandas.merge(self.a,assets, on='asst')             # merge will drop t rows that have no tech in ty
+        self.ae = pandas.merge(self.ae,assets, on='asst')           # merge will drop te rows that have no tech in ty
         # TODO: Clean t for regions not in a
         # TODO: Clean te for eners not in e
 
@@ -58,18 +235,18 @@ class PyMorelInputData():
         aee = pandas.merge(self.ae,self.e[['ener','tfrq']], on='ener')
         aee = pandas.merge(aee,self.a, on='asst')
         # Create ener,region,tech tuple-keys e.g. ('elec','dk0','ccgt') in the dataframe for later use
-        aee['key_era'] = aee[['ener','rgio','asst']].apply(tuple,axis=1)
+        aee['key_era'] = self.get_keys(aee, ['ener','rgio','asst'])
 
         # Copy all transmission assets in order to put the import flows
         # into the TI*_ea subsets.
         # Now, dest becomes the origin region of the export
-        dst = aee[aee.role == 'trms']
+        dst = aee[aee.role == 'trms'].copy()
         # The dest tuple key use dest instead of region
-        dst['key_era'] = dst[['ener','dest','asst']].apply(tuple,axis=1)
+        dst['key_era'] = self.get_keys(dst, ['ener','dest','asst'])
         # Save the main simple subsets in a dict of lists { 'TC': }
         self.subsets = {
             # Assets that can be invested in
-            'AC': self.ay['asst'][self.ay.maxC > 0].to_list(),
+            'AC': list(dict.fromkeys(self.ay['asst'][self.ay.maxC > 0].to_list())),
             # Asset subsets by role [primary, transformation, transmission & storage]
             'AP':  self.a['asst'][self.a.role == 'prim'].to_list(),
             'AT':  self.a['asst'][self.a.role == 'tfrm'].to_list(),
@@ -118,6 +295,21 @@ class PyMorelInputData():
             # All (ener,region,tech) tuple-key combos
             'ERA': aee['key_era'].to_list() + dst['key_era'].to_list()
         }
+        # Hourly assets with capacity investment, whose capacity limits are constraints rather than bounds
+        AC = set(self.subsets['AC'])
+        for subset in ['ATH','AXH','ASH']:
+            self.subsets[subset + 'C'] = [a for a in self.subsets[subset] if a in AC]
+
+    def set_index_er(self):
+        """Index hourly assets by (ener,rgio) for each role and transmission direction."""
+        # Maps e.g. ('elec','dk0') to ['bpgt_dk0','wind_dk0'], so that the equilibrium rule only
+        # visits the assets actually linked to each (ener,rgio) instead of testing all assets
+        self.index_er = {}
+        for subset in ['APH','ATH','AXH','AIH','ASH']:
+            index = {}
+            for (e,r,a) in self.subsets[subset + '_er']:
+                index.setdefault((e,r), {})[a] = None   # dict as ordered set, drops duplicates
+            self.index_er[subset] = {er: list(assets) for er, assets in index.items()}
 
     def set_para_hourly(self):
         """Make dict for all hourly model parameters."""
@@ -125,48 +317,46 @@ class PyMorelInputData():
         #       for availability, variable unit costs etc., also allowing for differences
         #       in these between e.g. S, D and V for storage
         #       We will probably need a column in a_data for each merge
-        # ah is asset x (weeks x hours), for now only variable cost
-        # outer join of asst, week & hours so that we get a asst x (week x hour) matrix
-        # Join on artificial key A=1 set for all rows in t_data and wh_data
-        ah = pandas.merge(self.a.assign(A=1), self.wh.assign(A=1), on='A').drop('A',1)
-        ah['cst'] = ah.cstV * ah.uniform
-        ah['key'] = ah[['asst','week','hour']].apply(tuple,axis=1)
-        ah_p = ah[ah.role == 'prim']
-        ah_t = ah[ah.role == 'tfrm']
-        ah_s = ah[ah.role == 'stor']
-        ah_x = ah[ah.role == 'trms']
-
-        # Stack wh_data availability from wide format (hours x weeks in rows and availability types in columns)
-        # to long format (availability type x hours x weeks) in rows and one column for values
-        wh = self.wh.set_index(['week','hour']).stack().reset_index()
-        wh.columns = ['week','hour','vAva','ava']
-        awh = pandas.merge(self.a[['asst','role','vAva']], wh, on='vAva').drop(['vAva'], axis=1)
-        awh['key'] = awh[['asst','week','hour']].apply(tuple,axis=1)
-        awh_p = awh[awh.role == 'prim']
-        awh_t = awh[awh.role == 'tfrm']
-        awh_s = awh[awh.role == 'stor']
-        awh_x = awh[awh.role == 'trms']
-
-        # Final consumption - mFin is the multiplier from the selected column lFin
-        wh.columns = ['week','hour','vFin','mFin']
-        fwh = pandas.merge(self.er[['ener','rgio','vFin','lFin']], wh, on='vFin')
-        fwh['fin'] = fwh.lFin*fwh.mFin
-        fwh['key'] = fwh[['ener','rgio','week','hour']].apply(tuple,axis=1)
-
-        # Declare hourly parameters with dict keys (tth,w,h)
+        # Hourly parameters are made per role and per profile column of wh_data, so that no
+        # asset x (week x hour) cartesian product is ever built. Entries equal to the Param
+        # default of 0 are left out. Variable cost is cstV times the 'uniform' profile for now
+        a = self.a.assign(vCst='uniform', lAva=1)
+        # Columns of the hourly parameter arrays are (week,hour) in the order of the sets W and H
+        self.wh_keys = [(w,h) for w in self.w['week'].to_list() for h in self.h['hour'].to_list()]
+        self.wh_codes = {wh: i for i, wh in enumerate(self.wh_keys)}
+        a_p = a[a.role == 'prim']
+        a_t = a[a.role == 'tfrm']
+        a_s = a[a.role == 'stor']
+        a_x = a[a.role == 'trms']
+
+        # Availability of transmission and storage is shared between X/I and S/D/V respectively
+        ava_x = self.get_para_profile(a_x, ['asst'], 'vAva', 'lAva')
+        ava_s = self.get_para_profile(a_s, ['asst'], 'vAva', 'lAva')
+
+        # Weight of each (week,hour) time slice as the hours of the year it represents. Aggregated
+        # time slices carry their weight in wh_data column wght, otherwise all slices weigh the same
+        wgt_h = PyMorelParaArray([()], self.wh_keys, self.wh_codes)
+        if 'wght' in self.wh.columns:
+            wgt_h.array[0, self.get_wh_cols()] = self.wh['wght'].to_numpy(dtype=float)
+        else:
+            wgt_h.array[0, self.get_wh_cols()] = 365.25*24/(len(self.w)*len(self.h))
+
+        # Declare hourly parameters with keys (tth,w,h), duplicated parameters share one array
         self.para_h = {
-            'cst_Ph': dict(zip(ah_p.key,ah_p.cst)),     # Hourly unit cost of prim. prod. asset
-            'cst_Th': dict(zip(ah_t.key,ah_t.cst)),     # Hourly unit cost of transformation asset
-            'cst_Sh': dict(zip(ah_s.key,ah_s.cst)),     # Hourly unit cost of storage asset
-            'cst_Xh': dict(zip(ah_x.key,ah_x.cst)),     # Hourly unit cost of transmission asset
-            'ava_Ph': dict(zip(awh_p.key,awh_p.ava)),   # Hourly availability of prim. prod. asset
-            'ava_Th': dict(zip(awh_t.key,awh_t.ava)),   # Hourly availability of transformation asset
-            'ava_Xh': dict(zip(awh_x.key,awh_x.ava)),   # Hourly availability of transmission export asset
-            'ava_Ih': dict(zip(awh_x.key,awh_x.ava)),   # Hourly availability of transmission import asset
-            'ava_Sh': dict(zip(awh_s.key,awh_s.ava)),   # Hourly availability of storage at storage asset
-            'ava_Dh': dict(zip(awh_s.key,awh_s.ava)),   # Hourly availability of discharge at storage asset
-            'ava_Vh': dict(zip(awh_s.key,awh_s.ava)),   # Hourly availability of volume at storage asset
-            'fin_h': dict(zip(fwh.key,fwh.fin)),        # Hourly final consumption by ener, region, week and hour
+            'cst_Ph': self.get_para_profile(a_p, ['asst'], 'vCst', 'cstV'),    # Hourly unit cost of prim. prod. asset
+            'cst_Th': self.get_para_profile(a_t, ['asst'], 'vCst', 'cstV'),    # Hourly unit cost of transformation asset
+            'cst_Sh': self.get_para_profile(a_s, ['asst'], 'vCst', 'cstV'),    # Hourly unit cost of storage asset
+            'cst_Xh': self.get_para_profile(a_x, ['asst'], 'vCst', 'cstV'),    # Hourly unit cost of transmission asset
+            'ava_Ph': self.get_para_profile(a_p, ['asst'], 'vAva', 'lAva'),    # Hourly availability of prim. prod. asset
+            'ava_Th': self.get_para_profile(a_t, ['asst'], 'vAva', 'lAva'),    # Hourly availability of transformation asset
+            'ava_Xh': ava_x,                # Hourly availability of transmission export asset
+            'ava_Ih': ava_x.view(),         # Hourly availability of transmission import asset
+            'ava_Sh': ava_s,                # Hourly availability of storage at storage asset
+            'ava_Dh': ava_s.view(),         # Hourly availability of discharge at storage asset
+            'ava_Vh': ava_s.view(),         # Hourly availability of volume at storage asset
+            # Hourly final consumption by ener, region, week and hour: level lFin times profile vFin
+            'fin_h': self.get_para_profile(self.er, ['ener','rgio'], 'vFin', 'lFin'),
+            'wgt_h': wgt_h,                 # Weight of time slice in hours/year, key ((),w,h) reads as (w,h)
         }
 
     def set_para_yearly(self):
@@ -175,13 +365,13 @@ class PyMorelInputData():
 
         # Energy efficiency by energy carrier and asset (ener,tech): effi
         ae = self.ae.copy()
-        ae['key'] = ae[['ener','asst']].apply(tuple,axis=1)
+        ae['key'] = self.get_keys(ae, ['ener','asst'])
 
         # Initial and maximum capacity of asset
         # select this year and add role to dataframe ty
-        ay = self.ay[self.ay.year == 'y2020'].copy()
+        ay = self.ay[self.ay.year.astype(str) == self.year].copy()
         ay = pandas.merge(ay, self.a[['asst','role','cstC']], on='asst')
-        ay['key'] = ay[['asst']].apply(tuple,axis=1)
+        ay['key'] = self.get_keys(ay, ['asst'])
         ay_p = ay[ay.role == 'prim']
         ay_t = ay[ay.role == 'tfrm']
         ay_x = ay[ay.role == 'trms']
@@ -199,3 +389,29 @@ class PyMorelInputData():
             'max_C': dict(zip(ay.key,ay.maxC)),         # Maximum capacity of by asset and year
             'cst_C': dict(zip(ay.key,ay.cstC)),         # Cost of capacity of all by asset and year
         }
+
+    def get_keys(self, df: object, columns: list) -> list:
+        """Return list of tuple-keys from columns of dataframe df, e.g. [('elec','dk0','ccgt'),]."""
+        # zip over whole column lists instead of df[columns].apply(tuple,axis=1), which
+        # makes one Python call per row and dominates preprocessing for hourly data
+        return list(zip(*[df[column].to_list() for column in columns]))
+
+    def get_wh_cols(self) -> object:
+        """Return column of each wh_data row in the hourly parameter arrays."""
+        return numpy.array([self.wh_codes[wh] for wh in self.get_keys(self.wh, ['week','hour'])], dtype=int)
+
+    def get_para_profile(self, df: object, columns: list, vprf: str, lvl: str) -> object:
+        """Return hourly PyMorelParaArray with rows lvl*profile for the keys in columns of df.
+
+        Each row in df selects its hourly profile by name in column vprf among the columns of
+        wh_data, and scales it by the level in column lvl. Rows naming no profile are left zero."""
+        para = PyMorelParaArray(self.get_keys(df, columns), self.wh_keys, self.wh_codes)
+        wh_cols = self.get_wh_cols()
+        for prf, rows in df.groupby(vprf, sort=False, observed=True):
+            if prf not in self.wh.columns or prf in ['week','hour','wght']:
+                continue
+            profile = numpy.zeros(len(self.wh_keys))
+            profile[wh_cols] = self.wh[prf].to_numpy(dtype=float)
+            codes = [para.codes[key] for key in self.get_keys(rows, columns)]
+            para.array[codes] = rows[lvl].to_numpy(dtype=float)[:,None] * profile[None,:]
+        return para
@@ -77,19 +77,19 @@ class InputDataDict():
             'dayonly':  [0.000, 1.000, 1.000, 0.000, 0.000, 1.000, 1.000, 0.000, 0.000, 1.000, 1.000, 0.000,
                          0.000, 1.000, 1.000, 0.000, 0.000, 1.000, 1.000, 0.000, 0.000, 1.000, 1.000, 0.000,
                          0.000, 1.000, 1.000, 0.000,],
-            'wnd_dk':   [0.400, 0.700, 0.800, 0.300, 0.300, 0.500, 0.400, 0.200, 0.100, 0.300, 0.300, 0.200,
+            'wind_dk':  [0.400, 0.700, 0.800, 0.300, 0.300, 0.500, 0.400, 0.200, 0.100, 0.300, 0.300, 0.200,
                          0.200, 0.400, 0.700, 0.800, 0.800, 0.900, 0.900, 0.800, 0.800, 0.700, 0.500, 0.400,
                          0.100, 0.300, 0.400, 0.100,],
-            'wnd_no':   [0.400, 0.700, 0.800, 0.300, 0.300, 0.500, 0.400, 0.200, 0.100, 0.300, 0.300, 0.200,
+            'wind_no':  [0.400, 0.700, 0.800, 0.300, 0.300, 0.500, 0.400, 0.200, 0.100, 0.300, 0.300, 0.200,
                          0.200, 0.400, 0.700, 0.800, 0.800, 0.900, 0.900, 0.800, 0.800, 0.700, 0.500, 0.400,
                          0.100, 0.300, 0.400, 0.100,],
-            'wnd_de':   [0.300, 0.600, 0.700, 0.300, 0.200, 0.400, 0.300, 0.100, 0.000, 0.200, 0.200, 0.100,
+            'wind_de':  [0.300, 0.600, 0.700, 0.300, 0.200, 0.400, 0.300, 0.100, 0.000, 0.200, 0.200, 0.100,
                          0.100, 0.300, 0.600, 0.700, 0.700, 0.800, 0.800, 0.700, 0.700, 0.600, 0.400, 0.300,
                          0.000, 0.200, 0.300, 0.000,],
             'varElec':  [0.400, 0.700, 0.900, 0.800, 0.300, 0.800, 1.000, 0.900, 0.400, 0.700, 0.900, 0.800,
                          0.200, 0.700, 0.800, 0.800, 0.400, 0.800, 0.900, 0.800, 0.500, 0.600, 0.800, 0.800,
                          0.500, 0.800, 0.800, 0.600,],
-            'varDhea':  [0.900, 0.700, 0.500, 0.800, 1.000, 0.800, 0.600, 0.900, 0.800, 0.600, 0.400, 0.800,
+            'varDHea':  [0.900, 0.700, 0.500, 0.800, 1.000, 0.800, 0.600, 0.900, 0.800, 0.600, 0.400, 0.800,
                          0.900, 0.700, 0.500, 0.800, 1.000, 0.800, 0.600, 0.900, 0.800, 0.600, 0.400, 0.800,
                          0.500, 0.400, 0.400, 0.600,],
 
@@ -0,0 +1,102 @@
+import os
+
+import pandas
+
+# Input tables of PyMorel with the dtype of their key and choice columns.
+# String columns are categorical, numeric columns float64. All wh_data columns
+# except week and hour are hourly profiles and read as float64.
+TABLES = {
+    'r_data':  {'rgio': 'category'},
+    'e_data':  {'ener': 'category', 'tfrq': 'category'},
+    'er_data': {'ener': 'category', 'rgio': 'category', 'lFin': 'float64', 'vFin': 'category'},
+    'a_data':  {'asst': 'category', 'role': 'category', 'rgio': 'category', 'dest': 'category',
+                'cstC': 'float64', 'cstF': 'float64', 'cstV': 'float64',
+                'ratSV': 'float64', 'ratDV': 'float64', 'vAva': 'category'},
+    'ae_data': {'asst': 'category', 'ener': 'category', 'effi': 'float64'},
+    'ay_data': {'asst': 'category', 'year': 'category', 'iniC': 'float64', 'maxC': 'float64'},
+    'w_data':  {'week': 'category'},
+    'h_data':  {'hour': 'category'},
+    'wh_data': {'week': 'category', 'hour': 'category'},
+}
+
+# File formats of input directories, by file extension
+FORMATS = ['feather', 'parquet']
+
+
+def get_typed(table: str, data: object) -> object:
+    """Return dataframe of input table from dataframe or dict of lists, with PyMorel dtypes."""
+    df = pandas.DataFrame(data)
+    dtypes = TABLES[table]
+    for column in df.columns:
+        dtype = dtypes.get(column, 'float64' if table == 'wh_data' else None)
+        if dtype == 'category':
+            # Empty cells (e.g. dest of non-transmission assets in Excel) are empty strings
+            df[column] = df[column].astype(object).fillna('').astype(str).astype('category')
+        elif dtype is not None:
+            df[column] = df[column].astype(dtype)
+    return df
+
+
+def read_xls(file_name: str) -> dict:
+    """Return dict of typed dataframes from Excel workbook with one sheet per input table."""
+    sheets = pandas.read_excel(file_name, sheet_name=list(TABLES))
+    return {table: get_typed(table, sheets[table]) for table in TABLES}
+
+
+def read_dir(path: str) -> dict:
+    """Return dict of typed dataframes from directory with one Feather or Parquet file per input table.
+
+    Files are memory-mapped and converted column by column, with each Arrow column released once it is
+    converted, so that a table is not held in memory twice. The conversion to PyMorel dtypes still copies."""
+    tables = {}
+    for table in TABLES:
+        for fmt in FORMATS:
+            file_name = os.path.join(path, table + '.' + fmt)
+            if os.path.exists(file_name):
+                tables[table] = get_typed(table, read_file(file_name, fmt))
+                break
+        else:
+            raise FileNotFoundError("No Feather or Parquet file for input table " + table + " in " + path)
+    return tables
+
+
+def read_file(file_name: str, fmt: str) -> object:
+    """Return dataframe from memory-mapped Feather or Parquet file, one block per column."""
+    if fmt == 'feather':
+        import pyarrow.feather
+        table = pyarrow.feather.read_table(file_name, memory_map=True)
+    else:
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(file_name, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def write_dir(tables: dict, path: str, fmt: str = 'feather'):
+    """Write input tables (dataframes or dicts of lists) to directory, one file per table."""
+    if fmt not in FORMATS:
+        raise ValueError("Unknown input directory format " + fmt + ", use one of " + str(FORMATS))
+    os.makedirs(path, exist_ok=True)
+    for table in TABLES:
+        df = get_typed(table, tables[table])
+        file_name = os.path.join(path, table + '.' + fmt)
+        if fmt == 'feather':
+            df.to_feather(file_name)
+        else:
+            df.to_parquet(file_name, index=False)
+
+
+def write_xls(tables: dict, file_name: str):
+    """Write input tables (dataframes or dicts of lists) to Excel workbook, one sheet per table."""
+    with pandas.ExcelWriter(file_name) as writer:
+        for table in TABLES:
+            get_typed(table, tables[table]).to_excel(writer, sheet_name=table, index=False)
+
+
+def convert(source: str, target: str, fmt: str = 'feather'):
+    """Convert input data between Excel workbook (.xls/.xlsx) and Feather/Parquet directory."""
+    is_xls = lambda name: name.lower().endswith(('.xls', '.xlsx'))
+    tables = read_xls(source) if is_xls(source) else read_dir(source)
+    if is_xls(target):
+        write_xls(tables, target)
+    else:
+        write_dir(tables, target, fmt)
@@ -0,0 +1,247 @@
+import numpy
+import scipy.sparse
+
+from profiling import PyMorelProfiler
+from solver import get_solver
+
+
+class PyMorelMatrixModel():
+    """Sparse matrix formulation of PyMorelModel, solved directly by an LP solver without Pyomo."""
+
+    def __init__(self, data_object: object, cache: object = None, profiler: object = None):
+        self.data = data_object
+        self.profiler = profiler or PyMorelProfiler()   # Time, memory and object counts by stage
+        if cache is None:
+            self.declare_assign()
+        else:
+            self.declare_assign_cached(cache)
+
+    def declare_assign_cached(self, cache: object):
+        """Reuse cost vector, bounds and matrices from PyMorelCache if input data is unchanged."""
+        key = cache.get_key('matrix', cache.get_table_hashes(self.data.inputdata), [self.data.year])
+        state = cache.get(key)
+        if state is None:
+            self.declare_assign()
+            state = {name: value for name, value in self.__dict__.items() if name not in ['data', 'profiler']}
+            cache.put(key, state)
+        self.__dict__.update(state)
+
+    ###################################################################################################################
+    #
+    #   DECLARATION AND ASSIGNMENT OF COLUMNS, COST VECTOR, BOUNDS AND ROWS
+    #
+    ###################################################################################################################
+
+    def declare_assign(self):
+        """Read self.data to assemble cost vector, bounds and constraint matrices."""
+        profiler = self.profiler
+        with profiler.stage('matrix', self.get_counts):
+            with profiler.stage('columns', self.get_counts):
+                self.set_columns()
+            with profiler.stage('cost'):
+                self.set_cost()
+            with profiler.stage('bounds'):
+                self.set_bounds()
+            with profiler.stage('Q_equilibrium_h', self.get_counts):
+                self.set_equilibrium_h()
+            with profiler.stage('capacity_limits_h', self.get_counts):
+                self.set_capacity_limits_h()
+
+    def get_counts(self) -> dict:
+        """Return number of columns, rows and nonzero coefficients assembled so far."""
+        matrices = [getattr(self, name) for name in ['A_eq', 'A_ub'] if hasattr(self, name)]
+        return {'columns': getattr(self, 'ncol', 0),
+                'rows': sum(matrix.shape[0] for matrix in matrices),
+                'nonzeros': sum(matrix.nnz for matrix in matrices)}
+
+    def set_columns(self):
+        """Map every variable to a block of columns, in the index order of the Pyomo variables."""
+        sets = self.data.sets
+        subsets = self.data.subsets
+        # Ordered unique assets of each variable, as Pyomo Set() drops duplicates
+        unique = lambda elements: list(dict.fromkeys(elements))
+        self.W = sets['W']
+        self.H = sets['H']
+        self.nwh = len(self.W) * len(self.H)
+        self.var_sets = {
+            'C':  unique(subsets['AC']),    # Capacity addition, one column per asset
+            'Ph': unique(subsets['APH']),   # Hourly variables, one column per asset, week and hour
+            'Th': unique(subsets['ATH']),
+            'Xh': unique(subsets['AXH']),
+            'Ih': unique(subsets['AXH']),
+            'Sh': unique(subsets['ASH']),
+            'Dh': unique(subsets['ASH']),
+            'Vh': unique(subsets['ASH']),
+        }
+        # Position of each asset within its variable block, and first column of each block
+        self.var_pos = {var: {a: i for i, a in enumerate(assets)} for var, assets in self.var_sets.items()}
+        self.var_col = {}
+        n = 0
+        for var, assets in self.var_sets.items():
+            self.var_col[var] = n
+            n += len(assets) * (1 if var == 'C' else self.nwh)
+        self.ncol = n
+
+    def get_cols(self, var: str, a: str) -> object:
+        """Return array of the columns of hourly variable var for asset a, in (week, hour) order."""
+        first = self.var_col[var] + self.var_pos[var][a] * self.nwh
+        return numpy.arange(first, first + self.nwh)
+
+    def set_hourly(self, vector: object, var: str, para: object):
+        """Write hourly PyMorelParaArray into vector at the columns of var, one asset row at a time."""
+        for a in self.var_sets[var]:
+            vector[self.get_cols(var, a)] = para.get_row((a,))
+
+    def set_cost(self):
+        """Cost vector: capital cost of capacity additions and hourly unit costs, as rule_objective."""
+        para_h = self.data.para_h
+        para_y = self.data.para_y
+        self.c = numpy.zeros(self.ncol)
+        for a, i in self.var_pos['C'].items():
+            self.c[self.var_col['C'] + i] = para_y['cst_C'].get((a,), 0)
+        self.set_hourly(self.c, 'Ph', para_h['cst_Ph'])
+        self.set_hourly(self.c, 'Th', para_h['cst_Th'])
+        self.set_hourly(self.c, 'Sh', para_h['cst_Sh'])
+        # Hourly costs are weighted by the hours per year each (week,hour) time slice represents
+        wgt = para_h['wgt_h'].get_row(())
+        for var in ['Ph','Th','Sh']:
+            first = self.var_col[var]
+            last = first + len(self.var_sets[var]) * self.nwh
+            self.c[first:last] *= numpy.tile(wgt, len(self.var_sets[var]))
+
+    def set_bounds(self):
+        """All variables are non-negative, capacity additions are limited by max_C."""
+        para_y = self.data.para_y
+        self.lb = numpy.zeros(self.ncol)
+        self.ub = numpy.full(self.ncol, numpy.inf)
+        for a, i in self.var_pos['C'].items():
+            self.ub[self.var_col['C'] + i] = para_y['max_C'].get((a,), 0)
+
+    def set_equilibrium_h(self):
+        """Equality rows of hourly market equilibrium for (ener, rgio, week, hour), as rule_equilibrium_h."""
+        sets = self.data.sets
+        EH = self.data.subsets['EH']
+        R = sets['R']
+        effi = self.data.para_y['effi']
+        index_er = self.data.index_er
+        er_row = {(e,r): (i*len(R) + j) * self.nwh for i, e in enumerate(EH) for j, r in enumerate(R)}
+        wh = numpy.arange(self.nwh)
+
+        # Each (e,r) x asset link adds one coefficient per (week, hour) to the rows of (e,r)
+        # Supply (pri + tra + dis + imp) is positive, demand (sto + exp) is negative
+        rows, cols, vals = [], [], []
+        def link(e, r, var, a, coef):
+            if (e,r) in er_row and coef != 0:
+                rows.append(er_row[(e,r)] + wh)
+                cols.append(self.get_cols(var, a))
+                vals.append(numpy.full(self.nwh, coef))
+        for (e,r), assets in index_er['APH'].items():
+            for a in assets:
+                link(e, r, 'Ph', a, effi.get((e,a), 0))
+        for (e,r), assets in index_er['ATH'].items():
+            for a in assets:
+                link(e, r, 'Th', a, effi.get((e,a), 0))
+        for (e,r), assets in index_er['AXH'].items():   # Owner region imports Ih, exports Xh
+            for a in assets:
+                link(e, r, 'Ih', a, effi.get((e,a), 0))
+                link(e, r, 'Xh', a, -1)
+        for (e,r), assets in index_er['AIH'].items():   # Destination region imports Xh, exports Ih
+            for a in assets:
+                link(e, r, 'Xh', a, effi.get((e,a), 0))
+                link(e, r, 'Ih', a, -1)
+        for (e,r), assets in index_er['ASH'].items():   # Discharge is supply, storage is demand
+            for a in assets:
+                link(e, r, 'Dh', a, 1)
+                link(e, r, 'Sh', a, -1)
+
+        nrow = len(er_row) * self.nwh
+        self.A_eq = self.get_matrix(rows, cols, vals, nrow)
+        # Right hand side is final consumption
+        self.b_eq = numpy.zeros(nrow)
+        fin_h = self.data.para_h['fin_h']
+        for (e,r), row in er_row.items():
+            self.b_eq[row:row + self.nwh] = fin_h.get_row((e,r))
+        self.eq_index = [(e,r,w,h) for (e,r) in er_row for w in self.W for h in self.H]
+
+    def set_capacity_limits_h(self):
+        """Hourly capacity limits: var <= (ini + C) * ava, as bounds or rows where C is endogenous."""
+        para_h = self.data.para_h
+        para_y = self.data.para_y
+        limits = [('Th','ava_Th','ini_T'), ('Xh','ava_Xh','ini_X'), ('Ih','ava_Ih','ini_I'),
+                  ('Sh','ava_Sh','ini_S'), ('Dh','ava_Dh','ini_D'), ('Vh','ava_Vh','ini_V')]
+        pos_C = self.var_pos['C']
+        rows, cols, vals, b_ub = [], [], [], []
+        nrow = 0
+        for var, ava_name, ini_name in limits:
+            if not self.var_sets[var]:
+                continue
+            for a in self.var_sets[var]:
+                cols_a = self.get_cols(var, a)
+                ava_a = para_h[ava_name].get_row((a,))
+                ini_a = para_y[ini_name].get((a,), 0)
+                if a in pos_C:
+                    # Endogenous capacity: var - ava*C <= ini*ava
+                    wh_rows = nrow + numpy.arange(self.nwh)
+                    rows += [wh_rows, wh_rows]
+                    cols += [cols_a, numpy.full(self.nwh, self.var_col['C'] + pos_C[a])]
+                    vals += [numpy.ones(self.nwh), -ava_a]
+                    b_ub.append(ini_a * ava_a)
+                    nrow += self.nwh
+                else:
+                    # Exogenous capacity is a plain upper bound on the variable
+                    self.ub[cols_a] = numpy.minimum(self.ub[cols_a], ini_a * ava_a)
+        self.A_ub = self.get_matrix(rows, cols, vals, nrow)
+        self.b_ub = numpy.concatenate(b_ub) if b_ub else numpy.zeros(0)
+
+    def get_matrix(self, rows: list, cols: list, vals: list, nrow: int) -> object:
+        """Return CSR matrix with nrow rows from lists of row, column and value arrays."""
+        if rows:
+            rows, cols, vals = numpy.concatenate(rows), numpy.concatenate(cols), numpy.concatenate(vals)
+        return scipy.sparse.coo_matrix((vals, (rows, cols)), shape=(nrow, self.ncol)).tocsr()
+
+    ###################################################################################################################
+    #
+    #   HELPER FUNCTIONS
+    #
+    ###################################################################################################################
+
+    def solve(self, solver: object = None):
+        """Solve model with PyMorelSolver or solver name, default HiGHS through scipy ('scipy'), and map
+        the solution back to variables. 'highs' passes the matrices to HiGHS in memory through highspy."""
+        self.solver = get_solver(solver, 'scipy')
+        with self.profiler.stage('solve') as record:
+            self.results, self.solver_result = self.solver.solve_matrix(self.c, self.A_ub, self.b_ub, self.A_eq,
+                                                                        self.b_eq, self.lb, self.ub)
+            record['solver_seconds'] = self.solver_result.solver_seconds
+        if self.solver_result.x is None:
+            raise RuntimeError("Matrix model could not be solved: " + self.solver_result.message)
+        self.set_solution(self.solver_result.x)
+
+    def set_solution(self, x: object):
+        """Split solution vector x into variable levels."""
+        self.levels = {}
+        for var, assets in self.var_sets.items():
+            n = len(assets) * (1 if var == 'C' else self.nwh)
+            self.levels[var] = x[self.var_col[var]:self.var_col[var] + n]
+
+    def get_levels(self, name: str) -> object:
+        """Return levels of variable as NumPy array in the index order of the PyMorelModel variable."""
+        return self.levels[name]
+
+    def get_duals(self, name: str = 'Q_equilibrium_h') -> object:
+        """Return duals of the equilibrium rows as NumPy array in (ener, rgio, week, hour) order, as PyMorelModel."""
+        if name != 'Q_equilibrium_h':
+            raise ValueError("Matrix model has duals of Q_equilibrium_h only.")
+        return self.solver_result.dual_eq[:len(self.eq_index)]
+
+    def get_reduced_costs(self, name: str = 'C') -> object:
+        """Return reduced costs of variable as NumPy array in the index order of the PyMorelModel variable."""
+        n = len(self.var_sets[name]) * (1 if name == 'C' else self.nwh)
+        return self.solver_result.reduced_cost[self.var_col[name]:self.var_col[name] + n]
+
+    def report(self):
+        print(self.solver_result)
+
+    def print_debug(self):
+        """Print debug information."""
+        print(self.solver_result)
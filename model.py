@@ -1,12 +1,43 @@
-from pyomo.environ import Objective, Constraint, Var, Set, Param
+from pyomo.environ import Objective, Constraint, Var, Set, Param, Suffix
 from pyomo.environ import NonNegativeReals
-from pyomo.environ import SolverFactory, ConcreteModel
+from pyomo.core.base.var import VarData
+from pyomo.core.base.enums import SortComponents
+from pyomo.environ import ConcreteModel
+import itertools
+import numpy
+import time
+
+from inputdata import PyMorelInputData
+from profiling import PyMorelProfiler
+from solver import PyMorelSolver, get_solver
 
 
 class PyMorelModel():
 
-    def __init__(self, data_object: object):
+    # Parameters declared mutable with mutable=True, so that scenarios and rolling horizon windows
+    # can update them in place
+    mutable_para_h = ['cst_Ph','cst_Th','cst_Sh','cst_Xh','fin_h','wgt_h',
+                      'ava_Th','ava_Xh','ava_Ih','ava_Sh','ava_Dh','ava_Vh']
+    mutable_para_y = ['max_C']
+    # Parameters of the objective, which is rebuilt when one of them changes while immutable
+    objective_para = ['cst_Ph','cst_Th','cst_Sh','wgt_h','cst_C']
+    # Sets of the variables in the objective, which is rebuilt when one of them changes
+    objective_sets = ['AC','APH','ATH','ASH']
+    # Hourly capacity limits by variable: availability, initial capacity, assets with capacity investment, rule
+    capacity_limits_h = {
+        'Th': ('ava_Th', 'ini_T', 'ATHC', 'rule_transformation_capacity_limit_hourly'),
+        'Xh': ('ava_Xh', 'ini_X', 'AXHC', 'rule_export_capacity_limit_hourly'),
+        'Ih': ('ava_Ih', 'ini_I', 'AXHC', 'rule_import_capacity_limit_hourly'),
+        'Sh': ('ava_Sh', 'ini_S', 'ASHC', 'rule_storage_capacity_limit_hourly'),
+        'Dh': ('ava_Dh', 'ini_D', 'ASHC', 'rule_discharge_capacity_limit_hourly'),
+        'Vh': ('ava_Vh', 'ini_V', 'ASHC', 'rule_storage_volume_maxlimit_hourly'),
+    }
+
+    def __init__(self, data_object: object, mutable: bool = False, profiler: object = None):
         self.data = data_object
+        self.mutable = mutable          # Declare scenario parameters mutable for update_parameters()
+        self.timings = []               # Per-scenario timings recorded by resolve()
+        self.profiler = profiler or PyMorelProfiler()   # Time, memory and object counts by stage
         self.model = ConcreteModel()
         self.declare_assign()
 
@@ -18,6 +49,23 @@ class PyMorelModel():
 
     def declare_assign(self) -> object:
         """"Read self.data to declare and assign to sets and parameters."""
+        profiler = self.profiler
+        with profiler.stage('model', self.get_counts):
+            with profiler.stage('sets', self.get_counts):
+                self.declare_sets()
+            with profiler.stage('variables', self.get_counts):
+                self.declare_variables()
+            with profiler.stage('para_h', self.get_counts):
+                self.declare_parameters_hourly()
+            with profiler.stage('para_y', self.get_counts):
+                self.declare_parameters_yearly()
+            with profiler.stage('objective', self.get_counts):
+                self.declare_objective()
+            with profiler.stage('constraints', self.get_counts):
+                self.declare_constraints()
+
+    def declare_sets(self):
+        """Declare and assign Pyomo sets and subsets from self.data."""
         m = self.model          # Pointer for model object
 
         ###############################################################################################################
@@ -25,23 +73,9 @@ class PyMorelModel():
         ###############################################################################################################
 
         def get_set(element_list: list) -> object:
-            """Create and return Pyomo Set(), provide debugging information if necessary."""
-            try:
-                s = Set(initialize=element_list)
-            except:
-                print("Could not initialize Pyomo Set" + str(element_list))
-                s = Set()
-            return s
-
-        def get_subset(element_list: list, superset: object) -> object:
-            """Return Pyomo (sub)Set() with validation towards superset, provide debugging information if necessary."""
-            try:
-                s = Set(initialize=element_list, within=superset)
-            except:
-                print("Could not initialize Pyomo Set" + str(element_list) + " with superset "
-                      + superset.__name__ + " containing " + str(superset))
-                s = Set()
-            return s
+            """Create and return Pyomo Set() of the unique elements, in order. Subsets are declared without
+            superset, as membership is checked up front by PyMorelValidation of the input tables."""
+            return Set(initialize=list(dict.fromkeys(element_list)))
 
         # Declare and assign Pyomo sets (where A=self.B=f(X) makes A local scope alias for global scope self.B)
         # Single letter lower case indicate set element,
@@ -56,48 +90,57 @@ class PyMorelModel():
         # Subsets: Multi-letter upper case indicate subset of first letter superset
         subsets = self.data.subsets     # Alias with local scope
         # The ener subsets are distinguished by second letter refering to trading frequency
-        EH = m.EH = get_subset(subsets['EH'], E)        # Energy carriers traded (H)ourly
-        EW = m.EW = get_subset(subsets['EW'], E)        # Energy carriers traded (W)eekly
-        EY = m.EY = get_subset(subsets['EY'], E)        # Energy carriers traded (Y)early
+        EH = m.EH = get_set(subsets['EH'])        # Energy carriers traded (H)ourly
+        EW = m.EW = get_set(subsets['EW'])        # Energy carriers traded (W)eekly
+        EY = m.EY = get_set(subsets['EY'])        # Energy carriers traded (Y)early
 
         # Tech subsets are distinguished by second letter referring to asset role (T,S,X) or capacity (C)
         # Note: AP, AT, AX and AS are true, mutually exclusive subsets of assets with differnt roles
-        AP = m.AP = get_subset(subsets['AP'], A)        # Assets for (P)rimary production
-        AT = m.AT = get_subset(subsets['AT'], A)        # Assets for (T)ransformation
-        AX = m.AX = get_subset(subsets['AX'], A)        # Assets for e(X)change
-        AS = m.AS = get_subset(subsets['AS'], A)        # Assets for (S)torage
-        AC = m.AC = get_subset(subsets['AC'], A)        # Assets with (C)apacity investment
-
-        APH = m.APH = get_subset(subsets['APH'],AP)     # Assets for (P)rimary production (H)ourly
-        APW = m.APW = get_subset(subsets['APW'],AP)     # Assets for (P)rimary production (W)weekly
-        APY = m.APY = get_subset(subsets['APY'],AP)     # Assets for (P)rimary production (Y)early
-        ATH = m.ATH = get_subset(subsets['ATH'],AT)     # Assets for (T)ransformation (H)ourly
-        ATW = m.ATW = get_subset(subsets['ATW'],AT)     # Assets for (T)ransformation (W)eekly
-        ATY = m.ATY = get_subset(subsets['ATY'],AT)     # Assets for (T)ransformation (Y)early
-        AXH = m.AXH = get_subset(subsets['AXH'],AX)     # Assets for (X)transmission (H)ourly
-        AXW = m.AXW = get_subset(subsets['AXW'],AX)     # Assets for (X)transmission (W)eekly
-        AXY = m.AXY = get_subset(subsets['AXY'],AX)     # Assets for (X)transmission (Y)early
-        ASH = m.ASH = get_subset(subsets['ASH'],AS)     # Assets for (S)torage (H)ourly
-        ASW = m.ASW = get_subset(subsets['ASW'],AS)     # Assets for (S)torage (W)eekly
-        ASY = m.ASY = get_subset(subsets['ASY'],AS)     # Assets for (S)torage (Y)early
+        AP = m.AP = get_set(subsets['AP'])        # Assets for (P)rimary production
+        AT = m.AT = get_set(subsets['AT'])        # Assets for (T)ransformation
+        AX = m.AX = get_set(subsets['AX'])        # Assets for e(X)change
+        AS = m.AS = get_set(subsets['AS'])        # Assets for (S)torage
+        AC = m.AC = get_set(subsets['AC'])        # Assets with (C)apacity investment
+
+        APH = m.APH = get_set(subsets['APH'])     # Assets for (P)rimary production (H)ourly
+        APW = m.APW = get_set(subsets['APW'])     # Assets for (P)rimary production (W)weekly
+        APY = m.APY = get_set(subsets['APY'])     # Assets for (P)rimary production (Y)early
+        ATH = m.ATH = get_set(subsets['ATH'])     # Assets for (T)ransformation (H)ourly
+        ATW = m.ATW = get_set(subsets['ATW'])     # Assets for (T)ransformation (W)eekly
+        ATY = m.ATY = get_set(subsets['ATY'])     # Assets for (T)ransformation (Y)early
+        AXH = m.AXH = get_set(subsets['AXH'])     # Assets for (X)transmission (H)ourly
+        AXW = m.AXW = get_set(subsets['AXW'])     # Assets for (X)transmission (W)eekly
+        AXY = m.AXY = get_set(subsets['AXY'])     # Assets for (X)transmission (Y)early
+        ASH = m.ASH = get_set(subsets['ASH'])     # Assets for (S)torage (H)ourly
+        ASW = m.ASW = get_set(subsets['ASW'])     # Assets for (S)torage (W)eekly
+        ASY = m.ASY = get_set(subsets['ASY'])     # Assets for (S)torage (Y)early
+        m.ATHC = get_set(subsets['ATHC'])        # Hourly transformation assets with (C)apacity investment
+        m.AXHC = get_set(subsets['AXHC'])        # Hourly transmission assets with (C)apacity investment
+        m.ASHC = get_set(subsets['ASHC'])        # Hourly storage assets with (C)apacity investment
 
         # asst/tfrq subsets conditional on ener/region - store cond. subsets in a dict
         ERA = subsets['ERA']
-        m.APH_er = get_subset(subsets['APH_er'],ERA)  # Primary production hourly assets
-        m.APW_er = get_subset(subsets['APW_er'],ERA)  # Primary production weekly assets
-        m.APY_er = get_subset(subsets['APY_er'],ERA)  # Primary production yearly assets
-        m.ATH_er = get_subset(subsets['ATH_er'],ERA)  # Transformation hourly assets
-        m.ATW_er = get_subset(subsets['ATW_er'],ERA)  # Transformation weekly assets
-        m.ATY_er = get_subset(subsets['ATY_er'],ERA)  # Transformation yearly assets
-        m.AXH_er = get_subset(subsets['AXH_er'],ERA)  # Export hourly assets
-        m.AXW_er = get_subset(subsets['AXW_er'],ERA)  # Export weekly assets
-        m.AXY_er = get_subset(subsets['AXY_er'],ERA)  # Transmission yearly assets
-        m.AIH_er = get_subset(subsets['AIH_er'],ERA)  # Import hourly assets
-        m.AIW_er = get_subset(subsets['AIW_er'],ERA)  # Import weekly assets
-        m.AIY_er = get_subset(subsets['AIY_er'],ERA)  # Transmission yearly assets
-        m.ASH_er = get_subset(subsets['ASH_er'],ERA)  # Storage hourly assets
-        m.ASW_er = get_subset(subsets['ASW_er'],ERA)  # Storage weekly assets
-        m.ASY_er = get_subset(subsets['ASY_er'],ERA)  # Storage yearly assets
+        m.APH_er = get_set(subsets['APH_er'])  # Primary production hourly assets
+        m.APW_er = get_set(subsets['APW_er'])  # Primary production weekly assets
+        m.APY_er = get_set(subsets['APY_er'])  # Primary production yearly assets
+        m.ATH_er = get_set(subsets['ATH_er'])  # Transformation hourly assets
+        m.ATW_er = get_set(subsets['ATW_er'])  # Transformation weekly assets
+        m.ATY_er = get_set(subsets['ATY_er'])  # Transformation yearly assets
+        m.AXH_er = get_set(subsets['AXH_er'])  # Export hourly assets
+        m.AXW_er = get_set(subsets['AXW_er'])  # Export weekly assets
+        m.AXY_er = get_set(subsets['AXY_er'])  # Transmission yearly assets
+        m.AIH_er = get_set(subsets['AIH_er'])  # Import hourly assets
+        m.AIW_er = get_set(subsets['AIW_er'])  # Import weekly assets
+        m.AIY_er = get_set(subsets['AIY_er'])  # Transmission yearly assets
+        m.ASH_er = get_set(subsets['ASH_er'])  # Storage hourly assets
+        m.ASW_er = get_set(subsets['ASW_er'])  # Storage weekly assets
+        m.ASY_er = get_set(subsets['ASY_er'])  # Storage yearly assets
+
+    def declare_variables(self):
+        """Declare Pyomo variables over the asset subsets."""
+        m = self.model
+        W, H = m.W, m.H
+        AC, APH, ATH, AXH, ASH = m.AC, m.APH, m.ATH, m.AXH, m.ASH
 
         ###############################################################################################################
         # Variable declaration and assignment
@@ -123,26 +166,41 @@ class PyMorelModel():
         #m.X1w = Var(txw,w, within=NonNegativeReals)    # Transmission effect from 1st to 2nd region
         #m.X2w = Var(txw,w, within=NonNegativeReals)    # Transmission effect from 2nd to 1st region
 
+    def declare_parameters_hourly(self):
+        """Declare and assign hourly Pyomo parameters from self.data."""
+        m = self.model
+        E, R, W, H = m.E, m.R, m.W, m.H
+        APH, ATH, AXH, ASH = m.APH, m.ATH, m.AXH, m.ASH
+
         ###############################################################################################################
         # Parameter declaration and assignment
         ###############################################################################################################
 
         para_h = self.data.para_h   # Pointer for hourly parameter data structure (dict of dicts)
-        para_y = self.data.para_y   # Pointer for yearly parameter data structure (dict of dicts)
 
         # Parameters potentially varying hourly to be multiplied to or constraining hourly variables
-        m.cst_Ph = Param(APH,W,H, initialize=para_h['cst_Ph'], default=0)   # Unit variable cost of primary production
-        m.cst_Th = Param(ATH,W,H, initialize=para_h['cst_Th'], default=0)   # Unit variable cost of transformation
-        m.cst_Sh = Param(ASH,W,H, initialize=para_h['cst_Sh'], default=0)   # Unit variable cost of storage
-        m.cst_Xh = Param(AXH,W,H, initialize=para_h['cst_Xh'], default=0)   # Unit variable cost of transmission
-        m.ava_Th = Param(ATH,W,H, initialize=para_h['ava_Th'], default=0)   # Hourly availability of transformation
-        m.ava_Xh = Param(AXH,W,H, initialize=para_h['ava_Xh'], default=0)   # Hourly availability of export
-        m.ava_Ih = Param(AXH,W,H, initialize=para_h['ava_Ih'], default=0)   # Hourly availability of import
-        m.ava_Sh = Param(ASH,W,H, initialize=para_h['ava_Sh'], default=0)   # Hourly availability of storage
-        m.ava_Dh = Param(ASH,W,H, initialize=para_h['ava_Dh'], default=0)   # Hourly availability of discharge
-        m.ava_Vh = Param(ASH,W,H, initialize=para_h['ava_Vh'], default=0)   # Hourly availability of storage volume
-
-        m.fin_h = Param(E,R,W,H, initialize=para_h['fin_h'], default=0)     # Hourly demand for energy carrier by region
+        mutable = self.mutable      # Scenario parameters are mutable for persistent re-solves
+        m.cst_Ph = Param(APH,W,H, initialize=para_h['cst_Ph'], default=0, mutable=mutable)   # Unit variable cost of primary production
+        m.cst_Th = Param(ATH,W,H, initialize=para_h['cst_Th'], default=0, mutable=mutable)   # Unit variable cost of transformation
+        m.cst_Sh = Param(ASH,W,H, initialize=para_h['cst_Sh'], default=0, mutable=mutable)   # Unit variable cost of storage
+        m.cst_Xh = Param(AXH,W,H, initialize=para_h['cst_Xh'], default=0, mutable=mutable)   # Unit variable cost of transmission
+        m.ava_Th = Param(ATH,W,H, initialize=para_h['ava_Th'], default=0, mutable=mutable)   # Hourly availability of transformation
+        m.ava_Xh = Param(AXH,W,H, initialize=para_h['ava_Xh'], default=0, mutable=mutable)   # Hourly availability of export
+        m.ava_Ih = Param(AXH,W,H, initialize=para_h['ava_Ih'], default=0, mutable=mutable)   # Hourly availability of import
+        m.ava_Sh = Param(ASH,W,H, initialize=para_h['ava_Sh'], default=0, mutable=mutable)   # Hourly availability of storage
+        m.ava_Dh = Param(ASH,W,H, initialize=para_h['ava_Dh'], default=0, mutable=mutable)   # Hourly availability of discharge
+        m.ava_Vh = Param(ASH,W,H, initialize=para_h['ava_Vh'], default=0, mutable=mutable)   # Hourly availability of storage volume
+
+        m.wgt_h = Param(W,H, initialize=para_h['wgt_h'], default=0, mutable=mutable)         # Weight of time slice in hours per year
+        m.fin_h = Param(E,R,W,H, initialize=para_h['fin_h'], default=0, mutable=mutable)     # Hourly demand for energy carrier by region
+
+    def declare_parameters_yearly(self):
+        """Declare and assign yearly Pyomo parameters from self.data."""
+        m = self.model
+        E, A = m.E, m.A
+        AT, AX, AS = m.AT, m.AX, m.AS
+        para_y = self.data.para_y   # Pointer for yearly parameter data structure (dict of dicts)
+        mutable = self.mutable
 
         # Parameters that are fixed across the year, to be multiplied or constraining any variable
         m.effi = Param(E,A, initialize=para_y['effi'], default=0)             # Conversion efficiency ratio output/input
@@ -153,17 +211,63 @@ class PyMorelModel():
         m.ini_S = Param(AS, initialize=para_y['ini_S'], default=0)          # Initial capacity of storage asset
         m.ini_D = Param(AS, initialize=para_y['ini_D'], default=0)          # Initial capacity of discharge asset
         m.ini_V = Param(AS, initialize=para_y['ini_V'], default=0)          # Initial capacity of volume asset
-        m.max_C = Param(A, initialize=para_y['max_C'], default=0)           # Maximum capacity of any asset
+        m.max_C = Param(A, initialize=para_y['max_C'], default=0, mutable=mutable)   # Maximum capacity of any asset
         m.cst_C = Param(A, initialize=para_y['cst_C'], default=0)           # Unit capital cost of asset
 
+    def declare_objective(self):
+        """Declare the objective."""
+        m = self.model
+
         ###############################################################################################################
         # Objective and constraints declaration and assignment
         ###############################################################################################################
 
         # Objective
         m.obj = Objective(rule=self.rule_objective)
+
+    def declare_constraints(self):
+        """Declare the constraints."""
+        m = self.model
+        EH, R, W, H = m.EH, m.R, m.W, m.H
+
         # Constraints: Capital Q indicates constraint, R indicates rule
-        m.Q_equilibrium_h = Constraint(EH,R,W,H, rule=self.rule_equilibrium_h)
+        with self.profiler.stage('Q_equilibrium_h', self.get_counts):
+            m.Q_equilibrium_h = Constraint(EH,R,W,H, rule=self.rule_equilibrium_h)
+        with self.profiler.stage('capacity_limits_h', self.get_counts):
+            self.declare_capacity_limits()
+        # Duals and reduced costs are imported with the solution, for market prices by get_duals()
+        m.dual = Suffix(direction=Suffix.IMPORT)
+        m.rc = Suffix(direction=Suffix.IMPORT)
+
+    def declare_capacity_limits(self):
+        """Declare capacity limits var <= (ini + C) * ava as variable bounds where capacity is exogenous, and as
+        constraints Q_capacity_<var> only for assets with capacity investment. C is bounded by max_C."""
+        m = self.model
+        W, H = m.W, m.H
+        for a in m.AC:
+            m.C[a].setub(m.max_C[a])
+        for name, (ava_name, ini_name, subset, rule) in self.capacity_limits_h.items():
+            endogenous = getattr(m, subset)
+            m.del_component('Q_capacity_' + name)       # Declared again when PyMorelModel.apply_data() changes limits
+            m.add_component('Q_capacity_' + name, Constraint(endogenous, W, H, rule=getattr(self, rule)))
+        self.set_capacity_bounds()
+
+    def set_capacity_bounds(self):
+        """Set bounds var <= ini * ava of the assets with exogenous capacity from self.data, no bound for the
+        assets with capacity investment. The bounds of a variable are computed as one array of its assets
+        by (week,hour) and are numbers, also for mutable models, so they are set again on parameter updates."""
+        m = self.model
+        para_h, para_y = self.data.para_h, self.data.para_y
+        for name, (ava_name, ini_name, subset, rule) in self.capacity_limits_h.items():
+            var, endogenous = getattr(m, name), getattr(m, subset)
+            assets = list(next(var.index_set().subsets()))     # Assets of the variable
+            if not assets:
+                continue
+            ini = numpy.array([para_y[ini_name].get((a,), 0) for a in assets], dtype=float)
+            ub = (ini[:,None] * numpy.vstack([para_h[ava_name].get_row((a,)) for a in assets])).astype(object)
+            ub[[a in endogenous for a in assets]] = None
+            # Values in the order of the index set (a,w,h), the same order as the rows and columns of ub
+            list(map(VarData.setub, var.values(SortComponents.ORDERED_INDICES), ub.ravel().tolist()))
 
     ###################################################################################################################
     #
@@ -174,16 +278,16 @@ class PyMorelModel():
     def rule_objective(self,m):
         """Total cost is discouted capex, fopex and vopex."""
         # Capital costs (CAPEX) is tied to ...
-        cst_capex = sum(m.C[a]*m.cst_C[a] for a in m.A)
+        cst_capex = sum(m.C[a]*m.cst_C[a] for a in m.AC)
         # Fixed operations costs (FOPEX) is tied ...
         cst_fopex = 0
         # Variable operating costs is ...
         cst_vopex = 0
         # Fuel costs are tied to input to generation, only exogenous fuel costs
-        # TODO: Multiply with weights for weeks x hours
-        cst_prim_h = sum(m.Ph[aph,w,h]*m.cst_Ph[aph,w,h] for aph in m.APH for w in m.W for h in m.H)
-        cst_tfrm_h = sum(m.Th[ath,w,h]*m.cst_Th[ath,w,h] for ath in m.ATH for w in m.W for h in m.H)
-        cst_stor_h = sum(m.Sh[ash,w,h]*m.cst_Sh[ash,w,h] for ash in m.ASH for w in m.W for h in m.H)
+        # Hourly costs are weighted by the hours per year each (week,hour) time slice represents
+        cst_prim_h = sum(m.Ph[aph,w,h]*m.cst_Ph[aph,w,h]*m.wgt_h[w,h] for aph in m.APH for w in m.W for h in m.H)
+        cst_tfrm_h = sum(m.Th[ath,w,h]*m.cst_Th[ath,w,h]*m.wgt_h[w,h] for ath in m.ATH for w in m.W for h in m.H)
+        cst_stor_h = sum(m.Sh[ash,w,h]*m.cst_Sh[ash,w,h]*m.wgt_h[w,h] for ash in m.ASH for w in m.W for h in m.H)
         # Total costs is sum of CAPEX, Fixed OPEX, variable OPEX and fuel costs
         cst_total = cst_capex + cst_fopex + cst_vopex + cst_prim_h + cst_tfrm_h + cst_stor_h
         return cst_total
@@ -200,14 +304,22 @@ class PyMorelModel():
     def rule_equilibrium_h(self,m,e,r,w,h) -> dict:
         """Constraint to ensure equilibrium for hourly traded energy carriers."""
 
+        # Assets linked to (e,r) by role and direction, precomputed in PyMorelInputData.set_index_er()
+        index_er = self.data.index_er
+        aph_er = index_er['APH'].get((e,r), [])
+        ath_er = index_er['ATH'].get((e,r), [])
+        axh_er = index_er['AXH'].get((e,r), [])
+        aih_er = index_er['AIH'].get((e,r), [])
+        ash_er = index_er['ASH'].get((e,r), [])
+
         # Primary energy production
-        pri = sum(m.Ph[aph,w,h]*m.effi[e,aph] for aph in m.APH if (e,r,aph) in m.APH_er)
+        pri = sum(m.Ph[aph,w,h]*m.effi[e,aph] for aph in aph_er)
 
         # Transformation between energy carriers: eff>0 is output, eff<0 is input
         # For heat pumps, eff needs to be modified to depend on hour and week
-        # ATH_er is a list of hourly transformation assets conditional on (ener, rgio)
+        # ath_er is a list of hourly transformation assets conditional on (ener, rgio)
         # (e,r) is under control already, so summing will yield the assts
-        tra = sum(m.Th[ath,w,h]*m.effi[e,ath] for ath in m.ATH if (e,r,ath) in m.ATH_er)
+        tra = sum(m.Th[ath,w,h]*m.effi[e,ath] for ath in ath_er)
         # Tw is effect for weekly technologies and is considered constant for every hour in that week
         #    +sum(m.Tw[atw,w]*m.effi[e,atw] for atw in m.ATW if (e,r,atw) in m.ATW_er)
         # Ty is effect for yearly technologies and is considered constant for every hour and week in that year
@@ -216,17 +328,17 @@ class PyMorelModel():
         # Gross import from region a - transmission assets are directional
         # I is import into the owner region
         # X is export from another owner region turned into import to this destination region
-        imp = sum(m.Ih[axh,w,h]*m.effi[e,axh] for axh in m.AXH if (e,r,axh) in m.AXH_er)\
-             +sum(m.Xh[aih,w,h]*m.effi[e,aih] for aih in m.AXH if (e,r,aih) in m.AIH_er)
+        imp = sum(m.Ih[axh,w,h]*m.effi[e,axh] for axh in axh_er)\
+             +sum(m.Xh[aih,w,h]*m.effi[e,aih] for aih in aih_er)
 
         # Gross export from region a - transmission assets are directional
         # so export for the owner is import to the receiver
-        exp = sum(m.Xh[axh,w,h] for axh in m.AXH if (e,r,axh) in m.AXH_er)\
-             +sum(m.Ih[aih,w,h] for aih in m.AXH if (e,r,aih) in m.AIH_er)
+        exp = sum(m.Xh[axh,w,h] for axh in axh_er)\
+             +sum(m.Ih[aih,w,h] for aih in aih_er)
 
         # Storage and discharge
-        sto = sum(m.Sh[ash,w,h] for ash in m.ASH if (e,r,ash) in m.ASH_er)
-        dis = sum(m.Dh[ash,w,h] for ash in m.ASH if (e,r,ash) in m.ASH_er)
+        sto = sum(m.Sh[ash,w,h] for ash in ash_er)
+        dis = sum(m.Dh[ash,w,h] for ash in ash_er)
 
         # Final consumption (gross)
         fin = m.fin_h[e,r,w,h]
@@ -248,37 +360,35 @@ class PyMorelModel():
     #
     ###################################################################################################################
 
+    # Capacity limits are constraints only for assets with capacity investment (AC), see declare_capacity_limits()
     def rule_transformation_capacity_limit_hourly(self,m,ath,w,h):
         """Constraint for limiting input to hourly transformation assets."""
-        return m.Th[ath,w,h] < (m.ini_T[ath] + m.C[ath]) * m.ava_Th[ath,w,h]
+        return m.Th[ath,w,h] <= (m.ini_T[ath] + m.C[ath]) * m.ava_Th[ath,w,h]
 
     def rule_export_capacity_limit_hourly(self,m,axh,w,h):
         """Constraint for limiting input to hourly transmission assets (export)."""
-        return m.Xh[axh,w,h] < (m.ini_X[axh] + m.C[axh]) * m.ava_Xh[axh,w,h]
+        return m.Xh[axh,w,h] <= (m.ini_X[axh] + m.C[axh]) * m.ava_Xh[axh,w,h]
 
     def rule_import_capacity_limit_hourly(self,m,aih,w,h):
         """Constraint for limiting input to hourly transmission assets (import)."""
-        return m.Ih[aih,w,h] < (m.ini_I[aih] + m.C[aih]) * m.ava_Ih[aih,w,h]
+        return m.Ih[aih,w,h] <= (m.ini_I[aih] + m.C[aih]) * m.ava_Ih[aih,w,h]
 
     def rule_storage_capacity_limit_hourly(self,m,ash,w,h):
         """Constraint for limiting input to hourly storage sion assets."""
-        return m.Sh[ash,w,h] < (m.ini_S[ash] + m.C[ash]) * m.ava_Sh[ash,w,h]
+        return m.Sh[ash,w,h] <= (m.ini_S[ash] + m.C[ash]) * m.ava_Sh[ash,w,h]
 
     def rule_discharge_capacity_limit_hourly(self,m,ash,w,h):
         """Constraint for limiting output from hourly storage assets."""
-        return m.Dh[ash,w,h] < (m.ini_D[ash] + m.C[ash]) * m.ava_Dh[ash,w,h]
+        return m.Dh[ash,w,h] <= (m.ini_D[ash] + m.C[ash]) * m.ava_Dh[ash,w,h]
 
     def rule_storage_volume_maxlimit_hourly(self,m,ash,w,h):
         """Constraint for limiting upper volume of hourly storage assets."""
-        return m.Vh[ash,w,h] < (m.ini_V[ash] + m.C[ash]) * m.ava_Vh[ash,w,h]
-
-    def rule_storage_volume_minlimit_hourly(self,m,ash,w,h):
-        """Constraint for limiting input to hourly storage assets."""
-        return m.Vh[ash,w,h] > (m.ini_V[ash] + m.C[ash]) * m.ava_Vh[ash,w,h]
+        return m.Vh[ash,w,h] <= (m.ini_V[ash] + m.C[ash]) * m.ava_Vh[ash,w,h]
 
+    # C is bounded by max_C in declare_capacity_limits() rather than constrained
     def rule_new_capacity(self,m,a):
         """Limit new capacity below exogenous choice."""
-        return m.C[a] < m.max_C[a]
+        return m.C[a] <= m.max_C[a]
 
     ###################################################################################################################
     #
@@ -286,20 +396,225 @@ class PyMorelModel():
     #
     ###################################################################################################################
 
-    def solve(self):
-        """Solve model."""
-        self.solver = SolverFactory('glpk')             # 'solver' often named 'opt' in Pyomo docs: https://pyomo.readthedocs.io/en/stable/working_models.html
-        self.results = self.solver.solve(self.model)
+    def solve(self, solver: object = None):
+        """Solve model with PyMorelSolver or Pyomo solver name, default glpk."""
+        self.solver = get_solver(solver, 'glpk')
+        with self.profiler.stage('solve') as record:
+            # The rest of the stage is Pyomo writing the LP file and reading the solution (except appsi)
+            self.results, self.solver_result = self.solver.solve_pyomo(self.model)
+            record['solver_seconds'] = self.solver_result.solver_seconds
+
+    def update_parameters(self, data_object: object):
+        """Update mutable parameters in place from a data object with the same sets as the model."""
+        if not self.mutable:
+            raise ValueError("PyMorelModel must be declared with mutable=True to update parameters.")
+        if data_object.sets != self.data.sets or data_object.subsets != self.data.subsets:
+            raise ValueError("Sets of new data differ from model sets, declare a new PyMorelModel instead.")
+        for name in self.mutable_para_h:
+            self.set_mutable_para(getattr(self.model, name), data_object.para_h[name])
+        for name in self.mutable_para_y:
+            self.set_mutable_para(getattr(self.model, name), data_object.para_y[name])
+        self.data = data_object
+        self.set_capacity_bounds()
+
+    def update_data(self, inputdata: dict) -> dict:
+        """Load changed inputdata dict and apply only its differences to the model, see apply_data()."""
+        data_object = PyMorelInputData(cache=self.data.cache, profiler=self.profiler)
+        data_object.load_data_from_dict(inputdata)
+        return self.apply_data(data_object)
+
+    def apply_data(self, data_object: object) -> dict:
+        """Apply the differences of data object from self.data to the model in place, instead of rebuilding it.
+
+        Changed sets add and delete the indices of sets, variables, mutable parameters and equilibrium rows.
+        Mutable parameters are updated entry by entry, changed immutable ones are declared again. Only the
+        rows of Q_equilibrium_h touched by changed asset links, efficiencies or immutable final consumption
+        are rebuilt, and the objective only if its variables or immutable parameters changed. Changed weeks
+        or hours rebuild the whole model. Returns summary of the changes."""
+        with self.profiler.stage('update', self.get_counts) as record:
+            diff = self.data.diff(data_object)
+            previous = self.data
+            self.data = data_object
+            summary = {
+                'sets': {name: {'added': len(added), 'removed': len(removed)}
+                         for name, (added, removed) in diff['sets'].items()},
+                'para': {name: len(changed) for para in [diff['para_h'], diff['para_y']]
+                         for name, changed in para.items()},
+                'rows': 0, 'objective': False, 'capacity_limits': False, 'rebuilt': False,
+            }
+            if 'W' in diff['sets'] or 'H' in diff['sets']:
+                self.model = ConcreteModel()
+                self.declare_assign()
+                summary['rebuilt'] = True
+            else:
+                added = self.apply_sets(diff['sets'])
+                declared = self.apply_parameters(diff)
+                rows = self.get_touched_rows(previous, diff, declared, added)
+                m = self.model
+                for index in rows:
+                    m.Q_equilibrium_h[index] = self.rule_equilibrium_h(m, *index)
+                summary['rows'] = len(rows)
+                # Capacity limits are few rows (assets with investment) and bounds, so they are declared again
+                if any(name in diff['sets'] for name in ['AC','ATH','AXH','ASH']) \
+                        or any(name in declared for name in self.get_capacity_para()):
+                    self.declare_capacity_limits()
+                    summary['capacity_limits'] = True
+                elif any(name in diff['para_h'] for name in self.get_capacity_para()):
+                    self.set_capacity_bounds()      # Bounds of changed mutable availabilities
+                    summary['capacity_limits'] = True
+                if any(name in diff['sets'] for name in self.objective_sets) \
+                        or any(name in declared for name in self.objective_para):
+                    m.obj.set_value(self.rule_objective(m))
+                    summary['objective'] = True
+            record.update(summary)
+        return summary
+
+    def apply_sets(self, changes: dict) -> dict:
+        """Update the members of changed sets in the order of the new data, delete the indices of removed
+        members and construct the variables of added members. Returns the added members by set name."""
+        m = self.model
+        sets = dict(self.data.sets, **self.data.subsets)
+        removed = {name: members for name, (_, members) in changes.items() if members}
+        added = {name: members for name, (members, _) in changes.items() if members}
+        indexed = [c for ctype in [Var, Param, Constraint] for c in m.component_objects(ctype, descend_into=False)
+                   if c.is_indexed() and (ctype is not Param or c.mutable)]
+        # Indices of removed members are deleted while the sets still hold them
+        for component in indexed:
+            for index in self.get_indices(component, removed):
+                try:
+                    del component[index]
+                except KeyError:
+                    pass        # Index was never constructed
+        for name in changes:
+            s = m.component(name)
+            if s is None:
+                continue
+            s.set_value(list(dict.fromkeys(sets[name])))
+        for var in m.component_objects(Var, descend_into=False):
+            for index in self.get_indices(var, added):
+                var[index]
+        return added
+
+    def apply_parameters(self, diff: dict) -> list:
+        """Update changed entries of mutable parameters, declare changed immutable parameters again.
+        Returns names of the parameters declared again, whose expressions must be rebuilt."""
+        m = self.model
+        declared = []
+        for para_data, para_diff in [(self.data.para_h, diff['para_h']), (self.data.para_y, diff['para_y'])]:
+            for name, entries in para_diff.items():
+                para = m.component(name)
+                if para is None:
+                    continue
+                if para.mutable:
+                    for key, value in entries.items():
+                        if key in para.index_set():
+                            para[key] = value
+                else:
+                    declared.append(name)
+                    m.del_component(name)
+                    m.add_component(name, Param(*para.index_set().subsets(), initialize=para_data[name],
+                                                default=para.default()))
+        return declared
+
+    def get_touched_rows(self, previous: object, diff: dict, declared: list, added: dict) -> list:
+        """Return the equilibrium rows (e,r,w,h) to build: rows of added members, all hours of (e,r) whose
+        asset links or efficiencies changed, and hours of (e,r) whose immutable final consumption changed."""
+        m = self.model
+        rows = dict.fromkeys(self.get_indices(m.Q_equilibrium_h, added))
+        pairs = {}
+        for subset, ers in diff['index_er'].items():
+            pairs.update(dict.fromkeys(ers))
+        if 'effi' in diff['para_y']:
+            # (e,r) of each asset, before and after the changes
+            asset_er = {}
+            for index_er in [previous.index_er, self.data.index_er]:
+                for subset in index_er.values():
+                    for er, assets in subset.items():
+                        for a in assets:
+                            asset_er.setdefault(a, set()).add(er)
+            for (e,a) in diff['para_y']['effi']:
+                pairs.update(dict.fromkeys(er for er in asset_er.get(a, []) if er[0] == e))
+        rows.update(dict.fromkeys((e,r,w,h) for (e,r) in pairs for w in m.W for h in m.H))
+        if 'fin_h' in declared:
+            rows.update(dict.fromkeys(diff['para_h']['fin_h']))
+        return [index for index in rows if index in m.Q_equilibrium_h.index_set()]
+
+    def get_capacity_para(self) -> list:
+        """Return names of the parameters of the capacity limits."""
+        return ['max_C'] + [name for limit in self.capacity_limits_h.values() for name in limit[:2]]
+
+    def get_indices(self, component: object, members: dict) -> list:
+        """Return indices of indexed component holding any of members {set name: [member,]} in its sets."""
+        index_sets = list(component.index_set().subsets())
+        indices = {}
+        for i, s in enumerate(index_sets):
+            if s.local_name in members:
+                dims = [list(t) for t in index_sets]
+                dims[i] = members[s.local_name]
+                indices.update(dict.fromkeys(itertools.product(*dims)))
+        return [index[0] if len(index) == 1 else index for index in indices]
+
+    def resolve(self, data_object: object = None, solver: object = 'appsi_highs') -> dict:
+        """Update mutable parameters from data object (if given) and re-solve without rebuilding the model.
+
+        Pyomo's appsi solvers (e.g. appsi_highs) keep the solver instance between calls, pass on only
+        the changed parameters and warm start from the previous basis. Other solvers are re-run cold.
+        solver is a PyMorelSolver or a solver name."""
+        start = time.perf_counter()
+        if data_object is not None:
+            self.update_parameters(data_object)
+        updated = time.perf_counter()
+        if isinstance(solver, PyMorelSolver) or getattr(self, 'persistent_solver', None) is None \
+                or self.persistent_solver.name != solver:
+            self.persistent_solver = get_solver(solver, 'appsi_highs')
+        self.solver = self.persistent_solver
+        with self.profiler.stage('resolve') as record:
+            self.results, self.solver_result = self.solver.solve_pyomo(self.model)
+            record['solver_seconds'] = self.solver_result.solver_seconds
+        solved = time.perf_counter()
+        timing = {
+            'scenario': len(self.timings),      # Sequence number of re-solve
+            'update': updated - start,          # Seconds spent updating parameters
+            'solve': solved - updated,          # Seconds spent in solver call
+            'total': solved - start,
+        }
+        self.timings.append(timing)
+        return timing
+
+    def get_counts(self) -> dict:
+        """Return number of set members, parameter values, variables and constraints of the model."""
+        m = self.model
+        return {component.__name__: sum(len(c) for c in m.component_objects(component))
+                for component in [Set, Param, Var, Constraint]}
+
+    def get_levels(self, name: str) -> object:
+        """Return levels of variable as NumPy array in index order, e.g. (asset, week, hour) for Ph."""
+        var = getattr(self.model, name)
+        # Variables left out by the solver (e.g. in no constraint) have no value and count as 0
+        return numpy.fromiter((v.value or 0 for v in var.values()), dtype=float, count=len(var))
+
+    def get_duals(self, name: str = 'Q_equilibrium_h') -> object:
+        """Return duals of constraint as NumPy array in index order, e.g. (ener, rgio, week, hour) for
+        Q_equilibrium_h. Constraints without dual from the solver are NaN."""
+        dual = self.model.dual
+        constraint = getattr(self.model, name)
+        return numpy.fromiter((dual.get(c, numpy.nan) for c in constraint.values()), dtype=float, count=len(constraint))
+
+    def get_reduced_costs(self, name: str = 'C') -> object:
+        """Return reduced costs of variable as NumPy array in index order, NaN where the solver gave none."""
+        rc = self.model.rc
+        var = getattr(self.model, name)
+        return numpy.fromiter((rc.get(v, numpy.nan) for v in var.values()), dtype=float, count=len(var))
 
     def report(self):
         self.model.ATH.pprint()
         self.model.ATH_er.pprint()
         self.model.Q_equilibrium_h.pprint()
-        print(self.results)
+        print(self.solver_result)
 
     def print_debug(self):
         """Print debug information."""
-        print(self.results)
+        print(self.solver_result)
 
     def get_para(self, sets: list, data: dict) -> object:
         """Return Pyomo parameter, provide debugging information if fail."""
@@ -310,3 +625,11 @@ class PyMorelModel():
             print("Could not initialize set from " + str(data))
             p = None
         return p
+
+    def set_mutable_para(self, para: object, data: dict):
+        """Set values of mutable Pyomo parameter from dict, values not in dict are reset to default."""
+        default = para.default()
+        for key in list(para.sparse_keys()):
+            if key not in data and (key,) not in data:
+                para[key] = default
+        para.store_values(data)
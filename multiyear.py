@@ -0,0 +1,118 @@
+import copy
+
+import numpy
+import scipy.sparse
+
+from inputdata import PyMorelInputData
+from matrixmodel import PyMorelMatrixModel
+from profiling import PyMorelProfiler
+from solver import get_solver
+
+
+class PyMorelMultiYear():
+    """Class for multi-year investment planning: one hourly operational block per year of ay_data, linked by
+    the capacity added in each year. Capacity available in a year is its initial capacity (iniC) plus the
+    additions of that and all earlier years, limited by maxC of the year.
+
+    The hourly structure (columns, cost vector and equilibrium rows over W x H) is built once as a template
+    PyMorelMatrixModel. Each year is the template with the bounds and capacity limits of its yearly
+    parameters substituted, and the years are stacked block-diagonally with the capacity addition columns
+    C[a,y] and the rows linking them to the capacity of each year. Sets and hourly data are the same in
+    all years, only ay_data is by year."""
+
+    def __init__(self, data: dict, years: list = None, profiler: object = None):
+        self.inputdata = data               # Inputdata dict as for PyMorelInputData.load_data_from_dict()
+        self.profiler = profiler or PyMorelProfiler()
+        self.declare_assign(years)
+
+    def declare_assign(self, years: list = None):
+        """Preprocess the data of all years, build the template and assemble the blocks of all years."""
+        with self.profiler.stage('multiyear'):
+            first = PyMorelInputData(profiler=self.profiler, year=years[0] if years else None)
+            first.load_data_from_dict(self.inputdata)
+            self.years = years or first.years
+            # Sets and hourly parameters are the same in all years, only the yearly parameters are set again
+            self.year_data = {}
+            for year in self.years:
+                data = copy.copy(first)
+                data.year = year
+                data.set_para_yearly()
+                self.year_data[year] = data
+
+            # Capital cost is on the capacity additions of each year, so the template has none
+            template_data = copy.copy(first)
+            template_data.para_y = dict(first.para_y, cst_C={})
+            with self.profiler.stage('template'):
+                self.template = PyMorelMatrixModel(template_data, profiler=self.profiler)
+            self.year_models = {}
+            for year in self.years:
+                with self.profiler.stage('year'):
+                    self.year_models[year] = self.get_year_model(year)
+            with self.profiler.stage('assemble'):
+                self.set_matrices()
+
+    def get_year_model(self, year: str) -> object:
+        """Return the template with bounds and capacity limits of the yearly parameters of year."""
+        year_model = copy.copy(self.template)       # Shares cost vector and equilibrium rows with the template
+        year_model.data = copy.copy(self.year_data[year])
+        year_model.data.para_y = dict(self.year_data[year].para_y, cst_C={})
+        year_model.set_bounds()
+        year_model.set_capacity_limits_h()
+        return year_model
+
+    def set_matrices(self):
+        """Stack the years block-diagonally, followed by one column of capacity addition per (asset, year)."""
+        models = [self.year_models[year] for year in self.years]
+        AC = self.template.var_sets['C']
+        ny, nac, ncol = len(self.years), len(AC), self.template.ncol
+        self.add_col = ny * ncol                    # First column of the capacity additions, in (year, asset) order
+        self.ncol = self.add_col + ny * nac
+
+        cst_C = [[self.year_data[year].para_y['cst_C'].get((a,), 0) for a in AC] for year in self.years]
+        self.c = numpy.concatenate([model.c for model in models] + [numpy.ravel(cst_C)])
+        self.lb = numpy.concatenate([model.lb for model in models] + [numpy.zeros(ny * nac)])
+        self.ub = numpy.concatenate([model.ub for model in models] + [numpy.full(ny * nac, numpy.inf)])
+
+        # Capacity of year y is the sum of the additions of years up to y: C_y - sum(C[a,z] for z <= y) == 0
+        C_cols = numpy.arange(nac) + self.template.var_col['C']
+        rows, cols, vals = [], [], []
+        for i in range(ny):
+            row = i * nac + numpy.arange(nac)
+            rows.append(row)
+            cols.append(i * ncol + C_cols)
+            vals.append(numpy.ones(nac))
+            for j in range(i + 1):
+                rows.append(row)
+                cols.append(self.add_col + j * nac + numpy.arange(nac))
+                vals.append(-numpy.ones(nac))
+        link = scipy.sparse.coo_matrix((numpy.concatenate(vals), (numpy.concatenate(rows), numpy.concatenate(cols))),
+                                       shape=(ny * nac, self.ncol)) if nac else scipy.sparse.csr_matrix((0, self.ncol))
+        pad = lambda matrix: scipy.sparse.hstack([matrix, scipy.sparse.csr_matrix((matrix.shape[0], ny * nac))])
+        self.A_eq = scipy.sparse.vstack([pad(scipy.sparse.block_diag([model.A_eq for model in models])), link]).tocsr()
+        self.b_eq = numpy.concatenate([model.b_eq for model in models] + [numpy.zeros(ny * nac)])
+        self.A_ub = pad(scipy.sparse.block_diag([model.A_ub for model in models])).tocsr()
+        self.b_ub = numpy.concatenate([model.b_ub for model in models])
+
+    def solve(self, solver: object = None):
+        """Solve all years at once with PyMorelSolver or solver name, default HiGHS through scipy ('scipy')."""
+        self.solver = get_solver(solver, 'scipy')
+        with self.profiler.stage('solve') as record:
+            self.results, self.solver_result = self.solver.solve_matrix(self.c, self.A_ub, self.b_ub, self.A_eq,
+                                                                        self.b_eq, self.lb, self.ub)
+            record['solver_seconds'] = self.solver_result.solver_seconds
+        x = self.solver_result.x
+        if x is None:
+            raise RuntimeError("Multi-year model could not be solved: " + self.solver_result.message)
+        ncol = self.template.ncol
+        for i, year in enumerate(self.years):
+            self.year_models[year].set_solution(x[i * ncol:(i + 1) * ncol])
+        self.additions = x[self.add_col:].reshape(len(self.years), -1)
+
+    def get_capacities(self) -> dict:
+        """Return capacity added by asset and year {(a,y): C}."""
+        return {(a,year): self.additions[i, j] for i, year in enumerate(self.years)
+                for j, a in enumerate(self.template.var_sets['C'])}
+
+    def get_year(self, year: str) -> object:
+        """Return PyMorelMatrixModel of year, e.g. for PyMorelOutput. Its C is the capacity added up to year."""
+        return self.year_models[year]
@@ -1,70 +1,294 @@
+import copy
+import math
+import os
+import shutil
+from functools import cached_property
+
+import numpy
 import pandas
 
+from profiling import PyMorelProfiler
+
 
 class PyMorelOutput():
     """Class for organising output from PyMorel model."""
 
-    def __init__(self,pymorel_model):
-        """Initialise output object."""
-        self.model = pymorel_model.model        # Pyomo model object
+    # Hourly variables and the asset subset they are indexed by
+    hourly_variables = [('Ph','APH'), ('Th','ATH'), ('Xh','AXH'), ('Ih','AXH'), ('Sh','ASH'), ('Dh','ASH'), ('Vh','ASH')]
+
+    # Tables computed on first access and cached
+    tables = ['activity_h', 'balance_h', 'balance_h_ener', 'price_h', 'capacity_rc']
+
+    def __init__(self,pymorel_model,read=False,variables=None,regions=None,weeks=None):
+        """Initialise output object. Tables activity_h, balance_h and balance_h_ener are computed on first
+        access, for the selected variables, regions and weeks only (default all), as if the full activity_h
+        were filtered on columns var, rgio and week. With read, these three tables are computed at once.
+        Tables price_h and capacity_rc of duals and reduced costs are also computed on first access."""
+        self.pymorel_model = pymorel_model      # PyMorelModel or PyMorelMatrixModel, providing get_levels()
         self.input = pymorel_model.data         # PyMorel input data object
-        self.read_hourly_variables()
-        self.set_balances()
-
-    def read_hourly_variables(self):
-        """Read model variables into dataframes."""
-        Ph = pandas.DataFrame.from_dict(self.model.Ph.extract_values(), orient='index', columns=['level'])
-        Th = pandas.DataFrame.from_dict(self.model.Th.extract_values(), orient='index', columns=['level'])
-        Xh = pandas.DataFrame.from_dict(self.model.Xh.extract_values(), orient='index', columns=['level'])
-        Ih = pandas.DataFrame.from_dict(self.model.Ih.extract_values(), orient='index', columns=['level'])
-        Sh = pandas.DataFrame.from_dict(self.model.Sh.extract_values(), orient='index', columns=['level'])
-        Dh = pandas.DataFrame.from_dict(self.model.Dh.extract_values(), orient='index', columns=['level'])
-        Vh = pandas.DataFrame.from_dict(self.model.Vh.extract_values(), orient='index', columns=['level'])
-
-        # Add variable name for later use when these tables are concatenated
-        Ph['var'] = 'Ph'
-        Th['var'] = 'Th'
-        Xh['var'] = 'Xh'
-        Ih['var'] = 'Ih'
-        Sh['var'] = 'Sh'
-        Dh['var'] = 'Dh'
-        Vh['var'] = 'Vh'
-
-        # Create hourly activity dataframe with all values from hourly variables
-        activity_h = pandas.concat([Ph,Th,Xh,Ih,Sh,Dh,Vh])
-        # Unpack the index tuple of (tech, week, hour) to separate columns
-        activity_h['asst'], activity_h['week'], activity_h['hour'] = zip(*activity_h.index)
-        # Merge energy carrier and efficiency on technologies
-        activity_h = activity_h.merge(self.input.ae[['asst','ener','effi']], on='asst')
-        # Merge region into act_h
-        activity_h = activity_h.merge(self.input.a[['asst','role','rgio','dest']], on='asst')
-
-        # Add data to Fh (m.fin_h[e,r,w,h]) which are not present since final consumption are not assets
-        Fh = pandas.DataFrame.from_dict(self.model.fin_h.extract_values(), orient='index', columns=['level'])
-#        Fh = pandas.DataFrane(['level','var','ener','rgio','week','hour','role','asst','dest','effi',])
-        Fh['var'] = 'Fh'
-        Fh['asst'] = 'demand'
-        Fh['week'] = ''
-        Fh['hour'] = ''
-        Fh['ener'] = ''
-        Fh['effi'] = -1
-        Fh['role'] = 'fcon'
-        Fh['rgio'] = ''
-        Fh['dest'] = ''
-        Fh['ener'], Fh['rgio'], Fh['week'], Fh['hour'] = zip(*Fh.index)
-        Fh.reset_index(drop=True, inplace=True)
-        activity_h = pandas.concat([activity_h,Fh])
-
-        # Calculate effect and energy for each variable
-        activity_h['efct'] = activity_h['effi']*activity_h['level']
-        weight = 365.25*24/(len(self.model.H)*len(self.model.W))
+        self.profiler = getattr(pymorel_model, 'profiler', None) or PyMorelProfiler()
+        with self.profiler.stage('output'):
+            self.set_categories()
+            self.set_selection(variables, regions, weeks)
+            if read:
+                for table in self.tables[:3]:
+                    getattr(self, table)
+
+    def set_categories(self):
+        """Set the categories of all string columns, so that output tables hold integer codes only."""
+        sets = self.input.sets
+        unique = lambda elements: list(dict.fromkeys(str(element) for element in elements))
+        a = self.input.a
+        regions = unique(sets['R'] + a['rgio'].to_list() + a['dest'].to_list() + [''])
+        self.categories = {
+            'var':  [var for var, subset in self.hourly_variables] + ['Fh'],
+            'asst': unique(sets['A'] + ['demand']),
+            'week': unique(sets['W']),
+            'hour': unique(sets['H']),
+            'ener': unique(sets['E'] + self.input.ae['ener'].to_list()),
+            'role': unique(a['role'].to_list() + ['fcon']),
+            'rgio': regions,
+            'dest': regions,
+        }
+        # Asset attributes in the order of the asset categories, for lookup by asset code
+        self.asset_table = a.astype({'asst': str}).drop_duplicates('asst').set_index('asst')\
+            .reindex(self.categories['asst'])
+        # Weight of each (week,hour) time slice in (week,hour) order
+        wgt_h = self.input.para_h['wgt_h']
+        self.weight = numpy.array([wgt_h.get((w,h), 0) for w in sets['W'] for h in sets['H']], dtype=float)
+
+    def get_codes(self, column: str, values: list) -> object:
+        """Return integer codes of values among the categories of column."""
+        return pandas.Index(self.categories[column]).get_indexer([str(value) for value in values])
+
+    def set_selection(self, variables: list = None, regions: list = None, weeks: list = None):
+        """Set selected values of columns var, rgio and week (None selects all) as boolean masks over their
+        categories."""
+        self.selection = {}
+        for column, values in [('var', variables), ('rgio', regions), ('week', weeks)]:
+            mask = numpy.full(len(self.categories[column]), values is None)
+            if values is not None:
+                codes = self.get_codes(column, values)
+                if (codes < 0).any():
+                    raise ValueError("Output selection of " + column + " has unknown values: "
+                                     + str([value for value, code in zip(values, codes) if code < 0]))
+                mask[codes] = True
+            self.selection[column] = mask
+
+    def select(self, variables: list = None, regions: list = None, weeks: list = None) -> object:
+        """Return output object of the selection, sharing categories and model with this one. Nothing is
+        read from the model until a table of the returned object is accessed."""
+        output = copy.copy(self)
+        for table in self.tables:
+            output.__dict__.pop(table, None)
+        output.set_selection(variables, regions, weeks)
+        return output
+
+    def get_frame(self, columns: dict) -> object:
+        """Return dataframe from dict of arrays, where string columns are given by integer codes."""
+        return pandas.DataFrame({
+            column: pandas.Categorical.from_codes(values, categories=self.categories[column])
+            if column in self.categories else values for column, values in columns.items()})
+
+    def iter_activity_h(self, chunk_rows: int = None):
+        """Yield hourly activity dataframes, one per hourly variable and one for final consumption.
+
+        With chunk_rows, the variables are split into dataframes of at most chunk_rows rows (but at least
+        the hours of one asset), so that memory use is bounded by chunk rather than by model size.
+        Only rows of the selection are read."""
+        sets = self.input.sets
+        nw, nh = len(sets['W']), len(sets['H'])
+        nwh = nw * nh
+        wh_week = numpy.repeat(numpy.arange(nw), nh)    # Week and hour codes of (week,hour) positions
+        wh_hour = numpy.tile(numpy.arange(nh), nw)
+        # Selected (week,hour) positions, week codes are positions in W as the week categories are W
+        wh_pos = numpy.flatnonzero(self.selection['week'][wh_week])
+        npos = len(wh_pos)
+        if npos == 0:
+            return
+        weight = self.weight[wh_pos]
         scale_engy = 1  # Scale from input effect unit (eg. MW) to output energy unit (e.g. GWh)
-        activity_h['engy'] = activity_h['efct'] * weight / scale_engy
-        self.activity_h = activity_h
 
-    def set_balances(self):
-        """Calculate energy balance tables from activity tables"""
+        asset_codes = lambda column: self.get_codes(column, self.asset_table[column].fillna('').to_list())
+        asset_role, asset_rgio, asset_dest = asset_codes('role'), asset_codes('rgio'), asset_codes('dest')
+        ae = self.input.ae
+        ae_asst = self.get_codes('asst', ae['asst'].to_list())
+        ae_ener = self.get_codes('ener', ae['ener'].to_list())
+        ae_effi = ae['effi'].to_numpy(dtype=float)
+
+        for var, subset in self.hourly_variables:
+            if not self.selection['var'][self.categories['var'].index(var)]:
+                continue
+            # Levels are in (asset, week, hour) order with assets in the order of the subset
+            assets = list(dict.fromkeys(self.input.subsets[subset]))
+            block = pandas.Index(self.get_codes('asst', assets)).get_indexer(ae_asst)
+            # Energy carrier rows (asset, ener, effi) of these assets in the selected regions
+            rows = numpy.flatnonzero((block >= 0) & self.selection['rgio'][asset_rgio[ae_asst]])
+            if len(rows) == 0:
+                continue
+            levels = self.pymorel_model.get_levels(var)
+            for rows in numpy.array_split(rows, math.ceil(len(rows) * npos / chunk_rows)) if chunk_rows else [rows]:
+                # One block of selected (week,hour) rows per energy carrier row of each asset
+                index = (block[rows][:,None] * nwh + wh_pos[None,:]).ravel()
+                asst = numpy.repeat(ae_asst[rows], npos)
+                effi = numpy.repeat(ae_effi[rows], npos)
+                level = levels[index]
+                yield self.get_frame({
+                    'level': level,
+                    'var':   numpy.full(len(index), self.categories['var'].index(var)),
+                    'asst':  asst,
+                    'week':  numpy.tile(wh_week[wh_pos], len(rows)),
+                    'hour':  numpy.tile(wh_hour[wh_pos], len(rows)),
+                    'ener':  numpy.repeat(ae_ener[rows], npos),
+                    'effi':  effi,
+                    'role':  asset_role[asst],
+                    'rgio':  asset_rgio[asst],
+                    'dest':  asset_dest[asst],
+                    'efct':  effi * level,
+                    'engy':  effi * level * numpy.tile(weight, len(rows)) / scale_engy,
+                })
+
+        # Final consumption (fin_h[e,r,w,h]) for all energy carriers and regions, as consumption is not an asset
+        regions = numpy.flatnonzero(self.selection['rgio'][self.get_codes('rgio', sets['R'])])
+        if not self.selection['var'][self.categories['var'].index('Fh')] or len(regions) == 0:
+            return
+        ne, nr = len(sets['E']), len(sets['R'])
+        level = numpy.zeros(ne * nr * nwh)
+        fin_h = self.input.para_h['fin_h']
+        if fin_h:
+            e, r, w, h = zip(*fin_h.keys())
+            index = [pandas.Index(categories).get_indexer(list(keys)) for categories, keys
+                     in [(sets['E'], e), (sets['R'], r), (sets['W'], w), (sets['H'], h)]]
+            valid = numpy.all([i >= 0 for i in index], axis=0)
+            flat = ((index[0] * nr + index[1]) * nw + index[2]) * nh + index[3]
+            level[flat[valid]] = numpy.fromiter(fin_h.values(), dtype=float, count=len(fin_h))[valid]
+        level = level.reshape(ne, nr, nwh)[:, regions][:, :, wh_pos].ravel()
+        nsel = len(regions)
+        n = len(level)
+        yield self.get_frame({
+            'level': level,
+            'var':   numpy.full(n, self.categories['var'].index('Fh')),
+            'asst':  numpy.full(n, self.categories['asst'].index('demand')),
+            'week':  numpy.tile(wh_week[wh_pos], ne * nsel),
+            'hour':  numpy.tile(wh_hour[wh_pos], ne * nsel),
+            'ener':  numpy.repeat(self.get_codes('ener', sets['E']), nsel * npos),
+            'effi':  numpy.full(n, -1.0),
+            'role':  numpy.full(n, self.categories['role'].index('fcon')),
+            'rgio':  numpy.tile(numpy.repeat(self.get_codes('rgio', sets['R'])[regions], npos), ne),
+            'dest':  numpy.full(n, self.categories['dest'].index('')),
+            'efct':  -level,
+            'engy':  -level * numpy.tile(weight, ne * nsel) / scale_engy,
+        })
+
+    def get_empty_activity(self) -> object:
+        """Return hourly activity dataframe without rows, for selections without any."""
+        codes, values = numpy.zeros(0, dtype=int), numpy.zeros(0)
+        return self.get_frame({column: codes if column in self.categories else values for column in
+                               ['level','var','asst','week','hour','ener','effi','role','rgio','dest','efct','engy']})
+
+    @cached_property
+    def activity_h(self) -> object:
+        """Hourly activity dataframe of the selection, read from the model on first access."""
+        with self.profiler.stage('output'), self.profiler.stage('activity_h'):
+            frames = list(self.iter_activity_h())
+            return pandas.concat(frames, ignore_index=True) if frames else self.get_empty_activity()
+
+    @cached_property
+    def balance_h(self) -> object:
+        """Energy balance by (region, role, energy carrier). Unless activity_h is already read, it is summed
+        up one variable at a time, without materializing activity_h."""
+        with self.profiler.stage('output'), self.profiler.stage('balance_h'):
+            self.set_balances([self.activity_h] if 'activity_h' in self.__dict__ else self.iter_activity_h())
+        return self.balance_h
+
+    @cached_property
+    def balance_h_ener(self) -> object:
+        """Mean energy by region and role in columns by energy carrier, computed with balance_h."""
+        self.balance_h
+        return self.balance_h_ener
+
+    @cached_property
+    def price_h(self) -> object:
+        """Hourly market prices of the selected regions and weeks from the duals of Q_equilibrium_h, by
+        (ener, rgio, week, hour). The dual is the cost of one more unit of effect in a time slice, the
+        price is per unit of energy, i.e. the dual divided by the weight of the time slice."""
+        with self.profiler.stage('output'), self.profiler.stage('price_h'):
+            sets = self.input.sets
+            EH = list(dict.fromkeys(self.input.subsets['EH']))
+            R = list(dict.fromkeys(sets['R']))
+            nr, nw, nh = len(R), len(sets['W']), len(sets['H'])
+            # Duals are in (ener, rgio, week, hour) order, the selection is applied to the reshaped array
+            dual = self.pymorel_model.get_duals('Q_equilibrium_h').reshape(len(EH), nr, nw * nh)
+            regions = numpy.flatnonzero(self.selection['rgio'][self.get_codes('rgio', R)])
+            wh_week = numpy.repeat(numpy.arange(nw), nh)
+            wh_pos = numpy.flatnonzero(self.selection['week'][wh_week])
+            dual = dual[:, regions][:, :, wh_pos].ravel()
+            n = len(EH) * len(regions)
+            weight = numpy.tile(self.weight[wh_pos], n)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                price = numpy.where(weight > 0, dual / weight, numpy.nan)
+            return self.get_frame({
+                'ener': numpy.repeat(self.get_codes('ener', EH), len(regions) * len(wh_pos)),
+                'rgio': numpy.tile(numpy.repeat(self.get_codes('rgio', R)[regions], len(wh_pos)), len(EH)),
+                'week': numpy.tile(wh_week[wh_pos], n),
+                'hour': numpy.tile(numpy.tile(numpy.arange(nh), nw)[wh_pos], n),
+                'dual': dual,
+                'wght': weight,
+                'price': price,
+            })
+
+    @cached_property
+    def capacity_rc(self) -> object:
+        """Capacity additions C and their reduced costs by asset. A positive reduced cost is the cost
+        per unit of capacity not recovered by the market prices."""
+        with self.profiler.stage('output'), self.profiler.stage('capacity_rc'):
+            AC = list(dict.fromkeys(self.input.subsets['AC']))
+            return self.get_frame({
+                'asst': self.get_codes('asst', AC),
+                'level': self.pymorel_model.get_levels('C'),
+                'rc': self.pymorel_model.get_reduced_costs('C'),
+            })
+
+    def set_balances(self, frames: object):
+        """Calculate energy balance tables from an iterable of hourly activity dataframes, one at a time."""
+        # Sum and count of energy by (region, role, energy carrier), added up over the dataframes
+        parts = [frame.groupby(['rgio','role','ener'], observed=True)['engy'].agg(['sum','count']) for frame in frames]
+        if not parts:
+            parts = [self.get_empty_activity().groupby(['rgio','role','ener'], observed=True)['engy'].agg(['sum','count'])]
+        totals = pandas.concat(parts).groupby(level=[0,1,2], observed=True).sum()
+        self.balance_h = totals[['sum']].rename(columns={'sum': 'engy'})
+        # Mean energy by region and role in columns by energy carrier, as pandas.pivot_table()
+        self.balance_h_ener = (totals['sum'] / totals['count']).unstack('ener')
+        if totals.empty:
+            # Unstacking no rows loses the index levels and the columns name
+            self.balance_h_ener = pandas.DataFrame(index=totals.index.droplevel('ener'),
+                                                   columns=pandas.Index([], name='ener'), dtype=float)
+
+    def export_parquet(self, path: str, partition_cols: list = None, chunk_rows: int = 1000000):
+        """Write hourly activity of the selection to a Parquet dataset in path/activity_h, chunk by chunk as read from
+        the model, and the balance tables to path/balance_h.parquet and path/balance_h_ener.parquet.
+
+        The dataset is partitioned by partition_cols (default week) and replaces an earlier export to path.
+        Only the balance tables are kept in memory, as balance_h and balance_h_ener, unless the output
+        object already read activity_h."""
+        import pyarrow
+        import pyarrow.parquet
+        partition_cols = partition_cols or ['week']
+        # Chunks are added to the dataset as new files, so files of an earlier export are removed first
+        shutil.rmtree(os.path.join(path, 'activity_h'), ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
 
-        self.balance_h = self.activity_h[['rgio','role','ener','engy']].groupby(['rgio','role','ener']).sum()
-        self.balance_h_ener = pandas.pivot_table(self.activity_h, values='engy', index=['rgio','role'], columns=['ener'])
+        def write(frames):
+            for frame in frames:
+                table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+                pyarrow.parquet.write_to_dataset(table, os.path.join(path, 'activity_h'),
+                                                 partition_cols=partition_cols)
+                yield frame
 
+        # Balances are summed up as each chunk is written, after which the chunk is released
+        with self.profiler.stage('export'):
+            self.set_balances(write(self.iter_activity_h(chunk_rows)))
+            self.balance_h.reset_index().to_parquet(os.path.join(path, 'balance_h.parquet'), index=False)
+            balance_h_ener = self.balance_h_ener.copy()
+            balance_h_ener.columns = balance_h_ener.columns.astype(str)
+            balance_h_ener.reset_index().to_parquet(os.path.join(path, 'balance_h_ener.parquet'), index=False)
@@ -0,0 +1,88 @@
+import contextlib
+import cProfile
+import json
+import sys
+import time
+
+try:
+    import resource             # Peak RSS, not available on Windows
+except ImportError:
+    resource = None
+
+
+class PyMorelProfiler():
+    """Records wall time, peak RSS and object counts per stage of preprocessing, model building,
+    solving and output, so that stages can be compared across runs.
+
+    Stages may be nested, e.g. stage 'para_h' within stage 'model' is recorded as 'model/para_h'.
+    With cprofile=True, all stages are also profiled by cProfile, see dump_stats()."""
+
+    def __init__(self, cprofile: bool = False):
+        self.stages = []                # One record (dict) per finished stage, in order of finishing
+        self.names = []                 # Names of the stages currently running
+        self.cprofile = cProfile.Profile() if cprofile else None
+
+    def get_peak_rss(self) -> float:
+        """Return peak resident set size of the process so far in MB, or None if not available."""
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10     # bytes on macOS, kB on Linux
+
+    @contextlib.contextmanager
+    def stage(self, name: str, counts: object = None):
+        """Context manager recording a stage. counts is an optional function returning a dict of object
+        counts (e.g. Pyomo variables and constraints), of which the stage records the increase.
+
+        The record is yielded, so that the stage can add e.g. the solver's own time to it."""
+        self.names.append(name)
+        record = {'stage': '/'.join(self.names)}
+        before = counts() if counts else {}
+        peak = self.get_peak_rss()
+        if self.cprofile is not None and len(self.names) == 1:
+            self.cprofile.enable()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.cprofile is not None and len(self.names) == 1:
+                self.cprofile.disable()
+            record['peak_rss_mb'] = self.get_peak_rss()
+            # Peak RSS is a high-water mark, so the increase is the memory the stage took beyond earlier stages
+            record['peak_rss_increase_mb'] = None if peak is None else record['peak_rss_mb'] - peak
+            if counts:
+                after = counts()
+                record['counts'] = {key: after[key] - before.get(key, 0) for key in after}
+            self.names.pop()
+            self.stages.append(record)
+
+    def report(self) -> dict:
+        """Return structured report of all recorded stages, with the total time of top level stages."""
+        return {
+            'stages': list(self.stages),
+            'seconds': sum(record['seconds'] for record in self.stages if '/' not in record['stage']),
+            'peak_rss_mb': self.get_peak_rss(),
+        }
+
+    def to_json(self, file_name: str = None) -> str:
+        """Return report as JSON string, also written to file_name if given."""
+        report = json.dumps(self.report(), indent=2)
+        if file_name is not None:
+            with open(file_name, 'w') as f:
+                f.write(report)
+        return report
+
+    def dump_stats(self, file_name: str):
+        """Write cProfile statistics of all stages to file_name, for pstats or e.g. snakeviz."""
+        if self.cprofile is None:
+            raise ValueError("PyMorelProfiler must be declared with cprofile=True to dump statistics.")
+        self.cprofile.dump_stats(file_name)
+
+    def print_report(self):
+        """Print table of stages with time, peak RSS increase and counts."""
+        for record in self.stages:
+            memory = record['peak_rss_increase_mb']
+            print("{:<40} {:>10.3f} s {:>10} MB  {}".format(
+                record['stage'], record['seconds'], '-' if memory is None else round(memory, 1),
+                record.get('counts', '')))
@@ -1,13 +1,159 @@
-from inputdata import PyMorelInputData
-from output import PyMorelOutput
-from model import PyMorelModel
-from inputdatadict import InputDataDict
-
-pymorel_inputdata_dict = InputDataDict()
-pymorel_inputdata = PyMorelInputData()
-pymorel_inputdata.load_data_from_dict(pymorel_inputdata_dict.data)
-pymorel_model = PyMorelModel(pymorel_inputdata)
-pymorel_model.solve()
-pymorel_model.report()
-
-pymorel_output = PyMorelOutput(pymorel_model)
+import time
+
+START = time.perf_counter()     # Start of the command, before any heavy import
+
+import argparse
+import json
+import os
+import sys
+
+# USAGE: Run PyMorel from a prompt in the base pymorel directory
+#        using the command:> python pymorel.py <command> [input] [options], where command is one of
+#        validate, build, solve or export and input is a directory of Feather or Parquet files or an
+#        Excel workbook (default the example InputDataDict), e.g.
+#        python pymorel.py solve data/dk --scenario high_dk.json --backend matrix --timings
+#        Pandas, Pyomo and the solvers are imported only by the commands that need them.
+
+# Output tables of export, see PyMorelOutput
+TABLES = ['balance_h', 'balance_h_ener', 'price_h', 'capacity_rc', 'activity_h']
+
+
+def load_tables(args: object, profiler: object) -> dict:
+    """Return input tables of args.input with the override of scenario file args.scenario applied."""
+    with profiler.stage('load'):
+        if args.input is None:
+            from inputdatadict import InputDataDict
+            tables = InputDataDict().data
+        elif args.input.lower().endswith(('.xls', '.xlsx')):
+            from inputfiles import read_xls
+            tables = read_xls(args.input)
+        else:
+            from inputfiles import read_dir
+            tables = read_dir(args.input)
+        if args.scenario:
+            from scenario import apply_override
+            with open(args.scenario) as f:
+                tables = apply_override(tables, json.load(f))
+    return tables
+
+
+def build(args: object, profiler: object) -> object:
+    """Return model of the backend built from the input tables."""
+    tables = load_tables(args, profiler)
+    with profiler.stage('import'):
+        from inputdata import PyMorelInputData
+        if args.backend == 'matrix':
+            from matrixmodel import PyMorelMatrixModel
+        else:
+            from model import PyMorelModel
+    pymorel_inputdata = PyMorelInputData(profiler=profiler, year=args.year)
+    pymorel_inputdata.load_data_from_dict(tables)
+    if args.backend == 'matrix':
+        return PyMorelMatrixModel(pymorel_inputdata, profiler=profiler)
+    return PyMorelModel(pymorel_inputdata, profiler=profiler)
+
+
+def solve(args: object, profiler: object) -> object:
+    """Return model built and solved with the solver settings of args."""
+    from solver import PyMorelSolver
+    pymorel_model = build(args, profiler)
+    solver = args.solver or ('scipy' if args.backend == 'matrix' else 'glpk')
+    pymorel_model.solve(PyMorelSolver(solver, threads=args.threads, time_limit=args.time_limit))
+    print(pymorel_model.solver_result)
+    if not pymorel_model.solver_result.is_optimal():
+        raise SystemExit(1)
+    return pymorel_model
+
+
+def command_validate(args: object, profiler: object) -> int:
+    """Check the input tables without building anything, exit code 1 if there are errors."""
+    tables = load_tables(args, profiler)
+    from validation import PyMorelValidation
+    with profiler.stage('validate'):
+        report = PyMorelValidation(tables).validate()
+    print(report)
+    return 1 if report.errors else 0
+
+
+def command_build(args: object, profiler: object) -> int:
+    """Preprocess the input and build the model, print its size."""
+    pymorel_model = build(args, profiler)
+    print(json.dumps(pymorel_model.get_counts()))
+    return 0
+
+
+def command_solve(args: object, profiler: object) -> int:
+    """Build and solve the model, print the solver result and the energy balance."""
+    from output import PyMorelOutput
+    pymorel_output = PyMorelOutput(solve(args, profiler))
+    print(pymorel_output.balance_h)
+    return 0
+
+
+def command_export(args: object, profiler: object) -> int:
+    """Build and solve the model, write the output tables to args.output as CSV or Parquet files."""
+    from output import PyMorelOutput
+    pymorel_output = PyMorelOutput(solve(args, profiler))
+    os.makedirs(args.output, exist_ok=True)
+    with profiler.stage('export'):
+        for table in args.tables:
+            frame = getattr(pymorel_output, table)
+            frame = frame.reset_index(drop=frame.index.names == [None])     # Keep named index levels only
+            file_name = os.path.join(args.output, table + '.' + args.format)
+            if args.format == 'csv':
+                frame.to_csv(file_name, index=False)
+            else:
+                frame.columns = frame.columns.astype(str)
+                frame.to_parquet(file_name, index=False)
+            print('Written ' + file_name)
+    return 0
+
+
+def get_parser() -> object:
+    """Return argument parser with one subcommand per command_* function."""
+    parser = argparse.ArgumentParser(prog='pymorel', description='PyMorel energy system model.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, command in [('validate', command_validate), ('build', command_build),
+                          ('solve', command_solve), ('export', command_export)]:
+        subparser = subparsers.add_parser(name, help=command.__doc__.split(',')[0])
+        subparser.set_defaults(function=command)
+        subparser.add_argument('input', nargs='?', default=None,
+                               help='Directory of Feather/Parquet files or Excel workbook, default the example data')
+        subparser.add_argument('--scenario', help='JSON file with scenario override, see scenario.apply_override()')
+        subparser.add_argument('--timings', action='store_true', help='Print startup and per-stage timings')
+        subparser.add_argument('--profile', metavar='FILE', help='Write the stage report as JSON to file')
+        if name == 'validate':
+            continue
+        subparser.add_argument('--backend', default='pyomo', choices=['pyomo', 'matrix'])
+        subparser.add_argument('--year', default=None, help='Year of ay_data, default the first')
+        if name == 'build':
+            continue
+        subparser.add_argument('--solver', default=None, help='Solver name, default glpk (pyomo) or scipy (matrix)')
+        subparser.add_argument('--threads', type=int, default=None)
+        subparser.add_argument('--time-limit', type=float, default=None, help='Seconds')
+        if name == 'export':
+            subparser.add_argument('--output', required=True, help='Output directory')
+            subparser.add_argument('--tables', nargs='+', default=['balance_h', 'price_h'], choices=TABLES)
+            subparser.add_argument('--format', default='csv', choices=['csv', 'parquet'])
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = get_parser().parse_args(argv)
+    from profiling import PyMorelProfiler
+    profiler = PyMorelProfiler()
+    startup = time.perf_counter() - START
+    code = args.function(args, profiler)
+    if args.timings:
+        print("{:<40} {:>10.3f} s".format('startup', startup))
+        profiler.print_report()
+    if args.profile:
+        report = profiler.report()
+        report['startup_seconds'] = startup
+        with open(args.profile, 'w') as f:
+            json.dump(report, f, indent=2)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
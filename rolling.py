@@ -0,0 +1,105 @@
+import copy
+
+import numpy
+import pandas
+
+from inputdata import PyMorelInputData
+from model import PyMorelModel
+from profiling import PyMorelProfiler
+from solver import get_solver
+
+
+class PyMorelRolling():
+    """Class for rolling-horizon dispatch: the year is solved as a sequence of overlapping windows of
+    weeks for fixed capacities, with one PyMorelModel whose parameters are updated for each window.
+
+    Each window solves `window` weeks and keeps the first `step` of them, the rest is look-ahead.
+    Windows have weeks relabelled by position (p1, p2, ...), so the model structure is the same for
+    all windows, and the last windows are padded with copies of the last week. Windows are linked by
+    the fixed capacities only, as the model has no storage balance whose volume could be carried over.
+
+    After solve(), the object provides data and get_levels() for the whole year like a PyMorelModel,
+    so that PyMorelOutput(rolling) gives the stitched output."""
+
+    def __init__(self, data: dict, window: int = 2, step: int = 1, capacities: dict = None,
+                 solver: object = 'appsi_highs', profiler: object = None):
+        if not 1 <= step <= window:
+            raise ValueError("Rolling horizon step must be between 1 and the window length.")
+        self.inputdata = data               # Inputdata dict as for PyMorelInputData.load_data_from_dict()
+        self.window = window                # Weeks solved at once
+        self.step = step                    # Weeks kept from each window
+        self.capacities = capacities or {}  # Capacity additions C by asset, fixed in all windows (default 0)
+        self.solver = get_solver(solver, 'appsi_highs')    # Kept for incremental re-solves of the windows
+        self.profiler = profiler or PyMorelProfiler()
+        self.weeks = pandas.DataFrame(data['w_data'])['week'].to_list()
+        self.hours = pandas.DataFrame(data['h_data'])['hour'].to_list()
+        self.labels = ['p' + str(i + 1).zfill(len(str(window))) for i in range(window)]
+        # Weight of the time slices of the full year, as PyMorelInputData.set_para_hourly()
+        self.wh = pandas.DataFrame(data['wh_data'])
+        if 'wght' not in self.wh.columns:
+            self.wh['wght'] = 365.25*24/(len(self.weeks)*len(self.hours))
+
+    def get_window_data(self, start: int) -> object:
+        """Return PyMorelInputData of the window starting at week number start, with weeks relabelled."""
+        weeks = [self.weeks[min(start + i, len(self.weeks) - 1)] for i in range(self.window)]
+        wh = pandas.concat([self.wh[self.wh['week'] == week].assign(week=label)
+                            for week, label in zip(weeks, self.labels)], ignore_index=True)
+        data = dict(self.inputdata)
+        data['w_data'] = {'week': list(self.labels)}
+        data['wh_data'] = wh
+        pymorel_inputdata = PyMorelInputData(profiler=self.profiler)
+        pymorel_inputdata.load_data_from_dict(data)
+        return pymorel_inputdata
+
+    def get_window_model(self, window_data: object) -> object:
+        """Return mutable PyMorelModel of the first window, with fixed capacities."""
+        pymorel_model = PyMorelModel(window_data, mutable=True, profiler=self.profiler)
+        m = pymorel_model.model
+        for a in m.AC:
+            m.C[a].fix(self.capacities.get(a, 0))
+        return pymorel_model
+
+    def solve(self):
+        """Solve all windows in sequence and stitch the kept weeks into levels for the whole year."""
+        nh = len(self.hours)
+        self.windows = []
+        self.window_levels = {}             # Levels of the kept weeks by variable, one array per window
+        fin_h = {}
+        pymorel_model = None
+        for start in range(0, len(self.weeks), self.step):
+            with self.profiler.stage('window'):
+                window_data = self.get_window_data(start)
+                if pymorel_model is None:
+                    pymorel_model = self.get_window_model(window_data)
+                else:
+                    pymorel_model.update_parameters(window_data)
+                timing = pymorel_model.resolve(solver=self.solver)
+                if not pymorel_model.solver_result.is_optimal():
+                    raise RuntimeError("Rolling horizon window starting at week " + str(self.weeks[start])
+                                       + " is not optimal: " + pymorel_model.solver_result.termination)
+
+                # Keep the first step weeks of the window (fewer at the end of the year)
+                kept = min(self.step, len(self.weeks) - start)
+                for var in ['Ph','Th','Xh','Ih','Sh','Dh','Vh']:
+                    levels = pymorel_model.get_levels(var).reshape(-1, self.window, nh)
+                    self.window_levels.setdefault(var, []).append(levels[:, :kept, :])
+                for (e,r,w,h), value in window_data.para_h['fin_h'].items():
+                    i = self.labels.index(w)
+                    if i < kept:
+                        fin_h[(e,r,self.weeks[start + i],h)] = value
+                self.windows.append({'start': self.weeks[start], 'kept': kept, **timing})
+        self.set_data(pymorel_model.data, fin_h)
+        return self.windows
+
+    def set_data(self, window_data: object, fin_h: dict):
+        """Set input data object of the whole year for PyMorelOutput, from the sets of a window."""
+        self.data = copy.copy(window_data)
+        self.data.sets = dict(window_data.sets, W=list(self.weeks))
+        wgt_h = dict(zip(zip(self.wh['week'], self.wh['hour']), self.wh['wght']))
+        self.data.para_h = {'fin_h': fin_h, 'wgt_h': wgt_h}
+
+    def get_levels(self, name: str) -> object:
+        """Return levels of variable for the whole year in (asset, week, hour) order, as PyMorelModel."""
+        if name == 'C':
+            return numpy.array([self.capacities.get(a, 0) for a in dict.fromkeys(self.data.subsets['AC'])], dtype=float)
+        return numpy.concatenate(self.window_levels[name], axis=1).ravel()
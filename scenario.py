@@ -0,0 +1,102 @@
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from solver import get_solver
+
+try:
+    import threadpoolctl        # Limits thread pools of BLAS libraries already loaded with numpy
+except ImportError:
+    threadpoolctl = None
+
+# Base input data dict and solver configuration of the worker process, set once per worker by init_worker()
+_base_data = None
+_solver = None
+
+
+def apply_override(data: dict, override: dict) -> dict:
+    """Return copy of inputdata dict with scenario override applied, e.g.
+
+    {'name': 'high_dk', 'lFin': {'dk0': 1.2}, 'maxC': {'wind_dk0': 2000}}
+    'lFin' scales final consumption of all energy carriers by region, 'maxC' sets the
+    maximum capacity by asset and any '*_data' key replaces whole columns of that table."""
+    data = copy.deepcopy(data)
+    for key, values in override.items():
+        if key == 'lFin':
+            er = data['er_data']
+            er['lFin'] = [l * values.get(r, 1) for l, r in zip(er['lFin'], er['rgio'])]
+        elif key == 'maxC':
+            ay = data['ay_data']
+            ay['maxC'] = [values.get(a, c) for c, a in zip(ay['maxC'], ay['asst'])]
+        elif key.endswith('_data'):
+            data[key].update(values)
+        elif key != 'name':
+            raise KeyError("Unknown scenario override: " + key)
+    return data
+
+
+def get_worker_solver(solver: object, default: str, threads: int) -> object:
+    """Return copy of the solver of a worker process, with threads as default thread limit, and limit the
+    threads of numerical libraries in the worker. The environment variables only reach solver subprocesses
+    and libraries loaded later, numpy is already loaded, so its BLAS threads are limited by threadpoolctl
+    when installed."""
+    worker_solver = copy.copy(get_solver(solver, default))
+    if worker_solver.threads is None:
+        worker_solver.threads = threads
+    for var in ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']:
+        os.environ[var] = str(threads)
+    if threadpoolctl is not None:
+        threadpoolctl.threadpool_limits(threads)
+    return worker_solver
+
+
+def init_worker(base_data: dict, threads: int, solver: object = None):
+    """Keep base data and solver in the worker process and limit threads of numerical libraries and solver."""
+    global _base_data, _solver
+    _base_data = base_data
+    _solver = get_worker_solver(solver, 'glpk', threads)
+
+
+def run_scenario(name: str, override: dict) -> tuple:
+    """Run full PyMorel pipeline for one scenario in a worker, return (name, balance_h)."""
+    # Imported here, so that apply_override() is available without importing Pyomo
+    from inputdata import PyMorelInputData
+    from model import PyMorelModel
+    from output import PyMorelOutput
+    pymorel_inputdata = PyMorelInputData()
+    pymorel_inputdata.load_data_from_dict(apply_override(_base_data, override))
+    pymorel_model = PyMorelModel(pymorel_inputdata)
+    pymorel_model.solve(_solver)
+    # Only the compact balance table is sent back to the parent process, not the model
+    return name, PyMorelOutput(pymorel_model).balance_h
+
+
+class PyMorelScenarios():
+    """Class for running a batch of scenarios over a process pool."""
+
+    def __init__(self, base_data: dict, workers: int = None, threads: int = 1, solver: object = None):
+        self.base_data = base_data          # InputDataDict style dict shared by all scenarios
+        self.workers = workers or os.cpu_count()
+        self.threads = threads              # Thread limit per worker process
+        self.solver = solver                # PyMorelSolver or solver name, default glpk
+
+    def run(self, overrides: list):
+        """Run scenarios given by list of overrides, yield (name, balance_h) as scenarios finish.
+
+        At most two scenarios per worker are submitted ahead, so results stream back and
+        memory in the parent process does not grow with the number of scenarios."""
+        overrides = iter(enumerate(overrides))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                 initargs=(self.base_data, self.threads, self.solver)) as executor:
+            running = set()
+            while True:
+                for i, override in overrides:
+                    name = override.get('name', 'scenario_' + str(i))
+                    running.add(executor.submit(run_scenario, name, override))
+                    if len(running) >= 2 * self.workers:
+                        break
+                if not running:
+                    break
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
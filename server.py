@@ -0,0 +1,277 @@
+import argparse
+import collections
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from scenario import apply_override, get_worker_solver
+
+# USAGE: Start the server from a prompt in the base pymorel directory
+#        using the command:> python -m server [--data <input dir>] [--port 8765] [--workers 2]
+#        Submit a scenario with POST /jobs, e.g. {"override": {"lFin": {"dk0": 1.2}}, "outputs": ["price_h"]},
+#        and poll GET /jobs/<id> until its status is done. GET /status shows workers and jobs.
+
+# Tables a job can return, see PyMorelOutput
+OUTPUTS = ['balance_h', 'balance_h_ener', 'price_h', 'capacity_rc']
+
+# Datasets, warm models and solver of the worker process, set once per worker by init_worker()
+_datasets = None
+_pool = None
+_pool_size = None
+_solver = None
+
+
+def init_worker(datasets: dict, pool_size: int, threads: int, solver: object = None):
+    """Keep datasets, an empty pool of warm models and the solver in the worker process."""
+    global _datasets, _pool, _pool_size, _solver
+    _datasets = datasets
+    _pool = collections.OrderedDict()   # (warm PyMorelModel, base input data) by dataset, least recently used first
+    _pool_size = pool_size
+    _solver = get_worker_solver(solver, 'appsi_highs', threads)
+
+
+def get_model(dataset: str) -> tuple:
+    """Return (PyMorelModel, base PyMorelInputData, warm) of dataset, warm from the pool of the worker or
+    built. The least recently used model is dropped when the pool is full."""
+    from inputdata import PyMorelInputData
+    from model import PyMorelModel
+    if dataset in _pool:
+        _pool.move_to_end(dataset)
+        return _pool[dataset] + (True,)
+    if dataset not in _datasets:
+        raise KeyError("Unknown dataset: " + dataset)
+    while len(_pool) >= _pool_size:
+        _pool.popitem(last=False)
+    pymorel_inputdata = PyMorelInputData()
+    pymorel_inputdata.load_data_from_dict(_datasets[dataset])
+    _pool[dataset] = (PyMorelModel(pymorel_inputdata, mutable=True), pymorel_inputdata)
+    return _pool[dataset] + (False,)
+
+
+def get_lists(frame: object) -> dict:
+    """Return dataframe with its index as dict of lists, with None for missing values, for JSON."""
+    frame = frame.reset_index()
+    return {str(column): [None if value != value else value for value in frame[column].tolist()]
+            for column in frame.columns}
+
+
+def run_job(job: dict) -> dict:
+    """Apply scenario override to the warm model of the dataset in place, re-solve and return the
+    requested output tables as dicts of lists, with solver result and stage timings."""
+    from inputdata import PyMorelInputData
+    from output import PyMorelOutput
+    from profiling import PyMorelProfiler
+    start = time.perf_counter()
+    dataset = job.get('dataset', 'base')
+    pymorel_model, base_inputdata, warm = get_model(dataset)
+    # A fresh profiler per job, so that the warm model does not collect the stages of all jobs
+    profiler = PyMorelProfiler()
+    pymorel_model.profiler = profiler
+    try:
+        # The warm model holds the data of the previous job, so the base data is applied again without override
+        update = None
+        if job.get('override'):
+            pymorel_inputdata = PyMorelInputData(profiler=profiler)
+            pymorel_inputdata.load_data_from_dict(apply_override(_datasets[dataset], job['override']))
+            update = pymorel_model.apply_data(pymorel_inputdata)
+        elif pymorel_model.data is not base_inputdata:
+            update = pymorel_model.apply_data(base_inputdata)
+        pymorel_model.resolve(solver=_solver)
+    except Exception:
+        _pool.pop(dataset, None)        # Model may be left half updated
+        raise
+    result = {'warm': warm, 'update': update, 'solver': pymorel_model.solver_result.to_dict()}
+    if pymorel_model.solver_result.is_optimal():
+        output = PyMorelOutput(pymorel_model, regions=job.get('regions'), weeks=job.get('weeks'))
+        for name in job.get('outputs', ['balance_h']):
+            if name not in OUTPUTS:
+                raise KeyError("Unknown output table: " + name)
+            result[name] = get_lists(getattr(output, name))
+    result['stages'] = profiler.report()['stages']
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+class PyMorelServer():
+    """Local HTTP job server running scenario requests on a process pool of workers, each of which keeps
+    the models of the datasets it has solved warm (at most pool_size per worker), so that a request
+    costs an in-place update and a re-solve instead of startup, preprocessing and model construction.
+
+    Jobs are submitted with POST /jobs and run asynchronously, their status and results are read with
+    GET /jobs/<id> and released with DELETE /jobs/<id>. At most max_jobs jobs are queued or running.
+    Finished jobs are kept for job_ttl seconds, and at most max_done of them, the oldest are dropped."""
+
+    def __init__(self, datasets: dict, host: str = '127.0.0.1', port: int = 8765, workers: int = None,
+                 pool_size: int = 2, threads: int = 1, solver: object = None, max_jobs: int = 100,
+                 job_ttl: float = 3600, max_done: int = 1000):
+        self.datasets = datasets            # InputDataDict style dicts by dataset name, 'base' by default
+        self.workers = workers or os.cpu_count()
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+        self.max_done = max_done
+        self.jobs = {}                      # Job by id: request, future, submission and finishing time
+        self.lock = threading.Lock()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(datasets, pool_size, threads, solver))
+        self.httpd = ThreadingHTTPServer((host, port), self.get_handler())
+        self.port = self.httpd.server_address[1]
+
+    def submit(self, job: dict) -> str:
+        """Submit job and return its id. Raise ValueError or KeyError for invalid jobs, and RuntimeError if
+        max_jobs jobs are queued or running."""
+        if not isinstance(job, dict):
+            raise ValueError("Job must be a JSON object.")
+        if job.get('dataset', 'base') not in self.datasets:
+            raise KeyError("Unknown dataset: " + str(job.get('dataset')))
+        outputs = job.get('outputs', ['balance_h'])
+        if not isinstance(outputs, list) or any(name not in OUTPUTS for name in outputs):
+            raise ValueError("Outputs must be a list of " + ', '.join(OUTPUTS) + ".")
+        self.evict()
+        with self.lock:
+            if sum(not entry['future'].done() for entry in self.jobs.values()) >= self.max_jobs:
+                raise RuntimeError("Too many jobs queued or running.")
+            job_id = uuid.uuid4().hex
+            entry = {'job': job, 'future': self.executor.submit(run_job, job), 'submitted': time.time()}
+            entry['future'].add_done_callback(lambda future: entry.update(finished=time.time()))
+            self.jobs[job_id] = entry
+        return job_id
+
+    def evict(self):
+        """Drop finished jobs older than job_ttl seconds, and the oldest beyond max_done finished jobs."""
+        now = time.time()
+        with self.lock:
+            done = sorted((entry['finished'], job_id) for job_id, entry in self.jobs.items() if 'finished' in entry)
+            for i, (finished, job_id) in enumerate(done):
+                if now - finished > self.job_ttl or i < len(done) - self.max_done:
+                    del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> dict:
+        """Return status of job, with its result when done."""
+        entry = self.jobs[job_id]
+        future = entry['future']
+        status = {'id': job_id, 'name': entry['job'].get('name'), 'submitted': entry['submitted'],
+                  'status': self.get_state(future)}
+        if status['status'] == 'done':
+            status['result'] = future.result()
+        elif status['status'] == 'failed':
+            status['error'] = repr(future.exception())
+        return status
+
+    def get_state(self, future: object) -> str:
+        """Return state of job future: queued, running, done, failed or cancelled."""
+        if future.cancelled():
+            return 'cancelled'
+        if not future.done():
+            return 'running' if future.running() else 'queued'
+        return 'failed' if future.exception() is not None else 'done'
+
+    def get_status(self) -> dict:
+        """Return workers, datasets and the number of jobs by status."""
+        self.evict()
+        counts = collections.Counter(self.get_state(entry['future']) for entry in list(self.jobs.values()))
+        return {'workers': self.workers, 'datasets': list(self.datasets), 'jobs': dict(counts)}
+
+    def get_handler(self) -> type:
+        """Return request handler class bound to this server."""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def send(self, code: int, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def get_job_id(self) -> str:
+                parts = urlparse(self.path).path.strip('/').split('/')
+                return parts[1] if len(parts) == 2 and parts[0] == 'jobs' else None
+
+            def do_GET(self):
+                path = urlparse(self.path).path.rstrip('/')
+                job_id = self.get_job_id()
+                if path == '/status':
+                    self.send(200, server.get_status())
+                    return
+                try:
+                    status = server.get_job(job_id)
+                except KeyError:
+                    self.send(404, {'error': 'Not found: ' + path})
+                    return
+                self.send(200, status)
+
+            def do_POST(self):
+                if urlparse(self.path).path.rstrip('/') != '/jobs':
+                    self.send(404, {'error': 'Not found: ' + self.path})
+                    return
+                try:
+                    job = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                    self.send(202, {'id': server.submit(job)})
+                except (ValueError, KeyError) as error:
+                    self.send(400, {'error': str(error)})
+                except RuntimeError as error:
+                    self.send(503, {'error': str(error)})
+
+            def do_DELETE(self):
+                job_id = self.get_job_id()
+                with server.lock:
+                    entry = server.jobs.pop(job_id, None)
+                if entry is not None:
+                    entry['future'].cancel()
+                    self.send(200, {'id': job_id})
+                else:
+                    self.send(404, {'error': 'Not found: ' + self.path})
+
+            def log_message(self, format, *args):
+                pass        # No line per request on stderr
+
+        return Handler
+
+    def serve_forever(self):
+        """Serve requests until shutdown()."""
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """Stop serving and shut down the workers."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve PyMorel scenario requests with warm models.')
+    parser.add_argument('--data', default=None, help='Input directory of Feather or Parquet files, '
+                                                     'default the example InputDataDict')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--pool-size', type=int, default=2, help='Warm models per worker')
+    parser.add_argument('--threads', type=int, default=1, help='Solver threads per worker')
+    parser.add_argument('--solver', default='appsi_highs')
+    args = parser.parse_args()
+    if args.data:
+        from inputfiles import read_dir
+        data = read_dir(args.data)
+    else:
+        from inputdatadict import InputDataDict
+        data = InputDataDict().data
+    server = PyMorelServer({'base': data}, host=args.host, port=args.port, workers=args.workers,
+                           pool_size=args.pool_size, threads=args.threads, solver=args.solver)
+    print('Serving PyMorel on http://%s:%d' % (args.host, server.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+import time
+
+import numpy
+
+# Solver option names of the generic settings by solver, for solvers used through Pyomo and for the
+# matrix backend. Time limit is passed by Pyomo itself (timelimit) for all Pyomo solvers. Settings
+# a solver has no option for are left out and listed as ignored in the result.
+OPTIONS = {
+    'glpk':          {},
+    'cbc':           {'threads': 'threads', 'tolerance': ['primalTolerance', 'dualTolerance'], 'gap': 'ratioGap'},
+    'highs':         {'threads': 'threads', 'tolerance': ['primal_feasibility_tolerance', 'dual_feasibility_tolerance'],
+                      'gap': 'mip_rel_gap'},
+    'gurobi':        {'threads': 'Threads', 'tolerance': ['FeasibilityTol', 'OptimalityTol'], 'gap': 'MIPGap'},
+    'cplex':         {'threads': 'threads', 'tolerance': ['simplex_tolerances_feasibility',
+                      'simplex_tolerances_optimality'], 'gap': 'mip_tolerances_mipgap'},
+    'scipy':         {'time_limit': 'time_limit', 'tolerance': ['primal_feasibility_tolerance',
+                      'dual_feasibility_tolerance']},
+}
+
+# Solver options selecting the LP method and crossover after barrier, by solver
+METHODS = {
+    'glpk':          {'simplex': {'simplex': None}, 'barrier': {'interior': None}},
+    'cbc':           {'simplex': {'dualSimplex': ''}, 'barrier': {'barrier': ''}},
+    'highs':         {'simplex': {'solver': 'simplex'}, 'barrier': {'solver': 'ipm'},
+                      'crossover': {True: {'run_crossover': 'on'}, False: {'run_crossover': 'off'}}},
+    'gurobi':        {'simplex': {'Method': 1}, 'barrier': {'Method': 2},
+                      'crossover': {True: {'Crossover': -1}, False: {'Crossover': 0}}},
+    'cplex':         {'simplex': {'lpmethod': 2}, 'barrier': {'lpmethod': 4},
+                      'crossover': {False: {'solutiontype': 2}}},
+    'scipy':         {'simplex': {}, 'barrier': {}},      # linprog method highs-ds or highs-ipm
+}
+
+# Pyomo solver names by solver family. The appsi and persistent interfaces pass the model to the
+# solver in memory instead of writing an LP file, and keep it between solves
+FAMILIES = {
+    'glpk': 'glpk', 'cbc': 'cbc', 'highs': 'highs', 'appsi_highs': 'highs',
+    'gurobi': 'gurobi', 'gurobi_direct': 'gurobi', 'gurobi_persistent': 'gurobi', 'appsi_gurobi': 'gurobi',
+    'cplex': 'cplex', 'cplex_direct': 'cplex', 'cplex_persistent': 'cplex', 'appsi_cplex': 'cplex',
+    'scipy': 'scipy',
+}
+
+
+class PyMorelSolverResult():
+    """Structured result of a solve, in place of the solver's own result object."""
+
+    def __init__(self, solver: str, termination: str, objective: float = None, bound: float = None,
+                 seconds: float = None, solver_seconds: float = None, iterations: int = None,
+                 message: str = '', ignored: list = None):
+        self.solver = solver                # Solver name
+        self.termination = termination      # 'optimal', 'infeasible', 'unbounded', 'maxTimeLimit', ...
+        self.objective = objective          # Objective value of the solution, None if no solution
+        self.bound = bound                  # Best bound on the objective, where the solver reports it
+        self.seconds = seconds              # Wall time of the solve call, including LP write and read
+        self.solver_seconds = solver_seconds    # Time reported by the solver itself
+        self.iterations = iterations        # Simplex and/or barrier iterations, where reported
+        self.message = message
+        self.ignored = ignored or []        # Generic settings the solver has no option for
+        # Solution arrays of the matrix backend: primal values, duals of equality and inequality rows
+        # and reduced costs of columns
+        self.x = self.dual_eq = self.dual_ub = self.reduced_cost = None
+
+    @property
+    def gap(self) -> float:
+        """Relative gap between objective and bound, None if either is unknown."""
+        if self.objective is None or self.bound is None:
+            return None
+        return abs(self.objective - self.bound) / max(1e-10, abs(self.objective))
+
+    def is_optimal(self) -> bool:
+        return self.termination == 'optimal'
+
+    def to_dict(self) -> dict:
+        """Return the statistics of the result as dict, e.g. for JSON."""
+        return {'solver': self.solver, 'termination': self.termination, 'objective': self.objective,
+                'bound': self.bound, 'gap': self.gap, 'seconds': self.seconds,
+                'solver_seconds': self.solver_seconds, 'iterations': self.iterations,
+                'message': self.message, 'ignored': self.ignored}
+
+    def __repr__(self):
+        return 'PyMorelSolverResult(' + ', '.join(k + '=' + repr(v) for k, v in self.to_dict().items()) + ')'
+
+
+class PyMorelSolver():
+    """Solver configuration for PyMorelModel (through Pyomo) and PyMorelMatrixModel.
+
+    name is a Pyomo solver name such as 'glpk', 'cbc', 'highs', 'appsi_highs', 'gurobi_persistent'
+    or 'cplex_direct', or for the matrix backend 'scipy' (linprog) or 'highs' (highspy in memory).
+    method is 'simplex' or 'barrier' (None for the solver default), crossover applies after barrier.
+    tolerance is the primal and dual feasibility tolerance and gap the relative MIP gap."""
+
+    def __init__(self, name: str = 'glpk', threads: int = None, time_limit: float = None, method: str = None,
+                 crossover: bool = None, tolerance: float = None, gap: float = None, options: dict = None):
+        if name not in FAMILIES:
+            raise ValueError("Unknown solver " + name + ", use one of " + str(list(FAMILIES)))
+        if method not in [None, 'simplex', 'barrier']:
+            raise ValueError("Unknown LP method " + str(method) + ", use 'simplex' or 'barrier'")
+        self.name = name
+        self.family = FAMILIES[name]
+        self.threads = threads
+        self.time_limit = time_limit        # Seconds
+        self.method = method
+        self.crossover = crossover
+        self.tolerance = tolerance
+        self.gap = gap
+        self.options = options or {}        # Solver specific options, passed on as they are
+        self.pyomo_solver = None            # Pyomo solver instance, kept for persistent re-solves
+
+    def get_options(self) -> tuple:
+        """Return (solver options, ignored settings) for the generic settings of this solver."""
+        names = OPTIONS.get(self.family, {})
+        options, ignored = {}, []
+        for setting in ['threads', 'tolerance', 'gap'] + (['time_limit'] if self.family == 'scipy' else []):
+            value = getattr(self, setting)
+            if value is None:
+                continue
+            if setting not in names:
+                ignored.append(setting)
+                continue
+            for name in names[setting] if isinstance(names[setting], list) else [names[setting]]:
+                options[name] = value
+        methods = METHODS.get(self.family, {})
+        if self.method is not None:
+            if self.method in methods:
+                options.update(methods[self.method])
+            else:
+                ignored.append('method')
+        if self.crossover is not None:
+            if self.crossover in methods.get('crossover', {}):
+                options.update(methods['crossover'][self.crossover])
+            else:
+                ignored.append('crossover')
+        options.update(self.options)
+        return options, ignored
+
+    def available(self, matrix: bool = False) -> bool:
+        """Return True if the solver can be used here, for the matrix backend if matrix is True."""
+        if matrix or self.family == 'scipy':
+            try:
+                __import__('scipy.optimize' if self.family == 'scipy' else 'highspy')
+            except ImportError:
+                return False
+            return self.family == 'scipy' or self.name == 'highs'
+        from pyomo.environ import SolverFactory
+        return bool(SolverFactory(self.name).available(exception_flag=False))
+
+    def solve_pyomo(self, model: object) -> tuple:
+        """Solve Pyomo model, return (Pyomo results, PyMorelSolverResult).
+
+        The Pyomo solver instance is kept, so that appsi solvers re-solve a changed model incrementally.
+        The solution is loaded into the model only if it is optimal, otherwise only the result tells why."""
+        from pyomo.environ import Objective, SolverFactory, value
+        if self.family == 'scipy':
+            raise ValueError("Solver scipy is only available for PyMorelMatrixModel.")
+        if self.pyomo_solver is None:
+            self.pyomo_solver = SolverFactory(self.name)
+        options, ignored = self.get_options()
+        kwargs = {'options': options} if options else {}
+        kwargs['load_solutions'] = False
+        if self.time_limit is not None:
+            kwargs['timelimit'] = self.time_limit
+        start = time.perf_counter()
+        if self.name.endswith('_persistent'):
+            # Non-appsi persistent solvers do not see changed parameters, so the instance is set each time
+            self.pyomo_solver.set_instance(model)
+            results = self.pyomo_solver.solve(**kwargs)
+        else:
+            results = self.pyomo_solver.solve(model, **kwargs)
+        seconds = time.perf_counter() - start
+
+        termination = str(results.solver.termination_condition)
+        if termination == 'optimal':
+            self.load_solution(model, results)
+        objective = next(model.component_data_objects(Objective, active=True), None)
+        solver_seconds = getattr(results.solver, 'time', None)
+        if not isinstance(solver_seconds, (int, float)):
+            solver_seconds = getattr(results.solver, 'wallclock_time', None)
+        bound = results.problem.lower_bound
+        result = PyMorelSolverResult(
+            self.name, termination,
+            objective=value(objective, exception=False) if objective is not None and termination == 'optimal' else None,
+            bound=bound if isinstance(bound, (int, float)) and numpy.isfinite(bound) else None,
+            seconds=seconds,
+            solver_seconds=solver_seconds if isinstance(solver_seconds, (int, float)) else None,
+            message=str(getattr(results.solver, 'termination_message', '') or ''),
+            ignored=ignored)
+        return results, result
+
+    def load_solution(self, model: object, results: object):
+        """Load primal values, and duals and reduced costs where the model has import suffixes dual and rc."""
+        if self.name.startswith('appsi_'):
+            # The legacy results of appsi solvers lose the reduced costs, so they are read from the solver
+            self.pyomo_solver.load_vars()
+            for name, get in [('dual', self.pyomo_solver.get_duals), ('rc', self.pyomo_solver.get_reduced_costs)]:
+                suffix = getattr(model, name, None)
+                if suffix is not None and suffix.import_enabled():
+                    suffix.update(get())
+        else:
+            model.solutions.load_from(results)
+
+    def solve_matrix(self, c: object, A_ub: object, b_ub: object, A_eq: object, b_eq: object,
+                     lb: object, ub: object) -> tuple:
+        """Solve LP min c x st. A_ub x <= b_ub, A_eq x = b_eq, lb <= x <= ub.
+
+        Return (solver's own result, PyMorelSolverResult with x, duals and reduced costs). Duals are
+        the change of the objective by unit increase of the right hand side."""
+        if self.family == 'scipy':
+            return self.solve_scipy(c, A_ub, b_ub, A_eq, b_eq, lb, ub)
+        if self.name == 'highs':
+            return self.solve_highs(c, A_ub, b_ub, A_eq, b_eq, lb, ub)
+        raise ValueError("Solver " + self.name + " is not available for PyMorelMatrixModel, use 'scipy' or 'highs'.")
+
+    def solve_scipy(self, c, A_ub, b_ub, A_eq, b_eq, lb, ub) -> tuple:
+        """Solve LP by scipy.optimize.linprog with HiGHS."""
+        from scipy.optimize import linprog
+        options, ignored = self.get_options()
+        method = {None: 'highs', 'simplex': 'highs-ds', 'barrier': 'highs-ipm'}[self.method]
+        start = time.perf_counter()
+        results = linprog(c, A_ub=A_ub if A_ub.shape[0] else None, b_ub=b_ub if A_ub.shape[0] else None,
+                          A_eq=A_eq, b_eq=b_eq, bounds=numpy.column_stack([lb, ub]), method=method,
+                          options=options)
+        seconds = time.perf_counter() - start
+        termination = {0: 'optimal', 1: 'maxIterations', 2: 'infeasible', 3: 'unbounded'}.get(results.status, 'error')
+        if results.status == 1 and 'time limit' in results.message.lower():
+            termination = 'maxTimeLimit'
+        result = PyMorelSolverResult(self.name, termination, objective=results.fun, seconds=seconds,
+                                     solver_seconds=seconds, iterations=results.nit, message=results.message,
+                                     ignored=ignored)
+        if results.x is not None:
+            result.x = results.x
+            result.dual_eq = results.eqlin.marginals
+            result.dual_ub = results.ineqlin.marginals if A_ub.shape[0] else numpy.zeros(0)
+            result.reduced_cost = results.lower.marginals + results.upper.marginals
+        return results, result
+
+    def solve_highs(self, c, A_ub, b_ub, A_eq, b_eq, lb, ub) -> tuple:
+        """Solve LP by HiGHS in memory through highspy, with threads, method and crossover options."""
+        import highspy
+        import scipy.sparse
+        A = scipy.sparse.vstack([A_eq, A_ub]).tocsr()
+        inf = highspy.kHighsInf
+        lp = highspy.HighsLp()
+        lp.num_col_ = len(c)
+        lp.num_row_ = A.shape[0]
+        lp.col_cost_ = numpy.asarray(c, dtype=float)
+        lp.col_lower_ = numpy.where(numpy.isinf(lb), -inf, lb)
+        lp.col_upper_ = numpy.where(numpy.isinf(ub), inf, ub)
+        lp.row_lower_ = numpy.concatenate([b_eq, numpy.full(len(b_ub), -inf)])
+        lp.row_upper_ = numpy.concatenate([b_eq, b_ub])
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+        highs = highspy.Highs()
+        highs.setOptionValue('output_flag', False)
+        options, ignored = self.get_options()
+        if self.time_limit is not None:
+            options['time_limit'] = float(self.time_limit)
+        for name, value in options.items():
+            highs.setOptionValue(name, value)
+        highs.passModel(lp)
+        start = time.perf_counter()
+        highs.run()
+        seconds = time.perf_counter() - start
+
+        status = highs.getModelStatus()
+        termination = {
+            highspy.HighsModelStatus.kOptimal: 'optimal',
+            highspy.HighsModelStatus.kInfeasible: 'infeasible',
+            highspy.HighsModelStatus.kUnbounded: 'unbounded',
+            highspy.HighsModelStatus.kUnboundedOrInfeasible: 'infeasibleOrUnbounded',
+            highspy.HighsModelStatus.kTimeLimit: 'maxTimeLimit',
+            highspy.HighsModelStatus.kIterationLimit: 'maxIterations',
+        }.get(status, 'error')
+        info = highs.getInfo()
+        result = PyMorelSolverResult(self.name, termination,
+                                     objective=info.objective_function_value if termination == 'optimal' else None,
+                                     seconds=seconds, solver_seconds=highs.getRunTime(),
+                                     iterations=info.simplex_iteration_count + max(0, info.ipm_iteration_count),
+                                     message=highs.modelStatusToString(status), ignored=ignored)
+        if termination == 'optimal':
+            solution = highs.getSolution()
+            row_dual = numpy.array(solution.row_dual)
+            result.x = numpy.array(solution.col_value)
+            result.dual_eq = row_dual[:len(b_eq)]
+            result.dual_ub = row_dual[len(b_eq):]
+            result.reduced_cost = numpy.array(solution.col_dual)
+        return highs, result
+
+
+def get_solver(solver: object, default: str) -> object:
+    """Return PyMorelSolver from PyMorelSolver, solver name or None (default solver name)."""
+    if isinstance(solver, PyMorelSolver):
+        return solver
+    return PyMorelSolver(solver or default)
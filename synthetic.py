@@ -0,0 +1,101 @@
+import numpy
+
+from inputfiles import get_typed, TABLES
+
+
+class PyMorelSyntheticData():
+    """Generate valid PyMorel input data of configurable size, for benchmarks and scaling tests.
+
+    Each region has assets of every role: primary production on a random wind profile or the common
+    solar profile, transformation from a yearly traded fuel into one hourly carrier each, storage of
+    electricity and transmission lines of electricity to the following regions (dest). Final
+    consumption of every hourly carrier follows a daily profile per carrier."""
+
+    def __init__(self, regions: int = 3, prim: int = 2, tfrm: int = 2, stor: int = 1, trms: int = 1,
+                 carriers: int = 2, weeks: int = 1, hours: int = 24, seed: int = 0):
+        self.rng = numpy.random.default_rng(seed)
+        self.regions = ['r' + str(r).zfill(len(str(regions))) for r in range(regions)]
+        # First carrier is electricity, which is stored and transmitted, the fuel is traded yearly
+        self.carriers = ['elec'] + ['c' + str(c).zfill(2) for c in range(1, carriers)]
+        self.weeks = ['w' + str(w).zfill(2) for w in range(1, weeks + 1)]
+        self.hours = ['h' + str(h).zfill(3) for h in range(1, hours + 1)]
+        # Every region needs a transformation asset per carrier to meet its final consumption
+        self.counts = {'prim': prim, 'tfrm': max(tfrm, carriers), 'stor': stor,
+                       'trms': min(trms, regions - 1)}
+        self.data = {}
+        self.set_regions_carriers()
+        self.set_assets()
+        self.set_time()
+
+    def set_regions_carriers(self):
+        """Set region, energy carrier and final consumption tables."""
+        self.data['r_data'] = {'rgio': list(self.regions)}
+        self.data['e_data'] = {'ener': self.carriers + ['fuel'],
+                               'tfrq': ['hour'] * len(self.carriers) + ['year']}
+        self.data['er_data'] = {
+            'ener': [e for e in self.carriers for r in self.regions],
+            'rgio': [r for e in self.carriers for r in self.regions],
+            'lFin': self.rng.uniform(50, 150, len(self.carriers) * len(self.regions)).round(1).tolist(),
+            'vFin': ['fin_' + e for e in self.carriers for r in self.regions],
+        }
+
+    def set_assets(self):
+        """Set asset, asset/energy carrier and asset/year tables for all roles in all regions."""
+        a = {column: [] for column in TABLES['a_data']}
+        ae = {'asst': [], 'ener': [], 'effi': []}
+        ay = {'asst': [], 'year': [], 'iniC': [], 'maxC': []}
+
+        def add(asst, role, rgio, dest, cstV, vAva, effi, iniC, maxC):
+            for column, value in zip(['asst','role','rgio','dest','cstC','cstF','cstV','ratSV','ratDV','vAva'],
+                                     [asst, role, rgio, dest, 1.0, 1000.0, cstV, 0.0, 0.0, vAva]):
+                a[column].append(value)
+            for ener, value in effi.items():
+                ae['asst'].append(asst)
+                ae['ener'].append(ener)
+                ae['effi'].append(value)
+            for column, value in zip(['asst','year','iniC','maxC'], [asst, 'y2020', iniC, maxC]):
+                ay[column].append(value)
+
+        for i, r in enumerate(self.regions):
+            for k in range(self.counts['prim']):
+                vAva = 'wind_' + r if k % 2 == 0 else 'solar'
+                add('prim' + str(k) + '_' + r, 'prim', r, '', 0.0, vAva, {'elec': 1.0},
+                    round(self.rng.uniform(20, 100)), 0.0)
+            for k in range(self.counts['tfrm']):
+                # Investable with uniform availability, so that final consumption can always be met
+                ener = self.carriers[k % len(self.carriers)]
+                add('tfrm' + str(k) + '_' + r, 'tfrm', r, '', round(self.rng.uniform(10, 50)), 'uniform',
+                    {'fuel': -1.0, ener: round(self.rng.uniform(0.35, 0.9), 2)}, 50.0, 1000.0)
+            for k in range(self.counts['stor']):
+                add('stor' + str(k) + '_' + r, 'stor', r, '', 0.5, 'uniform', {'elec': 1.0}, 20.0, 0.0)
+            for k in range(self.counts['trms']):
+                dest = self.regions[(i + k + 1) % len(self.regions)]
+                add('trms' + str(k) + '_' + r, 'trms', r, dest, 0.1, 'uniform', {'elec': 0.98}, 100.0, 0.0)
+
+        self.data['a_data'] = a
+        self.data['ae_data'] = ae
+        self.data['ay_data'] = ay
+
+    def set_time(self):
+        """Set week, hour and hourly profile tables."""
+        nw, nh = len(self.weeks), len(self.hours)
+        self.data['w_data'] = {'week': list(self.weeks)}
+        self.data['h_data'] = {'hour': list(self.hours)}
+        wh = {'week': [w for w in self.weeks for h in self.hours],
+              'hour': [h for w in self.weeks for h in self.hours],
+              'uniform': [1.0] * (nw * nh)}
+        # Hour of day of each time slice, with hours spread evenly over the days of the week
+        day = (numpy.tile(numpy.arange(nh), nw) * 24 * 7 / nh) % 24
+        wh['solar'] = numpy.maximum(0, numpy.sin((day - 6) / 12 * numpy.pi)).round(3).tolist()
+        for r in self.regions:
+            # Wind as random walk between 0 and 1
+            wind = numpy.clip(0.5 + numpy.cumsum(self.rng.normal(0, 0.1, nw * nh)), 0, 1)
+            wh['wind_' + r] = wind.round(3).tolist()
+        for k, e in enumerate(self.carriers):
+            fin = 1 + 0.3 * numpy.sin((day - 12 + 3 * k) / 12 * numpy.pi) + self.rng.normal(0, 0.05, nw * nh)
+            wh['fin_' + e] = numpy.maximum(0, fin).round(3).tolist()
+        self.data['wh_data'] = wh
+
+    def get_tables(self) -> dict:
+        """Return input tables as typed dataframes, e.g. for inputfiles.write_dir()."""
+        return {table: get_typed(table, self.data[table]) for table in TABLES}
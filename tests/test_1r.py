@@ -2,6 +2,7 @@ import unittest
 
 from inputdata import PyMorelInputData
 from output import PyMorelOutput
+from matrixmodel import PyMorelMatrixModel
 from model import PyMorelModel
 
 # INTRODUCTION
@@ -89,6 +90,20 @@ def run_with_dict(d):
     return PyMorelOutput(pymorel_model)
 
 
+def run_matrix_with_dict(d):
+    """Run PyMorel matrix backend with inputdata dict d, return PyMorelOutput."""
+    pymorel_model = PyMorelMatrixModel(load_dict(d))
+    pymorel_model.solve()
+    return PyMorelOutput(pymorel_model)
+
+
+def load_dict(d, cache=None):
+    """Return PyMorelInputData loaded with inputdata dict d."""
+    pymorel_inputdata = PyMorelInputData(cache)
+    pymorel_inputdata.load_data_from_dict(d)
+    return pymorel_inputdata
+
+
 class Test1Region1Energy1asset(unittest.TestCase):
 
     def test_1r1e1a1w4h(self):
@@ -0,0 +1,76 @@
+import copy
+import tempfile
+import unittest
+
+from cache import PyMorelCache
+from inputdata import PyMorelInputData
+from matrixmodel import PyMorelMatrixModel
+from tests.test_1r import I_1r2e2a1w4h, load_dict
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = PyMorelCache(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeated_run(self):
+        """Second run with unchanged input reuses all preprocessing stages."""
+        first = load_dict(I_1r2e2a1w4h, self.cache)
+        self.assertEqual(self.cache.stats['hits'], 0)
+        second = load_dict(I_1r2e2a1w4h, self.cache)
+        self.assertEqual(self.cache.stats['hits'], 4)
+        self.assertFalse(hasattr(second, 'a'))          # Dataframes are not set
+        self.assertEqual((second.years, second.year), (first.years, first.year))
+        self.assertEqual(second.validation.errors, [])
+        reference = load_dict(I_1r2e2a1w4h)
+        for data in [first, second]:
+            self.assertEqual(data.subsets, reference.subsets)
+            self.assertEqual(data.index_er, reference.index_er)
+            self.assertEqual(data.para_h, reference.para_h)
+            self.assertEqual(data.para_y, reference.para_y)
+
+    def test_changed_table(self):
+        """Changing er_data only recomputes validation and the hourly parameters."""
+        load_dict(I_1r2e2a1w4h, self.cache)
+        changed = copy.deepcopy(I_1r2e2a1w4h)
+        changed['er_data']['lFin'] = [2, 1]
+        data = load_dict(changed, self.cache)
+        self.assertEqual(self.cache.stats, {'hits': 2, 'misses': 6, 'evictions': 0})
+        self.assertEqual(data.para_h, load_dict(changed).para_h)
+
+    def test_year(self):
+        """Yearly parameters and matrices are cached by year."""
+        data = copy.deepcopy(I_1r2e2a1w4h)
+        ay = data['ay_data']
+        data['ay_data'] = {'asst': ay['asst'] * 2, 'year': ['y2020'] * 2 + ['y2030'] * 2,
+                           'iniC': ay['iniC'] * 2, 'maxC': ay['maxC'] + [20, 30]}
+        for year in ['y2020', 'y2030']:
+            cached = PyMorelInputData(self.cache, year=year)
+            cached.load_data_from_dict(data)
+            reference = PyMorelInputData(year=year)
+            reference.load_data_from_dict(data)
+            self.assertEqual(cached.para_y, reference.para_y)
+            matrix = PyMorelMatrixModel(cached, self.cache)
+            self.assertTrue((matrix.ub == PyMorelMatrixModel(reference).ub).all())
+
+    def test_matrix_model(self):
+        """Matrix model reuses its cached matrices."""
+        data = load_dict(I_1r2e2a1w4h)
+        first = PyMorelMatrixModel(data, self.cache)
+        second = PyMorelMatrixModel(data, self.cache)
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual((first.A_eq != second.A_eq).nnz, 0)
+        self.assertTrue((first.b_eq == second.b_eq).all())
+
+    def test_eviction(self):
+        """Least recently used artifacts are evicted above max_bytes."""
+        self.cache.max_bytes = 1
+        load_dict(I_1r2e2a1w4h, self.cache)
+        self.assertGreater(self.cache.stats['evictions'], 0)
@@ -0,0 +1,44 @@
+import unittest
+
+from pyomo.environ import SolverFactory, value
+
+from inputdata import PyMorelInputData
+from matrixmodel import PyMorelMatrixModel
+from model import PyMorelModel
+from synthetic import PyMorelSyntheticData
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+def load_synthetic(**kwargs):
+    """Return PyMorelInputData loaded with a synthetic system."""
+    pymorel_inputdata = PyMorelInputData()
+    pymorel_inputdata.load_data_from_dict(PyMorelSyntheticData(**kwargs).data)
+    return pymorel_inputdata
+
+
+class TestCapacityLimits(unittest.TestCase):
+
+    def test_bounds_and_constraints(self):
+        """Exogenous capacity limits are variable bounds, only assets with investment get constraints."""
+        pymorel_inputdata = load_synthetic(regions=2, weeks=1, hours=4)
+        m = PyMorelModel(pymorel_inputdata).model
+        ava = pymorel_inputdata.para_h['ava_Sh'].get_row(('stor0_r0',))
+        self.assertEqual([m.Sh['stor0_r0','w01',h].ub for h in m.H], (20 * ava).tolist())
+        self.assertEqual([m.Vh['stor0_r0','w01',h].ub for h in m.H], (20 * ava).tolist())
+        self.assertEqual(len(m.Q_capacity_Sh), 0)
+        # Transformation assets can be invested in, so their limits are constraints with C bounded by max_C
+        self.assertEqual(len(m.Q_capacity_Th), len(m.ATH) * 4)
+        self.assertIsNone(m.Th['tfrm0_r0','w01','h001'].ub)
+        self.assertEqual(m.C['tfrm0_r0'].ub, 1000)
+
+    @unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+    def test_matrix_model(self):
+        """Pyomo model with capacity limits has the objective of the matrix model."""
+        pymorel_inputdata = load_synthetic(regions=3, weeks=1, hours=24)
+        pymorel_model = PyMorelModel(pymorel_inputdata)
+        pymorel_model.solve('appsi_highs')
+        matrix_model = PyMorelMatrixModel(pymorel_inputdata)
+        matrix_model.solve()
+        self.assertAlmostEqual(value(pymorel_model.model.obj) / matrix_model.solver_result.objective, 1)
@@ -0,0 +1,50 @@
+import copy
+import unittest
+
+from pyomo.environ import SolverFactory, value
+
+from decomposition import PyMorelDecomposition
+from inputdata import PyMorelInputData
+from matrixmodel import PyMorelMatrixModel
+from output import PyMorelOutput
+from model import PyMorelModel
+from synthetic import PyMorelSyntheticData
+from tests.test_timeslices import I_1r2e2a4w4h
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+@unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+class TestDecomposition(unittest.TestCase):
+
+    def test_decomposition(self):
+        """Week-decomposed solve gives the objective and balances of the full model."""
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(I_1r2e2a4w4h)
+        pymorel_model = PyMorelModel(pymorel_inputdata)
+        pymorel_model.solve('appsi_highs')
+        full = PyMorelOutput(pymorel_model).balance_h
+
+        decomposition = PyMorelDecomposition(I_1r2e2a4w4h, workers=2, solver='appsi_highs')
+        decomposition.solve()
+        self.assertAlmostEqual(decomposition.objective, value(pymorel_model.model.obj))
+        for index in full.index:
+            self.assertAlmostEqual(decomposition.balance_h.loc[index,'engy'], full.loc[index,'engy'])
+
+    def test_capacity_needed(self):
+        """Decomposition converges when the first capacities of the master problem leave demand unserved."""
+        data = copy.deepcopy(PyMorelSyntheticData(regions=2, weeks=2, hours=4).data)
+        ay = data['ay_data']
+        for i, a in enumerate(ay['asst']):
+            if a.startswith('tfrm'):
+                ay['iniC'][i], ay['maxC'][i] = 0, 1e4
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(data)
+        matrix_model = PyMorelMatrixModel(pymorel_inputdata)
+        matrix_model.solve()
+
+        decomposition = PyMorelDecomposition(data, workers=2, solver='appsi_highs')
+        decomposition.solve()
+        self.assertAlmostEqual(decomposition.objective / matrix_model.solver_result.objective, 1, places=5)
+        self.assertAlmostEqual(decomposition.unserved, 0)
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+import inputfiles
+from inputdata import PyMorelInputData
+from synthetic import PyMorelSyntheticData
+from tests.test_1r import I_1r2e2a1w4h, load_dict
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestInputDataIndex(unittest.TestCase):
+
+    def test_index_er(self):
+        """(ener,rgio) -> assets index holds exactly the links of the *_er subsets."""
+        data = load_dict(I_1r2e2a1w4h)
+        index_er = data.index_er
+        self.assertEqual(index_er['APH'], {('elec','dk_0'): ['sopv_dk0']})
+        self.assertEqual(index_er['ATH'], {('elec','dk_0'): ['hpmp_dk0'], ('heat','dk_0'): ['hpmp_dk0']})
+        self.assertEqual(index_er['AXH'], {})
+        self.assertEqual(index_er['AIH'], {})
+        self.assertEqual(index_er['ASH'], {})
+        # Every indexed link must be a member of the corresponding subset
+        for subset, index in index_er.items():
+            for (e,r), assets in index.items():
+                for a in assets:
+                    self.assertIn((e,r,a), data.subsets[subset + '_er'])
+
+
+def has_module(name):
+    """Return True if optional module can be imported."""
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+class TestInputDataFiles(unittest.TestCase):
+
+    def assertSameData(self, data, reference):
+        self.assertEqual(data.sets, reference.sets)
+        self.assertEqual(data.subsets, reference.subsets)
+        self.assertEqual(data.para_h, reference.para_h)
+        self.assertEqual(data.para_y, reference.para_y)
+
+    @unittest.skipUnless(has_module('pyarrow'), 'pyarrow not available')
+    def test_load_data_from_dir(self):
+        """Feather and Parquet directories load to the same data as the dict."""
+        for fmt in ['feather', 'parquet']:
+            with tempfile.TemporaryDirectory() as path:
+                inputfiles.write_dir(I_1r2e2a1w4h, path, fmt)
+                data = PyMorelInputData()
+                data.load_data_from_dir(path)
+                self.assertSameData(data, load_dict(I_1r2e2a1w4h))
+                self.assertEqual(data.a['asst'].dtype.name, 'category')
+
+    @unittest.skipUnless(has_module('pyarrow') and has_module('openpyxl'), 'pyarrow or openpyxl not available')
+    def test_convert_xls(self):
+        """Excel workbook converts to a Feather directory and both load to the same data as the dict."""
+        with tempfile.TemporaryDirectory() as path:
+            xls_file_name = os.path.join(path, 'input.xlsx')
+            inputfiles.write_xls(I_1r2e2a1w4h, xls_file_name)
+            data = PyMorelInputData()
+            data.load_data_from_xls(xls_file_name)
+            self.assertSameData(data, load_dict(I_1r2e2a1w4h))
+            inputfiles.convert(xls_file_name, os.path.join(path, 'input'))
+            data = PyMorelInputData()
+            data.load_data_from_dir(os.path.join(path, 'input'))
+            self.assertSameData(data, load_dict(I_1r2e2a1w4h))
+
+
+class TestInputDataArrays(unittest.TestCase):
+
+    def test_para_array(self):
+        """Hourly parameters are arrays by (key, week x hour) that read as dicts without zero entries."""
+        data = load_dict(I_1r2e2a1w4h)
+        ava_Ph = data.para_h['ava_Ph']
+        self.assertEqual(ava_Ph.array.shape, (1, 4))
+        self.assertEqual(dict(ava_Ph), {('sopv_dk0','w001','h009'): 0.9, ('sopv_dk0','w001','h015'): 1.0})
+        self.assertEqual(ava_Ph.get_row(('sopv_dk0',)).tolist(), [0, 0.9, 1, 0])
+        self.assertNotIn(('sopv_dk0','w001','h003'), ava_Ph)
+        self.assertEqual(data.para_h['wgt_h'][('w001','h003')], 365.25*24/4)
+
+    def test_shared_arrays(self):
+        """Parameters that are equal by definition share one array instead of holding copies."""
+        data = load_dict(PyMorelSyntheticData(regions=2, weeks=1, hours=4).data)
+        self.assertIs(data.para_h['ava_Ih'].array, data.para_h['ava_Xh'].array)
+        self.assertIs(data.para_h['ava_Vh'].array, data.para_h['ava_Sh'].array)
+        self.assertEqual(data.para_h['ava_Dh'], data.para_h['ava_Sh'])
+        self.assertEqual(len(data.para_h['ava_Sh']), 2*4)
@@ -0,0 +1,29 @@
+import unittest
+
+from tests.test_1r import I_1r1e1a1w4h, I_1r2e2a1w4h, run_matrix_with_dict
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestMatrixModel(unittest.TestCase):
+
+    def test_1r1e1a1w4h(self):
+        """Matrix backend: 1 Region, 1 Energy Carrier, 1 Asset, 1 Week, 4 hours."""
+        bal_h = run_matrix_with_dict(I_1r1e1a1w4h).balance_h
+        fcon = bal_h.query("rgio == 'dk_0' and ener == 'elec' and role == 'fcon'").engy.sum()
+        self.assertEqual(fcon,-365.25*24)
+        prim = bal_h.query("rgio == 'dk_0' and ener == 'elec' and role == 'prim'").engy.sum()
+        self.assertAlmostEqual(prim,-fcon)
+
+    def test_1r2e2a1w4h(self):
+        """Matrix backend: 1 Region, 2 Energy Carriers, 2 Assets, 1 Week, 4 hours."""
+        bal_h = run_matrix_with_dict(I_1r2e2a1w4h).balance_h
+        fcon_e = bal_h.query("rgio == 'dk_0' and ener == 'elec' and role == 'fcon'").engy.sum()
+        self.assertEqual(fcon_e,-365.25*24)
+        tfrm_h = bal_h.query("rgio == 'dk_0' and ener == 'heat' and role == 'tfrm'").engy.sum()
+        self.assertAlmostEqual(tfrm_h,365.25*24)
+        tfrm_e = bal_h.query("rgio == 'dk_0' and ener == 'elec' and role == 'tfrm'").engy.sum()
+        self.assertAlmostEqual(tfrm_e,-tfrm_h/3)
+        prim = bal_h.query("rgio == 'dk_0' and ener == 'elec' and role == 'prim'").engy.sum()
+        self.assertAlmostEqual(prim,-fcon_e-tfrm_e)
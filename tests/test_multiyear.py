@@ -0,0 +1,60 @@
+import unittest
+
+import numpy
+
+from inputdata import PyMorelInputData
+from matrixmodel import PyMorelMatrixModel
+from multiyear import PyMorelMultiYear
+from synthetic import PyMorelSyntheticData
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+def get_years(data: dict, years: list, iniC: list) -> dict:
+    """Return inputdata dict with ay_data repeated for years, with iniC scaled by the factor of each year."""
+    ay = data['ay_data']
+    data = dict(data)
+    data['ay_data'] = {
+        'asst': ay['asst'] * len(years),
+        'year': [year for year in years for a in ay['asst']],
+        'iniC': [scale * value for scale in iniC for value in ay['iniC']],
+        'maxC': ay['maxC'] * len(years),
+    }
+    return data
+
+
+class TestMultiYear(unittest.TestCase):
+
+    def test_year(self):
+        """Yearly parameters are those of the requested year, the sets are the same in all years."""
+        data = get_years(PyMorelSyntheticData(regions=2, weeks=1, hours=4).data, ['y2020','y2030'], [1, 0.5])
+        first, second = PyMorelInputData(), PyMorelInputData(year='y2030')
+        first.load_data_from_dict(data)
+        second.load_data_from_dict(data)
+        self.assertEqual(first.years, ['y2020','y2030'])
+        self.assertEqual(first.sets, second.sets)
+        self.assertEqual(second.para_y['ini_S'][('stor0_r0',)], first.para_y['ini_S'][('stor0_r0',)] / 2)
+        self.assertRaises(ValueError, PyMorelInputData(year='y2050').load_data_from_dict, data)
+
+    def test_multiyear(self):
+        """Identical years need the additions of a single year once, and the operational cost every year."""
+        data = PyMorelSyntheticData(regions=3, weeks=1, hours=24).data
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(data)
+        single = PyMorelMatrixModel(pymorel_inputdata)
+        single.solve()
+        C = single.get_levels('C')
+        capex = C @ single.c[:len(C)]
+
+        multiyear = PyMorelMultiYear(get_years(data, ['y2020','y2030','y2040'], [1, 1, 1]))
+        multiyear.solve()
+        self.assertTrue(multiyear.solver_result.is_optimal())
+        self.assertAlmostEqual(multiyear.solver_result.objective / (3*single.solver_result.objective - 2*capex), 1)
+        additions = multiyear.get_capacities()
+        numpy.testing.assert_allclose([additions[(a,'y2020')] for a in single.var_sets['C']], C, atol=1e-6)
+        numpy.testing.assert_allclose(multiyear.get_year('y2040').get_levels('C'), C, atol=1e-6)
+        # The template is built once, the other years only substitute their bounds and capacity limits
+        stages = [record['stage'] for record in multiyear.profiler.stages]
+        self.assertEqual(stages.count('multiyear/template/matrix'), 1)
+        self.assertEqual(stages.count('multiyear/year'), 3)
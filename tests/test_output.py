@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+import pandas
+from pyomo.environ import SolverFactory
+
+from inputdata import PyMorelInputData
+from output import PyMorelOutput
+from matrixmodel import PyMorelMatrixModel
+from model import PyMorelModel
+from synthetic import PyMorelSyntheticData
+from tests.test_inputdata import has_module
+from tests.test_timeslices import I_1r2e2a4w4h
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestOutputExport(unittest.TestCase):
+
+    @unittest.skipUnless(has_module('pyarrow'), 'pyarrow not available')
+    def test_export_parquet(self):
+        """Chunked Parquet export writes all hourly activity and gives the balances of the in-memory output."""
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(I_1r2e2a4w4h)
+        pymorel_model = PyMorelMatrixModel(pymorel_inputdata)
+        pymorel_model.solve()
+        full = PyMorelOutput(pymorel_model, read=True)
+        streamed = PyMorelOutput(pymorel_model)
+        self.assertNotIn('activity_h', vars(streamed))
+        with tempfile.TemporaryDirectory() as path:
+            streamed.export_parquet(path, partition_cols=['week'], chunk_rows=4)
+            self.assertEqual(sorted(os.listdir(os.path.join(path, 'activity_h'))),
+                             ['week=' + week for week in I_1r2e2a4w4h['w_data']['week']])
+            streamed.export_parquet(path, partition_cols=['week'], chunk_rows=4)    # Replaces the first export
+            activity_h = pandas.read_parquet(os.path.join(path, 'activity_h'))
+            balance_h = pandas.read_parquet(os.path.join(path, 'balance_h.parquet'))
+        self.assertEqual(len(activity_h), len(full.activity_h))
+        self.assertAlmostEqual(activity_h['engy'].sum(), full.activity_h['engy'].sum())
+        for index in full.balance_h.index:
+            self.assertAlmostEqual(streamed.balance_h.loc[index,'engy'], full.balance_h.loc[index,'engy'])
+        self.assertAlmostEqual(balance_h['engy'].sum(), full.balance_h['engy'].sum())
+
+
+class TestOutputLazy(unittest.TestCase):
+
+    def setUp(self):
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(I_1r2e2a4w4h)
+        self.pymorel_model = PyMorelMatrixModel(pymorel_inputdata)
+        self.pymorel_model.solve()
+        self.full = PyMorelOutput(self.pymorel_model, read=True)
+
+    def test_lazy(self):
+        """Tables are computed on first access, balances without reading the hourly activity."""
+        output = PyMorelOutput(self.pymorel_model)
+        self.assertEqual([table for table in output.tables if table in vars(output)], [])
+        pandas.testing.assert_frame_equal(output.balance_h, self.full.balance_h)
+        pandas.testing.assert_frame_equal(output.balance_h_ener, self.full.balance_h_ener)
+        self.assertNotIn('activity_h', vars(output))
+        self.assertIs(output.balance_h, output.balance_h)
+
+    def test_select(self):
+        """Selected output equals the full hourly activity filtered on var, rgio and week."""
+        weeks = I_1r2e2a4w4h['w_data']['week'][1:3]
+        selected = PyMorelOutput(self.pymorel_model).select(variables=['Ph', 'Fh'], weeks=weeks)
+        activity_h = self.full.activity_h
+        expected = activity_h[activity_h['var'].isin(['Ph', 'Fh']) & activity_h['week'].isin(weeks)]
+        self.assertEqual(len(selected.activity_h), len(expected))
+        self.assertAlmostEqual(selected.activity_h['engy'].sum(), expected['engy'].sum())
+        self.assertAlmostEqual(selected.balance_h['engy'].sum(), expected['engy'].sum())
+        with self.assertRaises(ValueError):
+            self.full.select(regions=['unknown'])
+
+
+    def test_empty_selection(self):
+        """Selections without rows give empty tables with the usual columns and index."""
+        for selection in [{'variables': ['Xh']}, {'weeks': []}, {'regions': []}]:
+            selected = self.full.select(**selection)
+            self.assertEqual(list(selected.activity_h.columns), list(self.full.activity_h.columns))
+            self.assertEqual(len(selected.activity_h), 0)
+            self.assertEqual(selected.balance_h.index.names, ['rgio', 'role', 'ener'])
+            self.assertEqual(len(selected.balance_h), 0)
+            self.assertEqual(selected.balance_h_ener.index.names, ['rgio', 'role'])
+
+
+@unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+class TestOutputPrices(unittest.TestCase):
+
+    def test_prices(self):
+        """Prices from the duals of Q_equilibrium_h and reduced costs of C are the same for both backends."""
+        data = PyMorelSyntheticData(regions=2, weeks=1, hours=4).data
+        data['er_data']['lFin'] = [lFin * 5 for lFin in data['er_data']['lFin']]   # Transformation sets prices
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(data)
+        pymorel_model = PyMorelModel(pymorel_inputdata)
+        pymorel_model.solve('appsi_highs')
+        matrix_model = PyMorelMatrixModel(pymorel_inputdata)
+        matrix_model.solve()
+        prices, matrix_prices = PyMorelOutput(pymorel_model).price_h, PyMorelOutput(matrix_model).price_h
+        self.assertEqual(len(prices), len(pymorel_model.model.Q_equilibrium_h))
+        self.assertTrue((prices['price'] > 0).any())
+        numpy.testing.assert_allclose(prices['price'], matrix_prices['price'], rtol=1e-6, atol=1e-6)
+        numpy.testing.assert_allclose(prices['price'], prices['dual'] / prices['wght'])
+        numpy.testing.assert_allclose(PyMorelOutput(pymorel_model).capacity_rc['rc'],
+                                      PyMorelOutput(matrix_model).capacity_rc['rc'], rtol=1e-6, atol=1e-6)
+        selected = PyMorelOutput(matrix_model, regions=['r1']).price_h
+        pandas.testing.assert_frame_equal(selected, matrix_prices[matrix_prices['rgio'] == 'r1'].reset_index(drop=True))
@@ -0,0 +1,45 @@
+import json
+import os
+import tempfile
+import unittest
+
+from inputdata import PyMorelInputData
+from output import PyMorelOutput
+from matrixmodel import PyMorelMatrixModel
+from model import PyMorelModel
+from profiling import PyMorelProfiler
+from tests.test_1r import I_1r2e2a1w4h
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_stages(self):
+        """Preprocessing, model building, solve and output are recorded as nested stages with counts."""
+        profiler = PyMorelProfiler(cprofile=True)
+        pymorel_inputdata = PyMorelInputData(profiler=profiler)
+        pymorel_inputdata.load_data_from_dict(I_1r2e2a1w4h)
+        pymorel_model = PyMorelMatrixModel(pymorel_inputdata, profiler=profiler)
+        pymorel_model.solve()
+        PyMorelOutput(pymorel_model)
+        stages = {record['stage']: record for record in profiler.report()['stages']}
+        for stage in ['input/sets', 'input/para_h', 'input/para_y', 'input', 'matrix/Q_equilibrium_h',
+                      'matrix', 'solve', 'output']:
+            self.assertIn(stage, stages)
+            self.assertGreaterEqual(stages[stage]['seconds'], 0)
+        self.assertEqual(stages['matrix/Q_equilibrium_h']['counts']['rows'], 2*4)
+        self.assertEqual(json.loads(profiler.to_json())['stages'][0]['stage'], 'input/validate')
+        with tempfile.TemporaryDirectory() as path:
+            profiler.dump_stats(os.path.join(path, 'pymorel.prof'))
+            self.assertTrue(os.path.getsize(os.path.join(path, 'pymorel.prof')) > 0)
+
+    def test_model_counts(self):
+        """Pyomo model stages count the variables and constraints they declare."""
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(I_1r2e2a1w4h)
+        pymorel_model = PyMorelModel(pymorel_inputdata)
+        stages = {record['stage']: record for record in pymorel_model.profiler.report()['stages']}
+        self.assertEqual(stages['model/constraints/Q_equilibrium_h']['counts']['Constraint'], 2*4)
+        self.assertEqual(stages['model']['counts']['Var'], len(pymorel_model.model.C) + 2*4)   # Ph and Th
@@ -0,0 +1,50 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import pandas
+
+import pymorel
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestCommandLine(unittest.TestCase):
+
+    def run_main(self, argv: list) -> int:
+        """Return exit code of pymorel command, with its printed output discarded."""
+        with contextlib.redirect_stdout(io.StringIO()):
+            return pymorel.main(argv)
+
+    def test_validate_lazy(self):
+        """Validation of the example data passes without importing Pyomo."""
+        code = "import sys, pymorel; code = pymorel.main(['validate']); print(code, 'pyomo' in sys.modules)"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.splitlines()[-1], '0 False')
+
+    def test_export(self):
+        """Export solves the example data with the matrix backend and writes the output tables."""
+        with tempfile.TemporaryDirectory() as path:
+            self.assertEqual(self.run_main(['export', '--backend', 'matrix', '--output', path,
+                                            '--tables', 'balance_h', 'price_h']), 0)
+            self.assertEqual(sorted(os.listdir(path)), ['balance_h.csv', 'price_h.csv'])
+            balance_h = pandas.read_csv(os.path.join(path, 'balance_h.csv'))
+        self.assertEqual(list(balance_h.columns), ['rgio', 'role', 'ener', 'engy'])
+
+    def test_scenario(self):
+        """Scenario files are applied to the input before validation."""
+        with tempfile.TemporaryDirectory() as path:
+            scenario = os.path.join(path, 'scenario.json')
+            with open(scenario, 'w') as f:
+                f.write('{"er_data": {"rgio": ["xx0", "de0", "no0", "dk0", "de0", "no0"]}}')
+            self.assertEqual(self.run_main(['validate', '--scenario', scenario]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
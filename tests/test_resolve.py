@@ -0,0 +1,61 @@
+import copy
+import unittest
+
+from pyomo.environ import SolverFactory, value
+
+from output import PyMorelOutput
+from model import PyMorelModel
+from synthetic import PyMorelSyntheticData
+from tests.test_1r import I_1r2e2a1w4h, load_dict
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+@unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+class TestResolve(unittest.TestCase):
+
+    def test_resolve_demand_scenario(self):
+        """Re-solve with doubled demand updates fin_h in place and matches a fresh model."""
+        pymorel_model = PyMorelModel(load_dict(I_1r2e2a1w4h), mutable=True)
+        pymorel_model.resolve()
+        fcon = PyMorelOutput(pymorel_model).balance_h.loc[('dk_0','fcon','elec'),'engy']
+        self.assertEqual(fcon,-365.25*24)
+
+        # Scenario: double the final consumption of all energy carriers
+        scenario = copy.deepcopy(I_1r2e2a1w4h)
+        scenario['er_data']['lFin'] = [2, 2]
+        scenario_data = load_dict(scenario)
+        model_id = id(pymorel_model.model)
+        pymorel_model.resolve(scenario_data)
+        self.assertEqual(id(pymorel_model.model), model_id)
+        fcon = PyMorelOutput(pymorel_model).balance_h.loc[('dk_0','fcon','elec'),'engy']
+        self.assertEqual(fcon,-2*365.25*24)
+
+        # Objective is the same as for a model built from scratch with the scenario data
+        fresh_model = PyMorelModel(scenario_data)
+        fresh_model.resolve()
+        self.assertAlmostEqual(value(pymorel_model.model.obj), value(fresh_model.model.obj))
+        self.assertEqual(len(pymorel_model.timings), 2)
+
+    def test_resolve_availability_scenario(self):
+        """Re-solve with changed availability of assets without capacity investment updates their bounds."""
+        data = PyMorelSyntheticData(regions=2, weeks=1, hours=24).data
+        pymorel_model = PyMorelModel(load_dict(data), mutable=True)
+        pymorel_model.resolve()
+
+        # Scenario: transmission and storage are available by the solar profile
+        scenario = copy.deepcopy(data)
+        scenario['a_data']['vAva'] = ['solar' if role in ['trms','stor'] else ava
+                                      for role, ava in zip(scenario['a_data']['role'], scenario['a_data']['vAva'])]
+        scenario_data = load_dict(scenario)
+        pymorel_model.resolve(scenario_data)
+        fresh_model = PyMorelModel(scenario_data)
+        fresh_model.resolve()
+        self.assertAlmostEqual(value(pymorel_model.model.obj) / value(fresh_model.model.obj), 1)
+        self.assertEqual(pymorel_model.model.Xh['trms0_r0','w01','h001'].ub, 0)
+
+    def test_update_requires_mutable(self):
+        """Parameters of a model declared without mutable=True cannot be updated."""
+        pymorel_model = PyMorelModel(load_dict(I_1r2e2a1w4h))
+        self.assertRaises(ValueError, pymorel_model.update_parameters, load_dict(I_1r2e2a1w4h))
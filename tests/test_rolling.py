@@ -0,0 +1,36 @@
+import unittest
+
+from pyomo.environ import SolverFactory
+
+from inputdata import PyMorelInputData
+from output import PyMorelOutput
+from model import PyMorelModel
+from rolling import PyMorelRolling
+from tests.test_timeslices import I_1r2e2a4w4h
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+@unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+class TestRolling(unittest.TestCase):
+
+    def test_rolling(self):
+        """Rolling horizon with the capacities of the full model gives the balances of the full model."""
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(I_1r2e2a4w4h)
+        pymorel_model = PyMorelModel(pymorel_inputdata)
+        pymorel_model.resolve()
+        full = PyMorelOutput(pymorel_model)
+        capacities = {a: pymorel_model.model.C[a].value for a in pymorel_model.model.AC}
+
+        rolling = PyMorelRolling(I_1r2e2a4w4h, window=3, step=2, capacities=capacities)
+        windows = rolling.solve()
+        self.assertEqual([window['start'] for window in windows], ['w001', 'w003'])
+        # The model is built once and updated for the following windows
+        stages = [record['stage'] for record in rolling.profiler.stages]
+        self.assertEqual(stages.count('window/model'), 1)
+        stitched = PyMorelOutput(rolling)
+        self.assertEqual(len(stitched.activity_h), len(full.activity_h))
+        for index in full.balance_h.index:
+            self.assertAlmostEqual(stitched.balance_h.loc[index,'engy'], full.balance_h.loc[index,'engy'])
@@ -0,0 +1,29 @@
+import unittest
+
+from pyomo.environ import SolverFactory
+
+from scenario import PyMorelScenarios, apply_override
+from tests.test_1r import I_1r1e1a1w4h, I_1r2e2a1w4h
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestScenario(unittest.TestCase):
+
+    def test_apply_override(self):
+        """Overrides scale lFin by region and set maxC by asset on a copy of the data."""
+        data = apply_override(I_1r2e2a1w4h, {'lFin': {'dk_0': 1.5}, 'maxC': {'hpmp_dk0': 10}})
+        self.assertEqual(data['er_data']['lFin'], [1.5, 1.5])
+        self.assertEqual(data['ay_data']['maxC'], [1000, 10])
+        self.assertEqual(I_1r2e2a1w4h['er_data']['lFin'], [1, 1])
+        self.assertRaises(KeyError, apply_override, I_1r2e2a1w4h, {'xFin': {}})
+
+    @unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+    def test_run(self):
+        """Scenarios run in worker processes and stream back balance tables."""
+        overrides = [{'name': 'base'}, {'name': 'double', 'lFin': {'dk_0': 2}}]
+        results = dict(PyMorelScenarios(I_1r1e1a1w4h, workers=2, solver='appsi_highs').run(overrides))
+        self.assertEqual(sorted(results), ['base', 'double'])
+        self.assertEqual(results['base'].loc[('dk_0','fcon','elec'),'engy'], -365.25*24)
+        self.assertEqual(results['double'].loc[('dk_0','fcon','elec'),'engy'], -2*365.25*24)
@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from pyomo.environ import SolverFactory
+
+from server import PyMorelServer
+from tests.test_1r import I_1r2e2a1w4h
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+@unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = PyMorelServer({'base': I_1r2e2a1w4h}, port=0, workers=1, solver='appsi_highs')
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = 'http://127.0.0.1:%d' % cls.server.port
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def request(self, method: str, path: str, body: dict = None) -> tuple:
+        """Return (HTTP status, JSON body) of request."""
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read())
+
+    def run_job(self, job: dict) -> dict:
+        """Submit job and poll until it is finished, return its status."""
+        code, body = self.request('POST', '/jobs', job)
+        self.assertEqual(code, 202)
+        for _ in range(600):
+            code, status = self.request('GET', '/jobs/' + body['id'])
+            if status['status'] not in ['queued', 'running']:
+                return status
+            time.sleep(0.1)
+        self.fail('Job did not finish')
+
+    def test_jobs(self):
+        """Scenarios run on the warm model of the worker and return balances and prices."""
+        base = self.run_job({'outputs': ['balance_h', 'price_h']})
+        self.assertEqual(base['status'], 'done')
+        double = self.run_job({'override': {'lFin': {'dk_0': 2}}})
+        self.assertTrue(double['result']['warm'])
+        again = self.run_job({})
+        self.assertTrue(again['result']['warm'])
+        fcon = lambda status: dict(zip(zip(*[status['result']['balance_h'][c] for c in ['rgio','role','ener']]),
+                                       status['result']['balance_h']['engy']))[('dk_0','fcon','elec')]
+        self.assertAlmostEqual(fcon(double), 2 * fcon(base))
+        self.assertAlmostEqual(fcon(again), fcon(base))
+        self.assertEqual(len(base['result']['price_h']['price']), 2 * 4)
+
+    def test_errors(self):
+        """Unknown datasets, paths, output tables and bodies that are not objects are rejected."""
+        self.assertEqual(self.request('POST', '/jobs', {'dataset': 'unknown'})[0], 400)
+        self.assertEqual(self.request('GET', '/jobs/unknown')[0], 404)
+        self.assertEqual(self.request('POST', '/jobs', {'outputs': ['unknown']})[0], 400)
+        self.assertEqual(self.request('POST', '/jobs', ['balance_h'])[0], 400)
+        self.assertEqual(self.request('GET', '/status')[1]['datasets'], ['base'])
+
+    def test_evict(self):
+        """Finished jobs are dropped after job_ttl seconds."""
+        job_id = self.run_job({})['id']
+        self.server.job_ttl = 0
+        try:
+            time.sleep(0.01)
+            self.server.evict()
+        finally:
+            self.server.job_ttl = 3600
+        self.assertEqual(self.request('GET', '/jobs/' + job_id)[0], 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy
+from pyomo.environ import ConcreteModel, Constraint, NonNegativeReals, Objective, SolverFactory, Var, value
+
+from matrixmodel import PyMorelMatrixModel
+from model import PyMorelModel
+from solver import PyMorelSolver
+from synthetic import PyMorelSyntheticData
+from tests.test_1r import I_1r2e2a1w4h, load_dict
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestSolver(unittest.TestCase):
+
+    def test_options(self):
+        """Generic settings map to the option names of each solver, unsupported settings are ignored."""
+        solver = PyMorelSolver('appsi_highs', threads=2, method='barrier', crossover=False, tolerance=1e-7)
+        self.assertEqual(solver.get_options(), ({'threads': 2, 'primal_feasibility_tolerance': 1e-7,
+                                                 'dual_feasibility_tolerance': 1e-7, 'solver': 'ipm',
+                                                 'run_crossover': 'off'}, []))
+        self.assertEqual(PyMorelSolver('gurobi_persistent', threads=4, method='simplex').get_options(),
+                         ({'Threads': 4, 'Method': 1}, []))
+        self.assertEqual(PyMorelSolver('glpk', threads=2, method='barrier').get_options(),
+                         ({'interior': None}, ['threads']))
+        self.assertRaises(ValueError, PyMorelSolver, 'nosolver')
+        self.assertRaises(ValueError, PyMorelSolver, 'glpk', method='network')
+
+    def test_matrix_solvers(self):
+        """HiGHS through scipy and in memory through highspy give the same objective and prices."""
+        pymorel_inputdata = load_dict(PyMorelSyntheticData(regions=3, weeks=1, hours=24).data)
+        results = []
+        for solver in [PyMorelSolver('scipy', method='simplex'),
+                       PyMorelSolver('highs', threads=1, method='barrier', crossover=True)]:
+            if not solver.available(matrix=True):
+                continue
+            pymorel_model = PyMorelMatrixModel(pymorel_inputdata)
+            pymorel_model.solve(solver)
+            self.assertTrue(pymorel_model.solver_result.is_optimal())
+            results.append(pymorel_model.solver_result)
+        for result in results[1:]:
+            self.assertAlmostEqual(result.objective / results[0].objective, 1)
+            numpy.testing.assert_allclose(result.dual_eq, results[0].dual_eq, rtol=1e-6, atol=1e-6)
+
+    @unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+    def test_pyomo_solver(self):
+        """PyMorelModel.solve() takes a solver configuration and records a structured result."""
+        pymorel_model = PyMorelModel(load_dict(I_1r2e2a1w4h))
+        pymorel_model.solve(PyMorelSolver('appsi_highs', threads=1, time_limit=60))
+        result = pymorel_model.solver_result
+        self.assertTrue(result.is_optimal())
+        self.assertAlmostEqual(result.objective, value(pymorel_model.model.obj))
+        self.assertEqual(result.to_dict()['termination'], 'optimal')
+
+    @unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+    def test_infeasible(self):
+        """An infeasible model gives a result that is not optimal instead of an exception."""
+        m = ConcreteModel()
+        m.x = Var(within=NonNegativeReals)
+        m.obj = Objective(expr=m.x)
+        m.Q = Constraint(expr=m.x <= -1)
+        results, result = PyMorelSolver('appsi_highs').solve_pyomo(m)
+        self.assertFalse(result.is_optimal())
+        self.assertEqual(result.termination, 'infeasible')
+        self.assertIsNone(result.objective)
@@ -0,0 +1,37 @@
+import unittest
+
+from inputdata import PyMorelInputData
+from matrixmodel import PyMorelMatrixModel
+from model import PyMorelModel
+from synthetic import PyMorelSyntheticData
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestSyntheticData(unittest.TestCase):
+
+    def test_sizes(self):
+        """Generated system has the requested regions, assets per role, carriers and time slices."""
+        synthetic = PyMorelSyntheticData(regions=4, prim=3, tfrm=2, stor=1, trms=2, carriers=3, weeks=2, hours=12)
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(synthetic.data)
+        subsets = pymorel_inputdata.subsets
+        self.assertEqual(len(pymorel_inputdata.sets['R']), 4)
+        self.assertEqual(len(subsets['AP']), 4*3)
+        self.assertEqual(len(subsets['AT']), 4*3)    # At least one transformation asset per carrier
+        self.assertEqual(len(subsets['AS']), 4*1)
+        self.assertEqual(len(subsets['AX']), 4*2)
+        self.assertEqual(subsets['EH'], ['elec', 'c01', 'c02'])
+        self.assertEqual(len(pymorel_inputdata.para_h['wgt_h']), 2*12)
+        self.assertEqual(set(synthetic.get_tables()), set(synthetic.data))
+
+    def test_solve(self):
+        """Generated system solves, also with assets that cannot be invested in."""
+        pymorel_inputdata = PyMorelInputData()
+        pymorel_inputdata.load_data_from_dict(PyMorelSyntheticData(regions=3, weeks=1, hours=24).data)
+        pymorel_model = PyMorelMatrixModel(pymorel_inputdata)
+        pymorel_model.solve()
+        self.assertEqual(pymorel_model.results.status, 0)
+        # Capital costs are summed over the investable assets AC only
+        self.assertLess(len(PyMorelModel(pymorel_inputdata).model.C), len(pymorel_inputdata.sets['A']))
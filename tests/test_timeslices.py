@@ -0,0 +1,44 @@
+import copy
+import unittest
+
+from timeslices import PyMorelTimeSlices
+from tests.test_1r import I_1r2e2a1w4h, run_matrix_with_dict
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+# 4 weeks of 4 hours, demand profile varying by week
+I_1r2e2a4w4h = copy.deepcopy(I_1r2e2a1w4h)
+I_1r2e2a4w4h['w_data'] = {'week': ['w001','w002','w003','w004']}
+I_1r2e2a4w4h['wh_data'] = {
+    'week':     ['w001']*4 + ['w002']*4 + ['w003']*4 + ['w004']*4,
+    'hour':     ['h003','h009','h015','h021']*4,
+    'uniform':  [1]*16,
+    'sol_DK':   [0, 0.9, 1, 0]*4,
+    'varElec':  [0.5, 0.8, 1, 0.6, 0.6, 0.9, 1, 0.7, 1.5, 1.8, 2, 1.6, 1.4, 1.9, 2, 1.6],
+}
+I_1r2e2a4w4h['er_data']['vFin'] = ['varElec', 'uniform']
+
+
+class TestTimeSlices(unittest.TestCase):
+
+    def test_aggregate(self):
+        """Aggregated time slices keep the hours of the year and the yearly final consumption."""
+        full = run_matrix_with_dict(I_1r2e2a4w4h).balance_h
+        time_slices = PyMorelTimeSlices(I_1r2e2a4w4h)
+        for n, method, period in [(2,'kmeans','week'), (2,'chronological','week'),
+                                  (2,'chronological','hour'), (5,'kmeans','hour')]:
+            data = time_slices.aggregate(n, method, period)
+            self.assertAlmostEqual(sum(data['wh_data']['wght']), 365.25*24)
+            aggregated = run_matrix_with_dict(data).balance_h
+            for role in ['fcon', 'prim']:
+                self.assertAlmostEqual(aggregated.loc[('dk_0',role,'elec'),'engy'],
+                                       full.loc[('dk_0',role,'elec'),'engy'])
+            self.assertAlmostEqual(time_slices.error.loc['varElec','energy'], 0)
+
+    def test_kmedoids_weeks(self):
+        """k-medoids selects actual weeks and clusters the similar ones together."""
+        data = PyMorelTimeSlices(I_1r2e2a4w4h).aggregate(2, 'kmedoids', 'week')
+        self.assertEqual(len(data['w_data']['week']), 2)
+        self.assertTrue(set(data['w_data']['week']) <= set(I_1r2e2a4w4h['w_data']['week']))
+        self.assertEqual(sorted(data['wh_data']['wght']), [8766/8]*8)
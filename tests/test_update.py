@@ -0,0 +1,56 @@
+import copy
+import unittest
+
+from pyomo.environ import SolverFactory, value
+
+from model import PyMorelModel
+from synthetic import PyMorelSyntheticData
+from tests.test_1r import load_dict
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+def remove_asset(d, asst):
+    """Return copy of inputdata dict d without the rows of asset asst."""
+    d = copy.deepcopy(d)
+    for table in ['a_data', 'ae_data', 'ay_data']:
+        keep = [i for i, a in enumerate(d[table]['asst']) if a != asst]
+        d[table] = {column: [values[i] for i in keep] for column, values in d[table].items()}
+    return d
+
+
+class TestUpdateData(unittest.TestCase):
+
+    def test_diff(self):
+        """Diff of input data holds only the changed sets, asset links and parameter entries."""
+        data = PyMorelSyntheticData(regions=3, weeks=1, hours=4).data
+        changed = remove_asset(data, 'stor0_r1')
+        changed['er_data']['lFin'][4] *= 2      # Final consumption of the second carrier in r1
+        diff = load_dict(data).diff(load_dict(changed))
+        self.assertEqual(diff['sets']['AS'], ([], ['stor0_r1']))
+        self.assertEqual(diff['index_er'], {'ASH': [('elec','r1')]})
+        self.assertEqual(set(diff['para_h']), {'fin_h', 'ava_Sh', 'ava_Dh', 'ava_Vh', 'cst_Sh'})
+        self.assertEqual({key[:2] for key in diff['para_h']['fin_h']}, {('c01','r1')})
+
+    @unittest.skipUnless(SolverFactory('appsi_highs').available(exception_flag=False), 'appsi_highs not available')
+    def test_update_data(self):
+        """Applying changed input data to a model in place matches a model built from the changed data."""
+        data = PyMorelSyntheticData(regions=3, weeks=1, hours=24).data
+        changed = remove_asset(data, 'stor0_r1')
+        changed['er_data']['lFin'][4] *= 1.5
+        changed['ae_data']['effi'][5] = 0.5     # Efficiency of tfrm1_r0 into the second carrier
+        for mutable in [False, True]:
+            pymorel_model = PyMorelModel(load_dict(data), mutable=mutable)
+            model_id = id(pymorel_model.model)
+            summary = pymorel_model.update_data(changed)
+            self.assertEqual(id(pymorel_model.model), model_id)
+            self.assertEqual(summary['sets']['AS'], {'added': 0, 'removed': 1})
+            self.assertLess(summary['rows'], len(pymorel_model.model.Q_equilibrium_h))
+            pymorel_model.solve('appsi_highs')
+
+            reference = PyMorelModel(load_dict(changed))
+            reference.solve('appsi_highs')
+            self.assertAlmostEqual(value(pymorel_model.model.obj) / value(reference.model.obj), 1)
+            self.assertEqual(len(pymorel_model.model.Q_equilibrium_h), len(reference.model.Q_equilibrium_h))
+            self.assertEqual(len(pymorel_model.get_levels('Sh')), len(reference.get_levels('Sh')))
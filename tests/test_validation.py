@@ -0,0 +1,54 @@
+import copy
+import unittest
+
+from inputdata import PyMorelInputData
+from inputdatadict import InputDataDict
+from synthetic import PyMorelSyntheticData
+from validation import PyMorelValidation, PyMorelValidationError
+
+# USAGE: Run the tests from a prompt in the base pymorel directory
+#        using the command:> python -m unittest discover
+
+
+class TestValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.data = copy.deepcopy(PyMorelSyntheticData(regions=2, weeks=1, hours=4).data)
+
+    def get_checks(self, data: dict) -> set:
+        """Return (check, table, column) of the errors found in data."""
+        return {(issue['check'], issue['table'], issue['column']) for issue in PyMorelValidation(data).validate().errors}
+
+    def test_valid(self):
+        """Synthetic data and the example dict have no errors."""
+        self.assertEqual(PyMorelValidation(self.data).validate().errors, [])
+        self.assertEqual(PyMorelValidation(InputDataDict().data).validate().errors, [])
+
+    def test_errors(self):
+        """Duplicate keys, unknown regions, bad destinations and missing profiles are reported."""
+        self.data['r_data']['rgio'].append('r0')
+        self.data['er_data']['rgio'][0] = 'r9'
+        self.data['a_data']['vAva'][0] = 'wind_r9'
+        trms = self.data['a_data']['role'].index('trms')
+        self.data['a_data']['dest'][trms] = self.data['a_data']['rgio'][trms]
+        checks = self.get_checks(self.data)
+        self.assertIn(('duplicate', 'r_data', 'rgio'), checks)
+        self.assertIn(('membership', 'er_data', 'rgio'), checks)
+        self.assertIn(('profile', 'a_data', 'vAva'), checks)
+        self.assertIn(('dest', 'a_data', 'dest'), checks)
+
+    def test_missing_column(self):
+        """Missing columns stop validation before the other checks."""
+        del self.data['a_data']['role']
+        self.assertEqual(self.get_checks(self.data), {('missing', 'a_data', None)})
+
+    def test_inputdata(self):
+        """PyMorelInputData raises PyMorelValidationError with the report."""
+        self.data['ae_data']['asst'][0] = 'unknown'
+        with self.assertRaises(PyMorelValidationError) as context:
+            PyMorelInputData().load_data_from_dict(self.data)
+        self.assertEqual(context.exception.report.errors[0]['values'], ['unknown'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import numpy
+import pandas
+
+
+class PyMorelTimeSlices():
+    """Class for aggregating the (week,hour) time slices of PyMorel input data into representative slices.
+
+    The aggregated input data has fewer weeks or hours and a wght column in wh_data with the hours
+    per year each representative slice stands for. PyMorelInputData reads wght into para_h['wgt_h'],
+    which weighs hourly costs in the objective and energy in PyMorelOutput."""
+
+    def __init__(self, data: dict, seed: int = 0):
+        self.data = data                    # Inputdata dict as for PyMorelInputData.load_data_from_dict()
+        self.seed = seed                    # Seed for the initial centres of k-means/k-medoids
+        self.weeks = pandas.DataFrame(data['w_data'])['week'].astype(str).to_list()
+        self.hours = pandas.DataFrame(data['h_data'])['hour'].astype(str).to_list()
+        wh = pandas.DataFrame(data['wh_data'])
+        wh['week'] = wh['week'].astype(str)
+        wh['hour'] = wh['hour'].astype(str)
+        # Profiles as array [week, hour, profile] in the order of w_data and h_data
+        wh = wh.set_index(['week','hour']).reindex(pandas.MultiIndex.from_product([self.weeks, self.hours]))
+        if 'wght' in wh.columns:
+            self.wght = wh.pop('wght').to_numpy().reshape(len(self.weeks), len(self.hours))
+        else:
+            self.wght = numpy.full((len(self.weeks), len(self.hours)), 365.25*24/(len(self.weeks)*len(self.hours)))
+        self.columns = list(wh.columns)
+        self.profiles = wh.to_numpy(dtype=float).reshape(len(self.weeks), len(self.hours), len(self.columns))
+        # Clustering is on the availability and final consumption profiles chosen by assets and regions
+        chosen = set(pandas.DataFrame(data['a_data'])['vAva'].astype(str)) \
+            | set(pandas.DataFrame(data['er_data'])['vFin'].astype(str))
+        self.features = [i for i, column in enumerate(self.columns) if column in chosen] or list(range(len(self.columns)))
+
+    def aggregate(self, n: int, method: str = 'kmeans', period: str = 'week') -> dict:
+        """Return inputdata dict with time slices aggregated to n representatives.
+
+        period='week' selects n representative weeks of all hours. period='hour' selects n representative
+        hours in total, except for method='chronological', which keeps all weeks and averages their hours
+        into n consecutive blocks per week. method is one of 'kmeans', 'kmedoids' or 'chronological'."""
+        if method not in ['kmeans', 'kmedoids', 'chronological']:
+            raise ValueError("Unknown time slice aggregation method: " + method)
+        if period == 'week':
+            points = self.profiles
+        elif period == 'hour' and method != 'chronological':
+            points = self.profiles.reshape(1, -1, len(self.columns)).transpose(1, 0, 2)
+        elif period == 'hour':
+            points = self.profiles.transpose(1, 0, 2)
+        else:
+            raise ValueError("Unknown time slice aggregation period: " + period)
+        weights = self.wght if period == 'week' else self.wght.reshape(points.shape[:2][::-1]).T
+
+        # Each point (a week, or an hour) is assigned to one of n clusters with a representative profile
+        if method == 'chronological':
+            labels = numpy.concatenate([numpy.full(len(block), i)
+                                        for i, block in enumerate(numpy.array_split(numpy.arange(len(points)), n))])
+        else:
+            labels = self.get_clusters(points, n, method)
+        clusters = [numpy.flatnonzero(labels == i) for i in range(labels.max() + 1)]
+        clusters = [members for members in clusters if len(members)]
+        if method == 'kmedoids':
+            representatives = numpy.stack([points[self.get_medoid(points, members)] for members in clusters])
+        else:
+            # Weighted mean keeps the yearly energy of each profile
+            representatives = numpy.stack([(points[members] * weights[members][:,:,None]).sum(axis=0)
+                                           / weights[members].sum(axis=0)[:,None] for members in clusters])
+        wght = numpy.stack([weights[members].sum(axis=0) for members in clusters])
+        self.labels = labels
+
+        # Map back to (week, hour) slices and quantify the error of the representation
+        if period == 'week':
+            weeks = [self.weeks[self.get_medoid(points, members)] for members in clusters]
+            hours = self.hours
+            values, wght = representatives, wght
+            mapped = representatives[labels]
+        elif method == 'chronological':
+            weeks = self.weeks
+            hours = [self.hours[members[0]] for members in clusters]
+            values, wght = representatives.transpose(1, 0, 2), wght.T
+            mapped = representatives[labels].transpose(1, 0, 2)
+        else:
+            weeks = [self.weeks[0]]
+            hours = ['t' + str(i + 1).zfill(len(str(len(clusters)))) for i in range(len(clusters))]
+            values, wght = representatives.transpose(1, 0, 2), wght.T
+            mapped = representatives[labels].reshape(self.profiles.shape)
+        self.error = self.get_error(mapped)
+
+        data = dict(self.data)
+        data['w_data'] = {'week': weeks}
+        data['h_data'] = {'hour': hours}
+        data['wh_data'] = {'week': [w for w in weeks for h in hours],
+                           'hour': [h for w in weeks for h in hours]}
+        for i, column in enumerate(self.columns):
+            data['wh_data'][column] = values[:,:,i].ravel().tolist()
+        data['wh_data']['wght'] = wght.ravel().tolist()
+        return data
+
+    def get_clusters(self, points: object, n: int, method: str) -> object:
+        """Return cluster label of each point by k-means or k-medoids on the normalised profiles."""
+        x = points[:,:,self.features].reshape(len(points), -1)
+        scale = numpy.abs(x).max(axis=0)
+        x = x / numpy.where(scale > 0, scale, 1)
+        n = min(n, len(x))
+        rng = numpy.random.default_rng(self.seed)
+        # k-means++ initial centres
+        centres = [rng.integers(len(x))]
+        for i in range(1, n):
+            distance = self.get_distances(x, x[centres]).min(axis=1)
+            centres.append(rng.choice(len(x), p=distance/distance.sum()) if distance.sum() > 0 else i)
+        centres = x[centres]
+        for iteration in range(100):
+            labels = self.get_distances(x, centres).argmin(axis=1)
+            if method == 'kmedoids':
+                new = [x[self.get_medoid(x, numpy.flatnonzero(labels == i))] if (labels == i).any()
+                       else centres[i] for i in range(n)]
+            else:
+                new = [x[labels == i].mean(axis=0) if (labels == i).any() else centres[i] for i in range(n)]
+            new = numpy.stack(new)
+            if numpy.allclose(new, centres):
+                break
+            centres = new
+        return labels
+
+    def get_medoid(self, points: object, members: object) -> int:
+        """Return the member point with least total distance to the other members."""
+        x = points[members].reshape(len(members), -1)
+        return members[numpy.sqrt(self.get_distances(x, x)).sum(axis=1).argmin()]
+
+    def get_distances(self, x: object, y: object) -> object:
+        """Return matrix of squared euclidean distances between rows of x and rows of y."""
+        # Expanded as |x|^2 + |y|^2 - 2xy, so memory is len(x) x len(y) rather than times features
+        distance = (x**2).sum(axis=1)[:,None] + (y**2).sum(axis=1)[None,:] - 2 * x @ y.T
+        return numpy.maximum(distance, 0)
+
+    def get_error(self, mapped: object) -> object:
+        """Return dataframe of errors by profile between original and aggregated time slices."""
+        diff = mapped - self.profiles
+        total = (self.profiles * self.wght[:,:,None]).sum(axis=(0,1))
+        return pandas.DataFrame({
+            'rmse': numpy.sqrt((diff**2).mean(axis=(0,1))),             # Root mean square error by slice
+            'max': numpy.abs(diff).max(axis=(0,1)),                     # Largest error of any slice
+            'energy': (diff * self.wght[:,:,None]).sum(axis=(0,1))      # Relative error of yearly sum
+                      / numpy.where(total != 0, total, 1),
+        }, index=self.columns)
@@ -0,0 +1,184 @@
+import numpy
+import pandas
+
+# Columns of each input table that preprocessing uses, other columns are optional
+COLUMNS = {
+    'r_data':  ['rgio'],
+    'e_data':  ['ener','tfrq'],
+    'er_data': ['ener','rgio','lFin','vFin'],
+    'a_data':  ['asst','role','rgio','dest','cstC','cstV','vAva'],
+    'ae_data': ['asst','ener','effi'],
+    'ay_data': ['asst','year','iniC','maxC'],
+    'w_data':  ['week'],
+    'h_data':  ['hour'],
+    'wh_data': ['week','hour'],
+}
+
+# Key columns of each input table, which must be unique
+KEYS = {
+    'r_data':  ['rgio'],
+    'e_data':  ['ener'],
+    'er_data': ['ener','rgio'],
+    'a_data':  ['asst'],
+    'ae_data': ['asst','ener'],
+    'ay_data': ['asst','year'],
+    'w_data':  ['week'],
+    'h_data':  ['hour'],
+    'wh_data': ['week','hour'],
+}
+
+# Columns that must hold members of a main set: (table, column, set table, set column)
+MEMBERS = [
+    ('er_data', 'ener', 'e_data', 'ener'),
+    ('er_data', 'rgio', 'r_data', 'rgio'),
+    ('a_data',  'rgio', 'r_data', 'rgio'),
+    ('ae_data', 'asst', 'a_data', 'asst'),
+    ('ae_data', 'ener', 'e_data', 'ener'),
+    ('ay_data', 'asst', 'a_data', 'asst'),
+    ('wh_data', 'week', 'w_data', 'week'),
+    ('wh_data', 'hour', 'h_data', 'hour'),
+]
+
+# Allowed values of choice columns
+CHOICES = {
+    ('a_data', 'role'): ['prim','tfrm','trms','stor'],
+    ('e_data', 'tfrq'): ['hour','week','year'],
+}
+
+# Columns of wh_data that are not hourly profiles
+NOT_PROFILES = ['week','hour','wght']
+
+
+class PyMorelValidationError(ValueError):
+    """Input data failed validation, the PyMorelValidation report is in attribute report."""
+
+    def __init__(self, report: object):
+        super().__init__("Input data is not valid:\n" + str(report))
+        self.report = report
+
+
+class PyMorelValidation():
+    """Checks input tables once with vectorized pandas operations, before any set or parameter is built.
+
+    Each finding is a dict with severity ('error' or 'warning'), check, table, column, the offending
+    values (at most max_values of them), their count and a message."""
+
+    def __init__(self, tables: dict, max_values: int = 10):
+        self.tables = {name: pandas.DataFrame(data) for name, data in tables.items()}
+        self.max_values = max_values
+        self.issues = []
+
+    def validate(self) -> object:
+        """Run all checks and return self."""
+        if self.check_columns():
+            self.check_keys()
+            self.check_members()
+            self.check_choices()
+            self.check_dest()
+            self.check_profiles()
+            self.check_time_slices()
+        return self
+
+    @property
+    def errors(self) -> list:
+        return [issue for issue in self.issues if issue['severity'] == 'error']
+
+    @property
+    def warnings(self) -> list:
+        return [issue for issue in self.issues if issue['severity'] == 'warning']
+
+    def add(self, severity: str, check: str, table: str, column: str, values: object, message: str):
+        """Record a finding for the offending values (a list or series)."""
+        values = list(dict.fromkeys(values))
+        self.issues.append({'severity': severity, 'check': check, 'table': table, 'column': column,
+                            'values': values[:self.max_values], 'count': len(values), 'message': message})
+
+    def get_strings(self, table: str, column: str) -> object:
+        """Return column of table as NumPy array of str."""
+        return self.tables[table][column].astype(str).to_numpy(dtype=str)
+
+    def check_columns(self) -> bool:
+        """Tables and the columns used by preprocessing must exist. Returns False if any is missing."""
+        for table, columns in COLUMNS.items():
+            if table not in self.tables:
+                self.add('error', 'missing', table, None, [], "Input table is missing.")
+                continue
+            missing = [column for column in columns if column not in self.tables[table].columns]
+            if missing:
+                self.add('error', 'missing', table, None, missing, "Input table lacks columns.")
+        return not self.errors
+
+    def check_keys(self):
+        """Key columns of each table must be unique."""
+        for table, columns in KEYS.items():
+            df = self.tables[table]
+            duplicated = df.duplicated(columns, keep=False)
+            if duplicated.any():
+                keys = df.loc[duplicated, columns].astype(str).agg(','.join, axis=1) if len(columns) > 1 \
+                    else df.loc[duplicated, columns[0]]
+                self.add('error', 'duplicate', table, ','.join(columns), keys, "Duplicate keys.")
+
+    def check_members(self):
+        """Columns referring to a main set must hold its members only."""
+        for table, column, set_table, set_column in MEMBERS:
+            values = self.get_strings(table, column)
+            unknown = values[~numpy.isin(values, self.get_strings(set_table, set_column))]
+            if len(unknown):
+                self.add('error', 'membership', table, column, unknown,
+                         "Values are not in " + set_table + " column " + set_column + ".")
+
+    def check_choices(self):
+        """Choice columns must hold one of their allowed values."""
+        for (table, column), choices in CHOICES.items():
+            values = self.get_strings(table, column)
+            unknown = values[~numpy.isin(values, choices)]
+            if len(unknown):
+                self.add('error', 'choice', table, column, unknown, "Values are not one of " + ', '.join(choices) + ".")
+
+    def check_dest(self):
+        """Transmission assets must have a destination region other than their own region."""
+        asst, role = self.get_strings('a_data', 'asst'), self.get_strings('a_data', 'role')
+        rgio, dest = self.get_strings('a_data', 'rgio'), self.get_strings('a_data', 'dest')
+        trms = role == 'trms'
+        invalid = trms & (~numpy.isin(dest, self.get_strings('r_data', 'rgio')) | (dest == rgio))
+        if invalid.any():
+            self.add('error', 'dest', 'a_data', 'dest', asst[invalid],
+                     "Transmission assets have no valid destination region.")
+        other = ~trms & ~numpy.isin(dest, ['', 'nan', 'None'])
+        if other.any():
+            self.add('warning', 'dest', 'a_data', 'dest', asst[other],
+                     "Destination region is ignored for assets that are not transmission.")
+
+    def check_profiles(self):
+        """Profile choices vAva and vFin must name hourly profile columns of wh_data."""
+        profiles = [str(column) for column in self.tables['wh_data'].columns if column not in NOT_PROFILES]
+        for table, column in [('a_data', 'vAva'), ('er_data', 'vFin')]:
+            values = self.get_strings(table, column)
+            unknown = values[~numpy.isin(values, profiles)]
+            if len(unknown):
+                self.add('error', 'profile', table, column, unknown, "Profiles are not columns of wh_data.")
+        if 'uniform' not in profiles:
+            self.add('warning', 'profile', 'wh_data', 'uniform', [],
+                     "Profile uniform is missing, so variable costs cstV are zero.")
+
+    def check_time_slices(self):
+        """wh_data should hold every (week,hour) time slice."""
+        weeks, hours = self.get_strings('w_data', 'week'), self.get_strings('h_data', 'hour')
+        w = pandas.Index(weeks).get_indexer(self.get_strings('wh_data', 'week'))
+        h = pandas.Index(hours).get_indexer(self.get_strings('wh_data', 'hour'))
+        covered = numpy.zeros(len(weeks) * len(hours), dtype=bool)
+        covered[(w * len(hours) + h)[(w >= 0) & (h >= 0)]] = True
+        missing = numpy.flatnonzero(~covered)
+        if len(missing):
+            self.add('warning', 'coverage', 'wh_data', 'week,hour',
+                     [weeks[i // len(hours)] + ',' + hours[i % len(hours)] for i in missing],
+                     "Time slices are missing, their profiles and weights are zero.")
+
+    def to_frame(self) -> object:
+        """Return the findings as dataframe, one row per finding."""
+        return pandas.DataFrame(self.issues, columns=['severity','check','table','column','values','count','message'])
+
+    def __str__(self) -> str:
+        return '\n'.join('%s: %s.%s %s (%d): %s' % (issue['severity'], issue['table'], issue['column'] or '',
+                                                    issue['message'], issue['count'], issue['values'])
+                         for issue in self.issues) or 'No findings.'